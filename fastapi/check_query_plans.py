@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Query plan regression check for the hot read/write paths.
+
+Builds a scratch database from the migrations, seeds it with a realistic
+dataset, runs each hot crud/route/job query and EXPLAINs every statement it
+issued. The check fails (exit code 1) if any of them scans one of
+HOT_TABLES sequentially instead of through an index.
+
+- PostgreSQL: everything happens in a throwaway ``query_plan_check`` schema
+  of the target database, dropped afterwards. A plan fails on a
+  ``Seq Scan`` node over a hot table.
+- SQLite: a temporary database file. A plan fails on ``SCAN <table>``
+  (a full table or index walk) as opposed to ``SEARCH``.
+
+Statements are captured from the real functions, so a crud change that
+defeats an index shows up here. Each case runs in a transaction that is
+rolled back, so write paths (mark read, ...) can be checked too.
+
+Usage:
+    python check_query_plans.py [--url postgresql://...] [--scale 1] [--verbose]
+    python check_query_plans.py --url sqlite://
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from alembic import command
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.orm import Session
+
+from database import crud, models, schemas
+from database.database import DATABASE_URL
+from routes import messages as messages_routes
+from routes import notifications as notifications_routes
+from services import overdue_payments, realtime
+import migrate
+
+SCRATCH_SCHEMA = "query_plan_check"
+HOT_TABLES = ("notifications", "messages", "units", "payments", "appointments")
+
+# Dataset size at --scale 1
+BUILDERS = 20
+CUSTOMERS = 2000
+PROJECTS = 100
+UNITS_PER_PROJECT = 100
+BOOKINGS = 4000
+PAYMENTS_PER_BOOKING = 4
+APPOINTMENTS = 20000
+MESSAGES = 100000
+NOTIFICATIONS = 100000
+
+
+@dataclass
+class Sample:
+    """IDs the cases query for, picked from the seeded data."""
+    customer_user: models.User
+    builder_user: models.User
+    project_id: int
+    booking_id: int
+    notification_id: int
+
+
+# ============= DATABASE =============
+
+def create_scratch_engine(url: str):
+    """Engine for a scratch database (SQLite file) or schema (PostgreSQL)."""
+    if url.startswith("sqlite"):
+        if url in ("sqlite://", "sqlite:///:memory:"):
+            url = f"sqlite:///{tempfile.mkdtemp()}/query_plans.db"
+        return create_engine(url)
+    admin = create_engine(url)
+    with admin.begin() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCRATCH_SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCRATCH_SCHEMA}"))
+    admin.dispose()
+    return create_engine(url, connect_args={"options": f"-csearch_path={SCRATCH_SCHEMA}"})
+
+
+def drop_scratch(engine) -> None:
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as connection:
+            connection.execute(text(f"DROP SCHEMA IF EXISTS {SCRATCH_SCHEMA} CASCADE"))
+    else:
+        Path(engine.url.database).unlink(missing_ok=True)
+    engine.dispose()
+
+
+def build_schema(engine) -> None:
+    with engine.connect() as connection:
+        command.upgrade(migrate.get_config(connection), "head")
+        connection.commit()
+
+
+def _insert(connection, model, rows: List[dict], chunk_size: int = 5000) -> None:
+    for start in range(0, len(rows), chunk_size):
+        connection.execute(insert(model), rows[start:start + chunk_size])
+
+
+def seed(engine, scale: int = 1, seed_value: int = 42) -> None:
+    """Insert a deterministic dataset: most payments settled, most notifications read."""
+    rng = random.Random(seed_value)
+    now = datetime.now(timezone.utc)
+    today = date.today()
+    builders, customers, projects = BUILDERS, CUSTOMERS * scale, PROJECTS * scale
+    units = projects * UNITS_PER_PROJECT
+    bookings = min(BOOKINGS * scale, units)
+
+    builder_user_ids = list(range(1, builders + 1))
+    customer_user_ids = list(range(builders + 1, builders + customers + 1))
+    users = [
+        {
+            "id": user_id,
+            "email": f"user{user_id}@example.com",
+            "password_hash": "x",
+            "user_type": models.UserType.BUILDER if user_id <= builders else models.UserType.CUSTOMER,
+        }
+        for user_id in builder_user_ids + customer_user_ids
+    ]
+    project_builder = {project_id: rng.randint(1, builders) for project_id in range(1, projects + 1)}
+    unit_status = [models.UnitStatus.AVAILABLE] * 6 + [models.UnitStatus.BOOKED, models.UnitStatus.SOLD, models.UnitStatus.RESERVED]
+
+    with engine.begin() as connection:
+        _insert(connection, models.User, users)
+        _insert(connection, models.Builder, [
+            {"id": i, "user_id": i, "company_name": f"Builder {i}", "license_number": f"LIC{i}", "phone": "1", "address": "-"}
+            for i in builder_user_ids
+        ])
+        _insert(connection, models.Customer, [
+            {"id": i, "user_id": user_id, "first_name": "C", "last_name": str(i), "phone": "1"}
+            for i, user_id in enumerate(customer_user_ids, start=1)
+        ])
+        _insert(connection, models.Project, [
+            {
+                "id": i, "builder_id": builder_id, "project_name": f"Project {i}",
+                "project_type": models.ProjectType.RESIDENTIAL, "location_address": "-",
+                "location_city": "City", "location_state": "State", "location_zipcode": "000000",
+                "total_units": UNITS_PER_PROJECT, "available_units": UNITS_PER_PROJECT,
+            }
+            for i, builder_id in project_builder.items()
+        ])
+        _insert(connection, models.Unit, [
+            {
+                "id": i, "project_id": (i - 1) // UNITS_PER_PROJECT + 1, "unit_number": str(i),
+                "unit_type": models.UnitType.TWO_BHK, "floor_number": i % 20, "area_sqft": Decimal("1000"),
+                "price": Decimal(rng.randint(50, 200) * 100000), "bathrooms": 2,
+                "status": rng.choice(unit_status),
+            }
+            for i in range(1, units + 1)
+        ])
+        booked_units = rng.sample(range(1, units + 1), bookings)
+        _insert(connection, models.Booking, [
+            {"id": i, "customer_id": rng.randint(1, customers), "unit_id": unit_id, "total_amount": Decimal("10000000")}
+            for i, unit_id in enumerate(booked_units, start=1)
+        ])
+
+        payments = []
+        for booking_id in range(1, bookings + 1):
+            for n in range(PAYMENTS_PER_BOOKING):
+                due = today + timedelta(days=rng.randint(-720, 720))
+                if due >= today:
+                    status = models.PaymentStatus.PENDING
+                else:
+                    # A few stay overdue
+                    status = models.PaymentStatus.PENDING if rng.random() < 0.03 else models.PaymentStatus.COMPLETED
+                payments.append({
+                    "booking_id": booking_id, "payment_type": models.PaymentType.INSTALLMENT,
+                    "amount": Decimal("250000"), "payment_method": models.PaymentMethod.BANK_TRANSFER,
+                    "payment_status": status, "due_date": due,
+                })
+        _insert(connection, models.Payment, payments)
+
+        _insert(connection, models.Appointment, [
+            {
+                "customer_id": rng.randint(1, customers), "project_id": rng.randint(1, projects),
+                "appointment_type": models.AppointmentType.SITE_VISIT,
+                "appointment_date": now + timedelta(hours=rng.randint(-24 * 365, 24 * 365)),
+                "status": models.AppointmentStatus.SCHEDULED, "created_by": models.UserType.CUSTOMER,
+            }
+            for _ in range(APPOINTMENTS * scale)
+        ])
+
+        messages = []
+        for _ in range(MESSAGES * scale):
+            project_id = rng.randint(1, projects)
+            customer_user_id = rng.choice(customer_user_ids)
+            builder_user_id = project_builder[project_id]
+            sender, recipient = (customer_user_id, builder_user_id) if rng.random() < 0.5 else (builder_user_id, customer_user_id)
+            created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 730))
+            messages.append({
+                "sender_id": sender, "recipient_id": recipient, "project_id": project_id,
+                "message_content": "-", "is_read": created_at < now - timedelta(days=7) or rng.random() < 0.5,
+                "created_at": created_at,
+            })
+        _insert(connection, models.Message, messages)
+
+        notifications = []
+        for _ in range(NOTIFICATIONS * scale):
+            created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+            notifications.append({
+                "user_id": rng.choice(customer_user_ids), "notification_type": models.NotificationType.PROGRESS_UPDATE,
+                "title": "-", "message": "-", "is_read": created_at < now - timedelta(days=14) or rng.random() < 0.3,
+                "created_at": created_at,
+            })
+        _insert(connection, models.Notification, notifications)
+
+        if connection.dialect.name == "postgresql":
+            for table in models.Base.metadata.sorted_tables:
+                connection.execute(text(f"ANALYZE {table.name}"))
+            # Explicit ids bypassed the sequences
+            for table in ("users", "builders", "customers", "projects", "units", "bookings"):
+                connection.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"))
+        else:
+            connection.execute(text("ANALYZE"))
+
+
+def pick_sample(db: Session) -> Sample:
+    """A busy customer and the builder of a project they have talked about."""
+    message = db.query(models.Message).join(
+        models.User, models.Message.sender_id == models.User.id
+    ).filter(models.User.user_type == models.UserType.CUSTOMER).order_by(models.Message.id).first()
+    notification = db.query(models.Notification).filter(
+        models.Notification.user_id == message.sender_id
+    ).order_by(models.Notification.id.desc()).offset(5).first()
+    return Sample(
+        customer_user=db.get(models.User, message.sender_id),
+        builder_user=db.get(models.User, message.recipient_id),
+        project_id=message.project_id,
+        booking_id=db.query(models.Booking.id).order_by(models.Booking.id).first()[0],
+        notification_id=notification.id if notification is not None else 0,
+    )
+
+
+# ============= CASES =============
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+CASES: List[Tuple[str, Callable[[Session, Sample], object]]] = [
+    ("crud.get_notifications_for_user", lambda db, s: crud.get_notifications_for_user(
+        db, s.customer_user.id, schemas.NotificationFilter())),
+    ("crud.get_notifications_for_user (unread)", lambda db, s: crud.get_notifications_for_user(
+        db, s.customer_user.id, schemas.NotificationFilter(is_read=False))),
+    ("GET /api/notifications", lambda db, s: notifications_routes.get_notifications(
+        unread_only=False, limit=20, current_user=s.customer_user, db=db)),
+    ("GET /api/notifications?unread_only", lambda db, s: notifications_routes.get_notifications(
+        unread_only=True, limit=20, current_user=s.customer_user, db=db)),
+    ("crud.get_notifications_after", lambda db, s: crud.get_notifications_after(
+        db, s.customer_user.id, s.notification_id)),
+    ("crud.get_latest_notification_id", lambda db, s: crud.get_latest_notification_id(db, s.customer_user.id)),
+    ("crud.mark_all_notifications_as_read", lambda db, s: crud.mark_all_notifications_as_read(db, s.customer_user.id)),
+    ("crud.get_messages_for_user", lambda db, s: crud.get_messages_for_user(
+        db, s.customer_user.id, since=_now() - timedelta(days=90))),
+    ("crud.get_conversations", lambda db, s: crud.get_conversations(db, s.customer_user.id)),
+    ("GET /api/messages/conversation/{customer}/{project}", lambda db, s: messages_routes.get_conversation_messages(
+        s.customer_user.id, s.project_id, page=1, limit=50, current_user=s.builder_user, db=db)),
+    ("crud.mark_conversation_read", lambda db, s: crud.mark_conversation_read(
+        db, s.builder_user.id, s.customer_user.id, s.project_id)),
+    ("crud.get_units_by_project", lambda db, s: crud.get_units_by_project(db, s.project_id)),
+    ("crud.get_units_by_project (features)", lambda db, s: crud.get_units_by_project(
+        db, s.project_id, features=["Corner Unit"])),
+    ("crud.get_available_units_by_project", lambda db, s: crud.get_available_units_by_project(db, s.project_id)),
+    ("crud.get_payments_by_booking", lambda db, s: crud.get_payments_by_booking(db, s.booking_id)),
+    ("overdue_payments batch", lambda db, s: db.execute(
+        overdue_payments._overdue_batch_query(date.today(), overdue_payments.BATCH_SIZE)).all()),
+    ("crud.get_appointments_by_project", lambda db, s: crud.get_appointments_by_project(db, s.project_id)),
+    ("crud.get_project_busy_index", lambda db, s: crud.get_project_busy_index(
+        db, s.project_id, _now(), _now() + timedelta(days=1))),
+]
+
+
+# ============= PLANS =============
+
+def explain(connection, statement: str, parameters) -> Tuple[List[str], List[str]]:
+    """(plan lines, hot tables scanned sequentially) for one statement."""
+    if connection.dialect.name == "postgresql":
+        plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        lines, scanned = [], []
+
+        def walk(node, depth=0):
+            relation = node.get("Relation Name")
+            lines.append("  " * depth + node["Node Type"] + (f" on {relation}" if relation else "")
+                         + (f" using {node['Index Name']}" if node.get("Index Name") else ""))
+            if node["Node Type"] == "Seq Scan" and relation in HOT_TABLES:
+                scanned.append(relation)
+            for child in node.get("Plans", []):
+                walk(child, depth + 1)
+
+        walk(plan[0]["Plan"])
+        return lines, scanned
+
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    lines = [row[3] for row in rows]
+    scanned = []
+    for line in lines:
+        words = line.split()
+        if words[0] == "SCAN" and len(words) > 1 and words[1] in HOT_TABLES:
+            scanned.append(words[1])
+    return lines, scanned
+
+
+def capture_statements(connection, run: Callable[[], object]) -> List[Tuple[str, object]]:
+    """Statements (with parameters) executed on `connection` while `run` runs."""
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        verb = statement.lstrip().split(None, 1)[0].upper()
+        if not executemany and verb in ("SELECT", "UPDATE", "DELETE", "WITH"):
+            captured.append((statement, parameters))
+
+    event.listen(connection, "before_cursor_execute", before_cursor_execute)
+    try:
+        run()
+    finally:
+        event.remove(connection, "before_cursor_execute", before_cursor_execute)
+    return captured
+
+
+def check(engine, verbose: bool = False) -> List[str]:
+    """Run every case; returns the names of those with sequential scans."""
+    realtime.hub.set_backend(realtime.InMemoryBackend())
+    with engine.connect() as connection:
+        with Session(bind=connection) as db:
+            sample = pick_sample(db)
+        failures = []
+        for name, case in CASES:
+            transaction = connection.begin()
+            try:
+                db = Session(bind=connection, join_transaction_mode="create_savepoint")
+                statements = capture_statements(connection, lambda: case(db, sample))
+                scanned_tables = []
+                plans = []
+                for statement, parameters in statements:
+                    lines, scanned = explain(connection, statement, parameters)
+                    plans.append((statement, lines))
+                    scanned_tables.extend(scanned)
+                db.close()
+            finally:
+                transaction.rollback()
+
+            status = "FAIL" if scanned_tables else "ok"
+            detail = f" (sequential scan on {', '.join(sorted(set(scanned_tables)))})" if scanned_tables else ""
+            print(f"{status:4}  {name}{detail}")
+            if scanned_tables:
+                failures.append(name)
+            if verbose or scanned_tables:
+                for statement, lines in plans:
+                    print("      " + " ".join(statement.split())[:160])
+                    for line in lines:
+                        print(f"        {line}")
+        return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fail if hot queries regress to sequential scans")
+    parser.add_argument("--url", default=DATABASE_URL, help="Database to check against (default: the app database, in a scratch schema)")
+    parser.add_argument("--scale", type=int, default=1, help="Multiply the seeded dataset (default: 1)")
+    parser.add_argument("--verbose", action="store_true", help="Print every plan")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch schema/database")
+    args = parser.parse_args()
+
+    engine = create_scratch_engine(args.url)
+    try:
+        print(f"🗄️  Building scratch database ({engine.dialect.name}) and seeding...")
+        build_schema(engine)
+        seed(engine, scale=args.scale)
+        failures = check(engine, verbose=args.verbose)
+    finally:
+        if not args.keep:
+            drop_scratch(engine)
+
+    if failures:
+        print(f"\n❌ {len(failures)} of {len(CASES)} queries scan a hot table sequentially")
+        sys.exit(1)
+    print(f"\n✅ All {len(CASES)} queries use indexes")
@@ -1,10 +1,12 @@
 """Authentication utilities and dependencies."""
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from typing import Optional
+import hashlib
+import secrets
 from jose import JWTError, jwt
 
 from database import crud, models
@@ -38,27 +40,72 @@ def create_refresh_token(data: dict):
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+def _hash_calendar_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def issue_calendar_feed_token(db: Session, user_id: int) -> str:
+    """Create a new calendar feed secret for a user, revoking the previous one.
+    
+    Calendar apps cannot send headers, so the secret travels in the feed URL.
+    It is a random value that only grants the feed (never a JWT) and only its
+    hash is stored.
+    """
+    token = secrets.token_urlsafe(32)
+    crud.set_calendar_feed_token_hash(db, user_id, _hash_calendar_token(token))
+    return token
+
+
+def revoke_calendar_feed_token(db: Session, user_id: int) -> None:
+    """Invalidate a user's calendar feed URL."""
+    crud.set_calendar_feed_token_hash(db, user_id, None)
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
 ) -> models.User:
-    """Get current authenticated user."""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    """Get current authenticated user (access tokens only)."""
+    user = get_user_from_token(db, token, token_type="access")
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
+
+def get_user_from_token(db: Session, token: str, token_type: str = "access") -> Optional[models.User]:
+    """Resolve an active user from a JWT of the given type, or None if invalid.
+    
+    Used for the Authorization header and for transports that cannot send
+    one (WebSocket, EventSource) and pass the token as a query parameter.
+    """
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
+        return None
+    if payload.get("type") != token_type or payload.get("sub") is None:
+        return None
     
-    user = crud.get_user_by_id(db, user_id=int(user_id))
-    if user is None:
-        raise credentials_exception
+    user = crud.get_user_by_id(db, user_id=int(payload["sub"]))
+    if user is None or not user.is_active:
+        return None
+    return user
+
+
+def get_calendar_user(
+    token: str = Query(..., description="Calendar feed token"),
+    db: Session = Depends(get_db)
+) -> models.User:
+    """Get the user a calendar feed secret was issued to."""
+    user = crud.get_user_by_calendar_feed_token_hash(db, _hash_calendar_token(token))
+    if user is None or not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid calendar token"
+        )
     return user
 
 
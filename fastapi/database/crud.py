@@ -1,12 +1,15 @@
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, desc, asc
-from typing import List, Optional, Dict, Any
-from datetime import datetime, date
+from sqlalchemy import and_, or_, desc, asc, insert, select, update, func, literal, case, exists, type_coerce, bindparam
+from sqlalchemy.dialects.postgresql import JSONB
+from pydantic import ValidationError
+from typing import List, Optional, Dict, Any, Iterable, Union
+from datetime import datetime, date, timedelta, timezone
 from decimal import Decimal
 import math
 import bcrypt
 
 from database import models, schemas
+from services import appointment_slots, notification_digest, realtime
 
 # ============= UTILITY FUNCTIONS =============
 
@@ -36,6 +39,20 @@ def create_pagination_metadata(page: int, limit: int, total_items: int) -> Dict[
         "hasPrev": page > 1
     }
 
+def json_contains_all(db: Session, column, values: List[str]):
+    """Filter: the JSON array `column` contains every one of `values`.
+    
+    On PostgreSQL this is JSONB containment (``@>``), served by the column's
+    GIN index; elsewhere (SQLite) one ``json_each`` lookup per value.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return type_coerce(column, JSONB).contains(list(values))
+    conditions = []
+    for value in values:
+        elements = func.json_each(column).table_valued("value")
+        conditions.append(exists().select_from(elements).where(elements.c.value == value))
+    return and_(*conditions)
+
 
 # ============= USER CRUD =============
 
@@ -75,6 +92,7 @@ def create_user(db: Session, user: schemas.UserCreate) -> models.User:
         )
         db.add(db_customer)
     
+    db.add(models.UserUnreadCounter(user_id=db_user.id))
     db.commit()
     db.refresh(db_user)
     return db_user
@@ -86,6 +104,17 @@ def update_user_last_login(db: Session, user_id: int) -> None:
     })
     db.commit()
 
+def set_calendar_feed_token_hash(db: Session, user_id: int, token_hash: Optional[str]) -> None:
+    """Store (or with None, revoke) the hash of a user's calendar feed secret."""
+    db.query(models.User).filter(models.User.id == user_id).update({
+        "calendar_feed_token_hash": token_hash
+    })
+    db.commit()
+
+def get_user_by_calendar_feed_token_hash(db: Session, token_hash: str) -> Optional[models.User]:
+    """Get the user whose calendar feed secret hashes to `token_hash`."""
+    return db.query(models.User).filter(models.User.calendar_feed_token_hash == token_hash).first()
+
 
 # ============= BUILDER CRUD =============
 
@@ -161,6 +190,8 @@ def get_projects(
         query = query.filter(models.Project.builder_id == filters.builder_id)
     if filters.project_type:
         query = query.filter(models.Project.project_type == filters.project_type)
+    if filters.amenities:
+        query = query.filter(json_contains_all(db, models.Project.amenities, filters.amenities))
     
     # Get total count
     total_items = query.count()
@@ -187,14 +218,39 @@ def update_project(db: Session, project_id: int, project_update: schemas.Project
     return get_project(db, project_id)
 
 def delete_project(db: Session, project_id: int) -> bool:
-    """Delete a project."""
-    project = get_project(db, project_id)
-    if not project:
+    """Delete a project with a single DELETE.
+    
+    Its units, bookings, payments, appointments, progress, updates, 3D
+    models and revenue rollups go through the ON DELETE CASCADE foreign keys
+    (messages are kept with project_id set NULL) without being loaded into
+    the session. The builder's dashboard summary is refreshed in the same
+    transaction. Very large projects are first trimmed in chunks by
+    services.project_purge.
+    """
+    builder_id = db.query(models.Project.builder_id).filter(models.Project.id == project_id).scalar()
+    if builder_id is None:
         return False
-    db.delete(project)
-    db.commit()
+    deleted = db.query(models.Project).filter(models.Project.id == project_id).delete()
+    refresh_dashboard_summaries(db, [builder_id])
+    return deleted > 0
+
+def mark_project_deleting(db: Session, project_id: int) -> bool:
+    """Flag a project as being deleted. Returns False if not found or already flagged."""
+    builder_id = db.query(models.Project.builder_id).filter(models.Project.id == project_id).scalar()
+    marked = db.query(models.Project).filter(
+        models.Project.id == project_id,
+        models.Project.deletion_requested_at.is_(None)
+    ).update({models.Project.deletion_requested_at: func.now()}, synchronize_session=False)
+    if not marked:
+        db.rollback()
+        return False
+    refresh_dashboard_summaries(db, [builder_id])
     return True
 
+def count_project_units(db: Session, project_id: int) -> int:
+    """Number of units in a project."""
+    return db.query(func.count(models.Unit.id)).filter(models.Unit.project_id == project_id).scalar()
+
 def get_projects_by_builder(db: Session, builder_id: int) -> List[models.Project]:
     """Get all projects by a specific builder."""
     return db.query(models.Project).filter(
@@ -205,9 +261,27 @@ def get_projects_by_builder(db: Session, builder_id: int) -> List[models.Project
 # ============= UNIT CRUD =============
 
 def create_unit(db: Session, unit: schemas.UnitCreate) -> models.Unit:
-    """Create a new unit."""
+    """Create a new unit and fold it into the project's counters and rollups."""
     db_unit = models.Unit(**unit.dict())
     db.add(db_unit)
+    db.flush()
+    
+    # Locks the project row, so concurrent creates see each other's units below
+    db.query(models.Project).filter(models.Project.id == unit.project_id).update({
+        "total_units": models.Project.total_units + 1
+    }, synchronize_session=False)
+    has_units = db.query(exists().where(
+        models.Unit.project_id == unit.project_id, models.Unit.id != db_unit.id
+    )).scalar()
+    if has_units:
+        adjust_project_rollups(
+            db, unit.project_id,
+            price=db_unit.price,
+            available_delta=1 if db_unit.status == models.UnitStatus.AVAILABLE else 0
+        )
+    else:
+        # First unit replaces the manually entered figures
+        refresh_project_rollups(db, unit.project_id)
     db.commit()
     db.refresh(db_unit)
     return db_unit
@@ -216,11 +290,21 @@ def get_unit_by_id(db: Session, unit_id: int) -> Optional[models.Unit]:
     """Get unit by ID."""
     return db.query(models.Unit).filter(models.Unit.id == unit_id).first()
 
-def get_units_by_project(db: Session, project_id: int) -> List[models.Unit]:
-    """Get all units for a project."""
-    return db.query(models.Unit).filter(
+def get_units_by_project(
+    db: Session,
+    project_id: int,
+    status: Optional[models.UnitStatus] = None,
+    features: Optional[List[str]] = None
+) -> List[models.Unit]:
+    """Get a project's units, optionally by status and with all of `features`."""
+    query = db.query(models.Unit).filter(
         models.Unit.project_id == project_id
-    ).all()
+    )
+    if status:
+        query = query.filter(models.Unit.status == status)
+    if features:
+        query = query.filter(json_contains_all(db, models.Unit.features, features))
+    return query.all()
 
 def get_available_units_by_project(db: Session, project_id: int) -> List[models.Unit]:
     """Get available units for a project."""
@@ -233,37 +317,493 @@ def get_available_units_by_project(db: Session, project_id: int) -> List[models.
 
 def update_unit(db: Session, unit_id: int, unit_update: schemas.UnitUpdate) -> models.Unit:
     """Update unit."""
-    db.query(models.Unit).filter(models.Unit.id == unit_id).update(
-        unit_update.dict(exclude_unset=True)
-    )
+    old = db.query(models.Unit.project_id, models.Unit.price, models.Unit.status).filter(
+        models.Unit.id == unit_id
+    ).first()
+    values = unit_update.dict(exclude_unset=True)
+    db.query(models.Unit).filter(models.Unit.id == unit_id).update(values)
+    if old:
+        _apply_unit_change_to_rollups(
+            db, old.project_id,
+            old_price=old.price, new_price=values.get("price", old.price),
+            old_status=old.status, new_status=values.get("status", old.status)
+        )
     db.commit()
     return get_unit_by_id(db, unit_id)
 
 def update_unit_status(db: Session, unit_id: int, status: models.UnitStatus) -> models.Unit:
     """Update unit status."""
+    old = db.query(models.Unit.project_id, models.Unit.price, models.Unit.status).filter(
+        models.Unit.id == unit_id
+    ).first()
     db.query(models.Unit).filter(models.Unit.id == unit_id).update({"status": status})
+    if old:
+        _apply_unit_change_to_rollups(
+            db, old.project_id,
+            old_price=old.price, new_price=old.price,
+            old_status=old.status, new_status=status
+        )
     db.commit()
     return get_unit_by_id(db, unit_id)
 
+def _insert_units_chunk(db: Session, chunk: List[Dict[str, Any]]) -> None:
+    """Insert a chunk of validated unit rows with a single multi-row INSERT."""
+    if chunk:
+        db.execute(insert(models.Unit).values(chunk))
+
+def bulk_create_units(
+    db: Session,
+    project_id: int,
+    rows: Iterable[Dict[str, Any]],
+    chunk_size: int = 500
+) -> Dict[str, Any]:
+    """Validate and insert units in chunks, reporting per-row errors.
+
+    Rows are numbered from 1 (header excluded). Invalid rows and unit numbers
+    already present in the project are skipped and reported; valid rows are
+    inserted and the project's unit counters are updated once at the end.
+    """
+    existing_numbers = {
+        number for (number,) in db.query(models.Unit.unit_number).filter(
+            models.Unit.project_id == project_id
+        )
+    }
+    errors = []
+    chunk = []
+    created = 0
+    
+    for row_number, row in enumerate(rows, start=1):
+        if not row:
+            continue
+        try:
+            unit = schemas.UnitBase(**row)
+        except ValidationError as e:
+            errors.append({
+                "row": row_number,
+                "errors": [f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors()]
+            })
+            continue
+        if unit.unit_number in existing_numbers:
+            errors.append({"row": row_number, "errors": [f"unit_number: {unit.unit_number} already exists"]})
+            continue
+        
+        existing_numbers.add(unit.unit_number)
+        chunk.append({**unit.dict(), "project_id": project_id})
+        created += 1
+        if len(chunk) >= chunk_size:
+            _insert_units_chunk(db, chunk)
+            chunk = []
+    
+    _insert_units_chunk(db, chunk)
+    
+    # Update project counters and rollups once for the whole batch
+    if created:
+        db.query(models.Project).filter(models.Project.id == project_id).update({
+            "total_units": models.Project.total_units + created
+        }, synchronize_session=False)
+        refresh_project_rollups(db, project_id)
+    db.commit()
+    
+    return {
+        "project_id": project_id,
+        "created": created,
+        "failed": len(errors),
+        "errors": errors
+    }
+
+
+def _unit_revision_filter(revision: schemas.UnitBulkRevision):
+    """Build the WHERE clause selecting the units a revision applies to."""
+    conditions = [models.Unit.project_id == revision.project_id]
+    if revision.unit_type:
+        conditions.append(models.Unit.unit_type == revision.unit_type)
+    if revision.min_floor is not None:
+        conditions.append(models.Unit.floor_number >= revision.min_floor)
+    if revision.max_floor is not None:
+        conditions.append(models.Unit.floor_number <= revision.max_floor)
+    if revision.facing:
+        conditions.append(models.Unit.facing == revision.facing)
+    if revision.current_status:
+        conditions.append(models.Unit.status == revision.current_status)
+    return and_(*conditions)
+
+def _revised_price_expression(revision: schemas.UnitBulkRevision):
+    """Build the SQL expression for a unit's new price."""
+    if revision.mode == models.PriceRevisionMode.PERCENTAGE:
+        return func.round(models.Unit.price * (1 + revision.value / 100), 2)
+    if revision.mode == models.PriceRevisionMode.ABSOLUTE:
+        return models.Unit.price + revision.value
+    if revision.mode == models.PriceRevisionMode.PER_SQFT:
+        return func.round(models.Unit.area_sqft * revision.value, 2)
+    return models.Unit.price
+
+
+def bulk_revise_units(db: Session, revision: schemas.UnitBulkRevision, user_id: int) -> Optional[Dict[str, Any]]:
+    """Apply a price/status revision to all matching units with set-based statements.
+    
+    Returns None, changing nothing, if the revision would leave a unit with a
+    price of zero or less. The units are changed with one UPDATE ... RETURNING
+    that reports each unit's previous price and status, and those rows become
+    the history entries: on PostgreSQL the UPDATE is a CTE feeding the
+    history INSERT, so both happen in a single statement; elsewhere the
+    rows are read first and inserted after, in the same transaction.
+    """
+    condition = _unit_revision_filter(revision)
+    new_price = _revised_price_expression(revision)
+    
+    if revision.mode and db.query(
+        exists().where(condition, new_price <= 0)
+    ).scalar():
+        return None
+    
+    values = {}
+    if revision.mode:
+        values["price"] = new_price
+    if revision.status:
+        values["status"] = revision.status
+    
+    if db.get_bind().dialect.name == "postgresql":
+        # The FROM snapshot still holds each row's values from before the UPDATE
+        previous = select(
+            models.Unit.id, models.Unit.price, models.Unit.status
+        ).where(condition).with_for_update().subquery()
+        changed = (
+            update(models.Unit)
+            .where(models.Unit.id == previous.c.id)
+            .values(values)
+            .returning(
+                models.Unit.id.label("unit_id"),
+                previous.c.price.label("old_price"),
+                models.Unit.price.label("new_price"),
+                previous.c.status.label("old_status"),
+                models.Unit.status.label("new_status")
+            )
+            .cte("changed")
+        )
+        recorded = db.execute(
+            insert(models.UnitPriceHistory).from_select(
+                ["unit_id", "old_price", "new_price", "old_status", "new_status", "reason", "changed_by"],
+                select(
+                    changed.c.unit_id,
+                    changed.c.old_price,
+                    changed.c.new_price,
+                    changed.c.old_status,
+                    changed.c.new_status,
+                    literal(revision.reason, models.UnitPriceHistory.reason.type),
+                    literal(user_id, models.UnitPriceHistory.changed_by.type)
+                )
+            )
+        ).rowcount
+    else:
+        # No data-modifying CTEs: read the old values, then UPDATE ... RETURNING the new ones
+        previous = {
+            row.id: row for row in db.execute(
+                select(models.Unit.id, models.Unit.price, models.Unit.status).where(condition)
+            )
+        }
+        changed = db.execute(
+            update(models.Unit)
+            .where(models.Unit.id.in_(previous))
+            .values(values)
+            .returning(models.Unit.id, models.Unit.price, models.Unit.status),
+            execution_options={"synchronize_session": False}
+        ).all()
+        rows = [
+            {
+                "unit_id": unit_id,
+                "old_price": previous[unit_id].price,
+                "new_price": price,
+                "old_status": previous[unit_id].status,
+                "new_status": status,
+                "reason": revision.reason,
+                "changed_by": user_id
+            }
+            for unit_id, price, status in changed
+        ]
+        if rows:
+            db.execute(insert(models.UnitPriceHistory), rows)
+        recorded = len(rows)
+    
+    # Cached price range and availability on the project are now stale
+    refresh_project_rollups(db, revision.project_id)
+    db.commit()
+    
+    return {
+        "project_id": revision.project_id,
+        "updated": recorded,
+        "history_recorded": recorded
+    }
+
+
+# ============= PROJECT ROLLUPS =============
+# Project.price_range_min/max and available_units are derived from the units
+# table once a project has units. Writes keep them current incrementally;
+# recompute_project_rollups repairs any drift in one set-based UPDATE.
+
+def recompute_project_rollups(
+    db: Session,
+    min_project_id: Optional[int] = None,
+    max_project_id: Optional[int] = None
+) -> int:
+    """Recompute rollups from units for projects in an ID range. Returns rows updated."""
+    rollups = select(
+        models.Unit.project_id,
+        func.min(models.Unit.price).label("min_price"),
+        func.max(models.Unit.price).label("max_price"),
+        func.sum(case((models.Unit.status == models.UnitStatus.AVAILABLE, 1), else_=0)).label("available")
+    ).group_by(models.Unit.project_id)
+    if min_project_id is not None:
+        rollups = rollups.where(models.Unit.project_id >= min_project_id)
+    if max_project_id is not None:
+        rollups = rollups.where(models.Unit.project_id <= max_project_id)
+    rollups = rollups.subquery()
+    
+    result = db.execute(
+        update(models.Project)
+        .where(models.Project.id == rollups.c.project_id)
+        .values(
+            price_range_min=rollups.c.min_price,
+            price_range_max=rollups.c.max_price,
+            available_units=rollups.c.available
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+def refresh_project_rollups(db: Session, project_id: int) -> None:
+    """Recompute a single project's rollups from its units."""
+    recompute_project_rollups(db, min_project_id=project_id, max_project_id=project_id)
+
+def adjust_project_rollups(
+    db: Session,
+    project_id: int,
+    price: Optional[Decimal] = None,
+    available_delta: int = 0
+) -> None:
+    """Widen the price range to include a price and shift the available count."""
+    values = {}
+    if price is not None:
+        # Computed from the row's current values inside the UPDATE, never read beforehand
+        least, greatest = (func.min, func.max) if db.get_bind().dialect.name == "sqlite" else (func.least, func.greatest)
+        values["price_range_min"] = least(func.coalesce(models.Project.price_range_min, price), price)
+        values["price_range_max"] = greatest(func.coalesce(models.Project.price_range_max, price), price)
+    if available_delta:
+        values["available_units"] = models.Project.available_units + available_delta
+    if values:
+        db.query(models.Project).filter(models.Project.id == project_id).update(
+            values, synchronize_session=False
+        )
+
+def _apply_unit_change_to_rollups(
+    db: Session,
+    project_id: int,
+    old_price: Decimal,
+    new_price: Decimal,
+    old_status: models.UnitStatus,
+    new_status: models.UnitStatus
+) -> None:
+    """Fold a single unit's price/status change into its project's rollups."""
+    if new_price != old_price:
+        # Lock the project row so the range cannot change between this read and the update
+        current = db.query(models.Project.price_range_min, models.Project.price_range_max).filter(
+            models.Project.id == project_id
+        ).with_for_update().first()
+        # Moving a boundary unit inwards can shrink the range: recompute
+        if current and (
+            (old_price == current.price_range_min and new_price > old_price)
+            or (old_price == current.price_range_max and new_price < old_price)
+        ):
+            refresh_project_rollups(db, project_id)
+            return
+    
+    available_delta = (
+        (new_status == models.UnitStatus.AVAILABLE) - (old_status == models.UnitStatus.AVAILABLE)
+    )
+    adjust_project_rollups(
+        db, project_id,
+        price=new_price if new_price != old_price else None,
+        available_delta=available_delta
+    )
+
+
+# ============= REVENUE ROLLUPS =============
+# Daily/weekly/monthly bookings, collections and cancellations per project,
+# bumped with an upsert on every relevant write. services/revenue_rollups.py
+# rebuilds them from the raw tables when needed.
+
+def period_start(period: models.RollupPeriod, day: date) -> date:
+    """First day of the rollup period containing a date (weeks start on Monday)."""
+    if period == models.RollupPeriod.WEEK:
+        return day - timedelta(days=day.weekday())
+    if period == models.RollupPeriod.MONTH:
+        return day.replace(day=1)
+    return day
+
+def _upsert_insert(db: Session, model, rows: List[Dict[str, Any]]):
+    """INSERT supporting ON CONFLICT for the session's dialect (Postgres or SQLite)."""
+    if db.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    return dialect_insert(model).values(rows)
+
+def upsert_revenue_rollups(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """Add counts/amounts into rollup buckets, creating missing buckets."""
+    if not rows:
+        return
+    stmt = _upsert_insert(db, models.RevenueRollup, rows)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["project_id", "period", "period_start", "metric", "payment_type", "payment_method"],
+        set_={
+            "count": models.RevenueRollup.count + stmt.excluded.count,
+            "amount": models.RevenueRollup.amount + stmt.excluded.amount,
+            "updated_at": func.now()
+        }
+    ))
+
+def bump_revenue_rollups(
+    db: Session,
+    project_id: int,
+    metric: models.RevenueMetric,
+    day: date,
+    amount: Decimal,
+    count: int = 1,
+    payment_type: str = "",
+    payment_method: str = ""
+) -> None:
+    """Record one event in the day, week and month buckets it falls into."""
+    upsert_revenue_rollups(db, [
+        {
+            "project_id": project_id,
+            "period": period,
+            "period_start": period_start(period, day),
+            "metric": metric,
+            "payment_type": payment_type,
+            "payment_method": payment_method,
+            "count": count,
+            "amount": amount
+        }
+        for period in models.RollupPeriod
+    ])
+
+def get_revenue_series(
+    db: Session,
+    builder_id: int,
+    period: models.RollupPeriod,
+    start: date,
+    end: date,
+    project_id: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Read a revenue time series for a builder's projects from the rollup buckets."""
+    rollup = models.RevenueRollup
+    query = db.query(
+        rollup.period_start, rollup.metric, rollup.payment_type, rollup.payment_method,
+        func.sum(rollup.count), func.sum(rollup.amount)
+    ).join(models.Project, rollup.project_id == models.Project.id).filter(
+        models.Project.builder_id == builder_id,
+        models.Project.deletion_requested_at.is_(None),
+        rollup.period == period,
+        rollup.period_start >= period_start(period, start),
+        rollup.period_start <= end
+    )
+    if project_id:
+        query = query.filter(rollup.project_id == project_id)
+    rows = query.group_by(
+        rollup.period_start, rollup.metric, rollup.payment_type, rollup.payment_method
+    ).order_by(rollup.period_start)
+    
+    series: Dict[date, Dict[str, Any]] = {}
+    for bucket_start, metric, payment_type, payment_method, count, amount in rows:
+        point = series.setdefault(bucket_start, {
+            "period_start": bucket_start,
+            "collections_by_type": {},
+            "collections_by_method": {}
+        })
+        prefix = metric.value
+        point[f"{prefix}_count"] = point.get(f"{prefix}_count", 0) + count
+        point[f"{prefix}_amount"] = point.get(f"{prefix}_amount", 0) + amount
+        if metric == models.RevenueMetric.COLLECTIONS:
+            by_type, by_method = point["collections_by_type"], point["collections_by_method"]
+            by_type[payment_type] = by_type.get(payment_type, 0) + amount
+            by_method[payment_method] = by_method.get(payment_method, 0) + amount
+    return list(series.values())
+
+def _record_collection(
+    db: Session,
+    booking_id: int,
+    payment_type: models.PaymentType,
+    payment_method: models.PaymentMethod,
+    amount: Decimal,
+    day: date,
+    count: int = 1
+) -> None:
+    """Bump collection rollups for a payment on a booking."""
+    project_id = db.query(models.Unit.project_id).join(
+        models.Booking, models.Booking.unit_id == models.Unit.id
+    ).filter(models.Booking.id == booking_id).scalar()
+    if project_id is not None:
+        bump_revenue_rollups(
+            db, project_id, models.RevenueMetric.COLLECTIONS, day, amount, count=count,
+            payment_type=payment_type.value, payment_method=payment_method.value
+        )
+
+def _cancellation_values(db: Session, booking_id: int, new_status: Optional[models.BookingStatus]) -> Dict[str, Any]:
+    """Bump cancellation rollups when a booking enters or leaves CANCELLED.
+    
+    Returns the ``cancelled_at`` value to store with the status change; the
+    rollup day is that timestamp's date, as in services/revenue_rollups.py.
+    """
+    if new_status is None:
+        return {}
+    current = db.query(
+        models.Booking.booking_status, models.Booking.total_amount, models.Booking.cancelled_at,
+        models.Unit.project_id
+    ).join(models.Unit, models.Booking.unit_id == models.Unit.id).filter(
+        models.Booking.id == booking_id
+    ).with_for_update(of=models.Booking).first()
+    if current is None:
+        return {}
+    was_cancelled = current.booking_status == models.BookingStatus.CANCELLED
+    if new_status == models.BookingStatus.CANCELLED and not was_cancelled:
+        cancelled_at = datetime.utcnow()
+        bump_revenue_rollups(
+            db, current.project_id, models.RevenueMetric.CANCELLATIONS, cancelled_at.date(), current.total_amount
+        )
+        return {"cancelled_at": cancelled_at}
+    if new_status != models.BookingStatus.CANCELLED and was_cancelled:
+        if current.cancelled_at is not None:
+            bump_revenue_rollups(
+                db, current.project_id, models.RevenueMetric.CANCELLATIONS, current.cancelled_at.date(),
+                -current.total_amount, count=-1
+            )
+        return {"cancelled_at": None}
+    return {}
+
 
 # ============= BOOKING CRUD =============
 
 def create_booking(db: Session, booking: schemas.BookingCreate) -> models.Booking:
     """Create a new booking."""
-    db_booking = models.Booking(**booking.dict())
+    # Set here rather than by the server so the rollup day matches the stored date
+    booking_date = datetime.utcnow()
+    db_booking = models.Booking(**booking.dict(), booking_date=booking_date)
     db.add(db_booking)
     
+    unit = get_unit_by_id(db, booking.unit_id)
+    was_available = unit is not None and unit.status == models.UnitStatus.AVAILABLE
+    
     # Update unit status to booked
     db.query(models.Unit).filter(models.Unit.id == booking.unit_id).update({
         "status": models.UnitStatus.BOOKED
     })
     
     # Update project available units count
-    unit = get_unit_by_id(db, booking.unit_id)
+    if was_available:
+        adjust_project_rollups(db, unit.project_id, available_delta=-1)
     if unit:
-        db.query(models.Project).filter(models.Project.id == unit.project_id).update({
-            "available_units": models.Project.available_units - 1
-        })
+        bump_revenue_rollups(
+            db, unit.project_id, models.RevenueMetric.BOOKINGS, booking_date.date(), booking.total_amount
+        )
     
     db.commit()
     db.refresh(db_booking)
@@ -290,23 +830,46 @@ def get_bookings_by_unit(db: Session, unit_id: int) -> List[models.Booking]:
 
 def update_booking(db: Session, booking_id: int, booking_update: schemas.BookingUpdate) -> models.Booking:
     """Update booking."""
-    db.query(models.Booking).filter(models.Booking.id == booking_id).update(
-        booking_update.dict(exclude_unset=True)
-    )
+    values = booking_update.dict(exclude_unset=True)
+    values.update(_cancellation_values(db, booking_id, values.get("booking_status")))
+    db.query(models.Booking).filter(models.Booking.id == booking_id).update(values)
     db.commit()
     return get_booking_by_id(db, booking_id)
 
 def update_booking_status(db: Session, booking_id: int, status: models.BookingStatus) -> models.Booking:
     """Update booking status."""
-    db.query(models.Booking).filter(models.Booking.id == booking_id).update({
-        "booking_status": status
-    })
+    values = {"booking_status": status, **_cancellation_values(db, booking_id, status)}
+    db.query(models.Booking).filter(models.Booking.id == booking_id).update(values)
     db.commit()
     return get_booking_by_id(db, booking_id)
 
 
 # ============= PAYMENT CRUD =============
 
+def _credit_booking(booking_id: int, amount: Decimal):
+    """UPDATE statement that atomically adds an amount to a booking's paid balance.
+    
+    A booking still at inquiry/site-visit stage moves to TOKEN_PAID once
+    money has been received.
+    """
+    new_paid_amount = models.Booking.paid_amount + amount
+    return update(models.Booking).where(models.Booking.id == booking_id).values(
+        paid_amount=new_paid_amount,
+        booking_status=case(
+            (
+                and_(
+                    new_paid_amount > 0,
+                    models.Booking.booking_status.in_([
+                        models.BookingStatus.INQUIRY,
+                        models.BookingStatus.SITE_VISIT_SCHEDULED
+                    ])
+                ),
+                literal(models.BookingStatus.TOKEN_PAID, models.Booking.booking_status.type)
+            ),
+            else_=models.Booking.booking_status
+        )
+    ).execution_options(synchronize_session=False)
+
 def create_payment(db: Session, payment: schemas.PaymentCreate) -> models.Payment:
     """Create a new payment."""
     db_payment = models.Payment(**payment.dict())
@@ -315,6 +878,23 @@ def create_payment(db: Session, payment: schemas.PaymentCreate) -> models.Paymen
     db.refresh(db_payment)
     return db_payment
 
+def record_payment(db: Session, payment: schemas.PaymentCreate) -> models.Payment:
+    """Record a received payment and credit the booking balance in one transaction."""
+    db_payment = models.Payment(
+        **payment.dict(),
+        payment_status=models.PaymentStatus.COMPLETED,
+        paid_date=datetime.utcnow()
+    )
+    db.add(db_payment)
+    db.execute(_credit_booking(payment.booking_id, payment.amount))
+    _record_collection(
+        db, payment.booking_id, payment.payment_type, payment.payment_method,
+        payment.amount, db_payment.paid_date.date()
+    )
+    db.commit()
+    db.refresh(db_payment)
+    return db_payment
+
 def get_payment_by_id(db: Session, payment_id: int) -> Optional[models.Payment]:
     """Get payment by ID."""
     return db.query(models.Payment).filter(models.Payment.id == payment_id).first()
@@ -335,24 +915,129 @@ def get_pending_payments_by_customer(db: Session, customer_id: int) -> List[mode
     ).all()
 
 def update_payment(db: Session, payment_id: int, payment_update: schemas.PaymentUpdate) -> models.Payment:
-    """Update payment."""
-    db.query(models.Payment).filter(models.Payment.id == payment_id).update(
-        payment_update.dict(exclude_unset=True)
-    )
+    """Update payment, keeping the booking balance in step with status changes."""
+    values = payment_update.dict(exclude_unset=True)
+    new_status = values.get("payment_status")
+    
+    if new_status:
+        # Lock the row so concurrent status changes can't double-count
+        current = db.query(
+            models.Payment.booking_id, models.Payment.amount, models.Payment.payment_status,
+            models.Payment.payment_type, models.Payment.payment_method, models.Payment.paid_date
+        ).filter(models.Payment.id == payment_id).with_for_update().first()
+        if current:
+            was_completed = current.payment_status == models.PaymentStatus.COMPLETED
+            is_completed = new_status == models.PaymentStatus.COMPLETED
+            if is_completed and not was_completed:
+                paid_date = values.setdefault("paid_date", datetime.utcnow())
+                db.execute(_credit_booking(current.booking_id, current.amount))
+                _record_collection(
+                    db, current.booking_id, current.payment_type, current.payment_method,
+                    current.amount, paid_date.date()
+                )
+            elif was_completed and not is_completed:
+                db.execute(_credit_booking(current.booking_id, -current.amount))
+                _record_collection(
+                    db, current.booking_id, current.payment_type, current.payment_method,
+                    -current.amount, (current.paid_date or datetime.utcnow()).date(), count=-1
+                )
+    
+    db.query(models.Payment).filter(models.Payment.id == payment_id).update(values)
     db.commit()
     return get_payment_by_id(db, payment_id)
 
+def recompute_booking_balances(
+    db: Session,
+    min_booking_id: Optional[int] = None,
+    max_booking_id: Optional[int] = None
+) -> int:
+    """Rebuild bookings' paid balances from their completed payments. Returns rows updated."""
+    query = update(models.Booking).values(
+        paid_amount=select(func.coalesce(func.sum(models.Payment.amount), 0)).where(
+            and_(
+                models.Payment.booking_id == models.Booking.id,
+                models.Payment.payment_status == models.PaymentStatus.COMPLETED
+            )
+        ).scalar_subquery()
+    ).execution_options(synchronize_session=False)
+    if min_booking_id is not None:
+        query = query.where(models.Booking.id >= min_booking_id)
+    if max_booking_id is not None:
+        query = query.where(models.Booking.id <= max_booking_id)
+    return db.execute(query).rowcount
+
 
 # ============= APPOINTMENT CRUD =============
 
-def create_appointment(db: Session, appointment: schemas.AppointmentCreate) -> models.Appointment:
-    """Create a new appointment."""
+MAX_APPOINTMENT_MINUTES = 480
+
+def get_project_busy_index(
+    db: Session,
+    project_id: int,
+    start: datetime,
+    end: datetime,
+    exclude_appointment_id: Optional[int] = None
+) -> "appointment_slots.IntervalIndex":
+    """Interval index of a project's non-cancelled appointments touching [start, end)."""
+    query = db.query(models.Appointment.appointment_date, models.Appointment.duration_minutes).filter(
+        models.Appointment.project_id == project_id,
+        models.Appointment.status != models.AppointmentStatus.CANCELLED,
+        models.Appointment.appointment_date >= start - timedelta(minutes=MAX_APPOINTMENT_MINUTES),
+        models.Appointment.appointment_date < end
+    )
+    if exclude_appointment_id is not None:
+        query = query.filter(models.Appointment.id != exclude_appointment_id)
+    return appointment_slots.IntervalIndex(
+        appointment_slots.appointment_interval(appointment_date, duration_minutes)
+        for appointment_date, duration_minutes in query
+    )
+
+def _slot_is_free(
+    db: Session,
+    project_id: int,
+    appointment_date: datetime,
+    duration_minutes: Optional[int],
+    exclude_appointment_id: Optional[int] = None
+) -> bool:
+    """Lock the project's calendar and check a slot is free.
+    
+    The project row lock serialises concurrent bookings for the project until
+    the caller commits, so two requests cannot both see the same slot free.
+    """
+    db.query(models.Project.id).filter(models.Project.id == project_id).with_for_update().first()
+    start, end = appointment_slots.appointment_interval(appointment_date, duration_minutes)
+    index = get_project_busy_index(db, project_id, start, end, exclude_appointment_id)
+    return not index.overlaps(start, end)
+
+def create_appointment(db: Session, appointment: schemas.AppointmentCreate) -> Optional[models.Appointment]:
+    """Create a new appointment, or return None if the slot is already taken."""
+    if not _slot_is_free(db, appointment.project_id, appointment.appointment_date, appointment.duration_minutes):
+        db.rollback()
+        return None
     db_appointment = models.Appointment(**appointment.dict())
     db.add(db_appointment)
     db.commit()
     db.refresh(db_appointment)
     return db_appointment
 
+def reschedule_appointment(
+    db: Session,
+    appointment: models.Appointment,
+    appointment_date: datetime,
+    reschedule_reason: Optional[str] = None
+) -> Optional[models.Appointment]:
+    """Move an appointment to a new time, or return None if that slot is taken."""
+    if not _slot_is_free(db, appointment.project_id, appointment_date, appointment.duration_minutes, appointment.id):
+        db.rollback()
+        return None
+    appointment.appointment_date = appointment_date
+    appointment.status = models.AppointmentStatus.RESCHEDULED
+    if reschedule_reason is not None:
+        appointment.reschedule_reason = reschedule_reason
+    db.commit()
+    db.refresh(appointment)
+    return appointment
+
 def get_appointment_by_id(db: Session, appointment_id: int) -> Optional[models.Appointment]:
     """Get appointment by ID."""
     return db.query(models.Appointment).options(
@@ -384,6 +1069,15 @@ def update_appointment(db: Session, appointment_id: int, appointment_update: sch
     db.commit()
     return get_appointment_by_id(db, appointment_id)
 
+def claim_appointment_reminder(db: Session, appointment_id: int, offset_minutes: int, appointment_date: datetime) -> bool:
+    """Record a reminder as sent. Returns False if it was already sent (no commit)."""
+    stmt = _upsert_insert(db, models.AppointmentReminder, [{
+        "appointment_id": appointment_id,
+        "offset_minutes": offset_minutes,
+        "appointment_date": appointment_date
+    }]).on_conflict_do_nothing(index_elements=["appointment_id", "offset_minutes", "appointment_date"])
+    return db.execute(stmt).rowcount == 1
+
 
 # ============= PROJECT PROGRESS CRUD =============
 
@@ -408,20 +1102,52 @@ def get_progress_by_project(db: Session, project_id: int) -> List[models.Project
     ).order_by(models.ProjectProgress.start_date).all()
 
 def update_project_progress(db: Session, progress_id: int, progress_update: schemas.ProjectProgressUpdate) -> models.ProjectProgress:
-    """Update project progress."""
+    """Update project progress, announcing milestone status changes to buyers."""
+    progress = get_project_progress_by_id(db, progress_id)
+    if progress is None:
+        return None
+    previous_status = progress.status
     db.query(models.ProjectProgress).filter(models.ProjectProgress.id == progress_id).update(
         progress_update.dict(exclude_unset=True)
     )
+    db.refresh(progress)
+    if progress.status != previous_status and progress.customer_visible:
+        project_name = db.query(models.Project.project_name).filter(models.Project.id == progress.project_id).scalar()
+        status_text = progress.status.value.replace("_", " ")
+        queue_notification_fanout(
+            db,
+            project_id=progress.project_id,
+            source_type="project_progress",
+            source_id=progress.id,
+            notification_type=models.NotificationType.PROGRESS_UPDATE,
+            title=f"{progress.phase_name}: {status_text}",
+            message=f"{progress.phase_name} at {project_name} is now {status_text} ({progress.progress_percentage}% complete).",
+            priority=models.Priority.HIGH if progress.status == models.ProgressStatus.DELAYED else models.Priority.MEDIUM
+        )
     db.commit()
-    return get_project_progress_by_id(db, progress_id)
+    return progress
 
 
 # ============= CONSTRUCTION UPDATE CRUD =============
 
 def create_construction_update(db: Session, update: schemas.ConstructionUpdateCreate) -> models.ConstructionUpdate:
-    """Create a new construction update."""
+    """Create a new construction update, queueing notifications to buyers if published."""
     db_update = models.ConstructionUpdate(**update.dict())
     db.add(db_update)
+    db.flush()
+    if db_update.is_published:
+        project_name = db.query(models.Project.project_name).filter(models.Project.id == db_update.project_id).scalar()
+        content = db_update.update_content
+        queue_notification_fanout(
+            db,
+            project_id=db_update.project_id,
+            source_type="construction_update",
+            source_id=db_update.id,
+            notification_type=models.NotificationType.PROGRESS_UPDATE,
+            title=f"{project_name}: {db_update.update_title}"[:255],
+            message=content if len(content) <= FANOUT_MESSAGE_LENGTH else content[:FANOUT_MESSAGE_LENGTH - 3] + "...",
+            priority=db_update.priority
+        )
     db.commit()
     db.refresh(db_update)
     return db_update
@@ -445,9 +1171,12 @@ def get_updates_by_project(db: Session, project_id: int, limit: int = 10) -> Lis
 # ============= MESSAGE CRUD =============
 
 def create_message(db: Session, message: schemas.MessageCreate) -> models.Message:
-    """Create a new message."""
+    """Create a new message and push it to both participants."""
     db_message = models.Message(**message.dict())
     db.add(db_message)
+    db.flush()
+    bump_unread_counters(db, {db_message.recipient_id: 1}, "unread_messages")
+    realtime.queue_event(db, [db_message.recipient_id, db_message.sender_id], "message", db_message.id)
     db.commit()
     db.refresh(db_message)
     return db_message
@@ -456,38 +1185,136 @@ def get_message_by_id(db: Session, message_id: int) -> Optional[models.Message]:
     """Get message by ID."""
     return db.query(models.Message).filter(models.Message.id == message_id).first()
 
-def get_messages_for_user(db: Session, user_id: int) -> List[models.Message]:
-    """Get all messages for a user (sent or received)."""
-    return db.query(models.Message).filter(
-        or_(
-            models.Message.sender_id == user_id,
-            models.Message.recipient_id == user_id
-        )
-    ).order_by(desc(models.Message.created_at)).all()
-
-def get_conversations(db: Session, user_id: int) -> List[Dict[str, Any]]:
-    """Get all conversations for a user."""
-    # This is a simplified version; you might want to group by conversation
-    messages = db.query(models.Message).options(
-        joinedload(models.Message.sender),
-        joinedload(models.Message.recipient)
-    ).filter(
+def get_messages_for_user(db: Session, user_id: int, since: Optional[datetime] = None) -> List[models.Message]:
+    """Get all messages for a user (sent or received), optionally only those since a time."""
+    query = db.query(models.Message).filter(
         or_(
             models.Message.sender_id == user_id,
             models.Message.recipient_id == user_id
         )
-    ).order_by(desc(models.Message.created_at)).all()
+    )
+    if since is not None:
+        query = query.filter(models.Message.created_at >= since)
+    return query.order_by(desc(models.Message.created_at)).all()
+
+def get_conversations(db: Session, user_id: int, page: int = 1, limit: int = 20) -> Dict[str, Any]:
+    """Get a page of a user's conversations, one per (counterparty, project), newest first.
+    
+    A single query: ROW_NUMBER() picks each conversation's latest message,
+    windowed SUM/COUNT give its unread count and the total number of
+    conversations.
+    """
+    counterparty = case(
+        (models.Message.sender_id == user_id, models.Message.recipient_id),
+        else_=models.Message.sender_id
+    ).label("counterparty_id")
+    conversation = (counterparty, models.Message.project_id)
+    
+    ranked = select(
+        models.Message.id,
+        models.Message.project_id,
+        models.Message.sender_id,
+        models.Message.message_content,
+        models.Message.created_at,
+        counterparty,
+        func.row_number().over(
+            partition_by=conversation,
+            order_by=(models.Message.created_at.desc(), models.Message.id.desc())
+        ).label("position"),
+        func.sum(case(
+            (and_(models.Message.recipient_id == user_id, models.Message.is_read == False), 1),
+            else_=0
+        )).over(partition_by=conversation).label("unread_count")
+    ).where(
+        or_(models.Message.sender_id == user_id, models.Message.recipient_id == user_id)
+    ).subquery()
     
-    return messages
+    counterparty_name = func.coalesce(
+        models.Builder.company_name,
+        models.Customer.first_name + " " + models.Customer.last_name,
+        models.User.email
+    )
+    rows = db.execute(
+        select(
+            ranked.c.counterparty_id.label("customer_id"),
+            counterparty_name.label("customer_name"),
+            ranked.c.project_id,
+            models.Project.project_name,
+            ranked.c.id.label("last_message_id"),
+            ranked.c.message_content.label("last_message"),
+            ranked.c.created_at.label("last_message_time"),
+            ranked.c.sender_id.label("last_sender_id"),
+            ranked.c.unread_count,
+            func.count().over().label("total")
+        ).join(models.User, models.User.id == ranked.c.counterparty_id).outerjoin(
+            models.Builder, models.Builder.user_id == models.User.id
+        ).outerjoin(
+            models.Customer, models.Customer.user_id == models.User.id
+        ).outerjoin(
+            models.Project, models.Project.id == ranked.c.project_id
+        ).where(ranked.c.position == 1).order_by(
+            ranked.c.created_at.desc(), ranked.c.id.desc()
+        ).offset((page - 1) * limit).limit(limit)
+    ).mappings().all()
+    
+    total = rows[0]["total"] if rows else db.execute(
+        select(func.count()).select_from(ranked).where(ranked.c.position == 1)
+    ).scalar()
+    return {
+        "conversations": [{k: v for k, v in row.items() if k != "total"} for row in rows],
+        "pagination": create_pagination_metadata(page, limit, total)
+    }
+
+def mark_conversation_read(
+    db: Session,
+    user_id: int,
+    counterparty_id: int,
+    project_id: Optional[int],
+    up_to_message_id: Optional[int] = None
+) -> int:
+    """Mark a conversation's messages to a user read (optionally up to a message id).
+    
+    One UPDATE ... WHERE; returns the number of messages marked read.
+    """
+    criteria = [
+        models.Message.recipient_id == user_id,
+        models.Message.sender_id == counterparty_id,
+        models.Message.project_id == project_id if project_id is not None else models.Message.project_id.is_(None),
+        models.Message.is_read == False
+    ]
+    if up_to_message_id is not None:
+        criteria.append(models.Message.id <= up_to_message_id)
+    
+    count = db.execute(
+        update(models.Message).where(*criteria).values(is_read=True, read_at=datetime.utcnow()),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+    if count:
+        bump_unread_counters(db, {user_id: -count}, "unread_messages")
+    db.commit()
+    return count
+
+def get_unread_message_count(db: Session, user_id: int) -> int:
+    """Get a user's unread message count (maintained counter)."""
+    return get_unread_counter(db, user_id).unread_messages
 
 def mark_message_as_read(db: Session, message_id: int) -> models.Message:
     """Mark a message as read."""
-    db.query(models.Message).filter(models.Message.id == message_id).update({
+    message = get_message_by_id(db, message_id)
+    if message is None:
+        return None
+    count = db.query(models.Message).filter(
+        models.Message.id == message_id,
+        models.Message.is_read == False
+    ).update({
         "is_read": True,
         "read_at": datetime.utcnow()
-    })
+    }, synchronize_session=False)
+    if count:
+        bump_unread_counters(db, {message.recipient_id: -count}, "unread_messages")
     db.commit()
-    return get_message_by_id(db, message_id)
+    db.refresh(message)
+    return message
 
 
 # ============= CHANGE REQUEST CRUD =============
@@ -550,14 +1377,69 @@ def get_models_by_unit(db: Session, unit_id: int) -> List[models.Model3D]:
 
 # ============= NOTIFICATION CRUD =============
 
+DELIVERY_CHANNELS = ("email", "sms")
+
+# Notifications and messages are partitioned by month on created_at in
+# Postgres (services.partitions); list queries bound created_at so they only
+# touch recent partitions.
+NOTIFICATION_HISTORY_DAYS = 90
+
+def notification_delivery_due(send_via: Optional[List[str]], scheduled_send_time: Optional[datetime] = None) -> Optional[datetime]:
+    """When a new notification is first due for email/SMS delivery (None: in-app only)."""
+    if not send_via or not any(channel in DELIVERY_CHANNELS for channel in send_via):
+        return None
+    return scheduled_send_time or datetime.now(timezone.utc)
+
 def create_notification(db: Session, notification: schemas.NotificationCreate) -> models.Notification:
-    """Create a new notification."""
-    db_notification = models.Notification(**notification.dict())
+    """Create a new notification (or merge it into an open digest) and push it to its user."""
+    rows, merged = notification_digest.coalesce(db, [notification.dict()])
+    if merged:
+        digest_id, user_id = merged[0]
+        realtime.queue_event(db, [user_id], "notification", digest_id)
+        db.commit()
+        digest = get_notification_by_id(db, digest_id)
+        db.refresh(digest)
+        return digest
+    
+    db_notification = models.Notification(**rows[0])
+    db_notification.next_attempt_at = notification_delivery_due(
+        notification.send_via, notification.scheduled_send_time
+    )
     db.add(db_notification)
+    db.flush()
+    if not db_notification.is_read:
+        bump_unread_counters(db, {db_notification.user_id: 1}, "unread_notifications")
+    realtime.queue_event(db, [db_notification.user_id], "notification", db_notification.id)
     db.commit()
     db.refresh(db_notification)
     return db_notification
 
+def insert_notifications(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """Bulk insert notifications (merging into open digests), bump unread counters
+    and queue pushes (no commit). Returns how many notifications were handled."""
+    if not rows:
+        return 0
+    handled = len(rows)
+    rows, merged = notification_digest.coalesce(db, rows)
+    for digest_id, user_id in merged:
+        realtime.queue_event(db, [user_id], "notification", digest_id)
+    if not rows:
+        return handled
+    rows = [
+        {**row, "next_attempt_at": notification_delivery_due(row.get("send_via"), row.get("scheduled_send_time"))}
+        for row in rows
+    ]
+    inserted = db.execute(
+        insert(models.Notification).returning(models.Notification.id, models.Notification.user_id),
+        rows
+    ).all()
+    per_user: Dict[int, int] = {}
+    for notification_id, user_id in inserted:
+        per_user[user_id] = per_user.get(user_id, 0) + 1
+        realtime.queue_event(db, [user_id], "notification", notification_id)
+    bump_unread_counters(db, per_user, "unread_notifications")
+    return handled
+
 def get_notification_by_id(db: Session, notification_id: int) -> Optional[models.Notification]:
     """Get notification by ID."""
     return db.query(models.Notification).filter(
@@ -569,8 +1451,22 @@ def get_notifications_for_user(
     user_id: int,
     filters: schemas.NotificationFilter
 ) -> Dict[str, Any]:
-    """Get notifications for a user with filtering and pagination."""
+    """Get notifications for a user with filtering and pagination.
+    
+    Only notifications since `filters.since` are listed. Without `since`,
+    read notifications are limited to the last NOTIFICATION_HISTORY_DAYS,
+    which keeps the count and page queries on the recent monthly partitions,
+    while unread ones are always listed so the list matches the unread count.
+    """
     query = db.query(models.Notification).filter(models.Notification.user_id == user_id)
+    if filters.since is not None:
+        query = query.filter(models.Notification.created_at >= filters.since)
+    elif filters.is_read is not False:
+        history_start = datetime.now(timezone.utc) - timedelta(days=NOTIFICATION_HISTORY_DAYS)
+        query = query.filter(or_(
+            models.Notification.created_at >= history_start,
+            models.Notification.is_read == False
+        ))
     
     # Apply filters
     if filters.is_read is not None:
@@ -580,12 +1476,7 @@ def get_notifications_for_user(
     
     # Get total count
     total_items = query.count()
-    unread_count = db.query(models.Notification).filter(
-        and_(
-            models.Notification.user_id == user_id,
-            models.Notification.is_read == False
-        )
-    ).count()
+    unread_count = get_unread_notification_count(db, user_id)
     
     # Apply pagination
     offset = (filters.page - 1) * filters.limit
@@ -599,27 +1490,493 @@ def get_notifications_for_user(
         "pagination": create_pagination_metadata(filters.page, filters.limit, total_items)
     }
 
+def get_notifications_after(db: Session, user_id: int, after_id: int, limit: int = 100) -> List[models.Notification]:
+    """Get a user's notifications created after a given id, oldest first."""
+    query = db.query(models.Notification).filter(
+        models.Notification.user_id == user_id,
+        models.Notification.id > after_id
+    )
+    # Bound created_at by the resume point so older partitions are pruned.
+    # created_at is the inserting transaction's start time, so allow slack
+    # for rows committed out of id order.
+    resumed_at = db.query(models.Notification.created_at).filter(
+        models.Notification.id == after_id,
+        models.Notification.user_id == user_id
+    ).scalar()
+    if resumed_at is not None:
+        query = query.filter(models.Notification.created_at >= resumed_at - timedelta(hours=1))
+    return query.order_by(models.Notification.id).limit(limit).all()
+
 def mark_notification_as_read(db: Session, notification_id: int) -> models.Notification:
     """Mark a notification as read."""
-    db.query(models.Notification).filter(models.Notification.id == notification_id).update({
+    notification = get_notification_by_id(db, notification_id)
+    if notification is None:
+        return None
+    count = db.query(models.Notification).filter(
+        models.Notification.id == notification_id,
+        models.Notification.is_read == False
+    ).update({
         "is_read": True,
         "read_at": datetime.utcnow()
-    })
+    }, synchronize_session=False)
+    if count:
+        bump_unread_counters(db, {notification.user_id: -count}, "unread_notifications")
+        realtime.queue_event(db, [notification.user_id], "notification_unread", data={"delta": -count})
     db.commit()
-    return get_notification_by_id(db, notification_id)
+    db.refresh(notification)
+    return notification
 
-def mark_all_notifications_as_read(db: Session, user_id: int) -> None:
-    """Mark all notifications for a user as read."""
-    db.query(models.Notification).filter(
+def mark_all_notifications_as_read(db: Session, user_id: int, up_to_notification_id: Optional[int] = None) -> int:
+    """Mark a user's notifications read (optionally up to an id). Returns the count marked."""
+    query = db.query(models.Notification).filter(
         and_(
             models.Notification.user_id == user_id,
             models.Notification.is_read == False
         )
-    ).update({
+    )
+    if up_to_notification_id is not None:
+        query = query.filter(models.Notification.id <= up_to_notification_id)
+    count = query.update({
         "is_read": True,
         "read_at": datetime.utcnow()
-    })
+    }, synchronize_session=False)
+    if count:
+        bump_unread_counters(db, {user_id: -count}, "unread_notifications")
+        realtime.queue_event(db, [user_id], "notification_unread", data={"delta": -count})
     db.commit()
+    return count
+
+def get_latest_notification_id(db: Session, user_id: int) -> int:
+    """Id of a user's newest notification (0 if none)."""
+    return db.query(func.max(models.Notification.id)).filter(
+        models.Notification.user_id == user_id
+    ).scalar() or 0
+
+def get_unread_notification_count(db: Session, user_id: int) -> int:
+    """Get a user's unread notification count (maintained counter)."""
+    return get_unread_counter(db, user_id).unread_notifications
+
+
+# ============= NOTIFICATION FANOUT CRUD =============
+# Project-wide announcements are queued as a fan-out job in the same
+# transaction as the update that triggers them; services.notification_fanout
+# delivers them off the request path.
+
+FANOUT_MESSAGE_LENGTH = 500
+
+def queue_notification_fanout(
+    db: Session,
+    project_id: int,
+    source_type: str,
+    source_id: int,
+    notification_type: models.NotificationType,
+    title: str,
+    message: str,
+    priority: models.Priority = models.Priority.MEDIUM,
+    action_url: Optional[str] = None
+) -> models.NotificationFanout:
+    """Queue a notification to every buyer of a project (no commit)."""
+    fanout = models.NotificationFanout(
+        project_id=project_id,
+        source_type=source_type,
+        source_id=source_id,
+        notification_type=notification_type,
+        priority=priority,
+        title=title,
+        message=message,
+        action_url=action_url or f"/customer/projects/{project_id}"
+    )
+    db.add(fanout)
+    return fanout
+
+def get_pending_fanout_id(db: Session, source_type: str, source_id: int) -> Optional[int]:
+    """ID of the newest pending fan-out queued for a source row, if any."""
+    return db.execute(select(models.NotificationFanout.id).where(
+        models.NotificationFanout.status == models.FanoutStatus.PENDING,
+        models.NotificationFanout.source_type == source_type,
+        models.NotificationFanout.source_id == source_id
+    ).order_by(models.NotificationFanout.id.desc()).limit(1)).scalar()
+
+def get_runnable_fanout_ids(db: Session, stale_before: datetime, max_attempts: int) -> List[int]:
+    """IDs of fan-outs that are pending, failed with attempts left, or stuck running."""
+    return db.execute(select(models.NotificationFanout.id).where(
+        or_(
+            models.NotificationFanout.status == models.FanoutStatus.PENDING,
+            and_(
+                models.NotificationFanout.status == models.FanoutStatus.FAILED,
+                models.NotificationFanout.attempts < max_attempts
+            ),
+            and_(
+                models.NotificationFanout.status == models.FanoutStatus.RUNNING,
+                models.NotificationFanout.claimed_at < stale_before
+            )
+        )
+    ).order_by(models.NotificationFanout.id)).scalars().all()
+
+def claim_notification_fanout(db: Session, fanout_id: int, now: datetime, stale_before: datetime) -> bool:
+    """Mark a fan-out as running unless another worker holds a fresh claim."""
+    claimed = db.execute(
+        update(models.NotificationFanout)
+        .where(
+            models.NotificationFanout.id == fanout_id,
+            or_(
+                models.NotificationFanout.status.in_([models.FanoutStatus.PENDING, models.FanoutStatus.FAILED]),
+                and_(
+                    models.NotificationFanout.status == models.FanoutStatus.RUNNING,
+                    models.NotificationFanout.claimed_at < stale_before
+                )
+            )
+        )
+        .values(
+            status=models.FanoutStatus.RUNNING,
+            claimed_at=now,
+            started_at=func.coalesce(models.NotificationFanout.started_at, now),
+            attempts=models.NotificationFanout.attempts + 1,
+            error=None
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return bool(claimed)
+
+def get_fanout_recipient_ids(db: Session, project_id: int, after_user_id: int = 0) -> List[int]:
+    """User IDs of customers with an active booking in a project, in ID order."""
+    return db.execute(
+        select(models.Customer.user_id).join(
+            models.Booking, models.Booking.customer_id == models.Customer.id
+        ).join(
+            models.Unit, models.Booking.unit_id == models.Unit.id
+        ).where(
+            models.Unit.project_id == project_id,
+            models.Booking.booking_status != models.BookingStatus.CANCELLED,
+            models.Customer.user_id > after_user_id
+        ).distinct().order_by(models.Customer.user_id)
+    ).scalars().all()
+
+def get_notification_fanouts_by_project(db: Session, project_id: int, limit: int = 20) -> List[models.NotificationFanout]:
+    """Get the most recent fan-outs for a project."""
+    return db.query(models.NotificationFanout).filter(
+        models.NotificationFanout.project_id == project_id
+    ).order_by(desc(models.NotificationFanout.id)).limit(limit).all()
+
+
+# ============= NOTIFICATION DELIVERY CRUD =============
+# Email/SMS delivery state for services.notification_delivery. Claimed rows
+# get a lease (next_attempt_at pushed into the future) so the row locks are
+# only held for the claim itself; the lease doubles as a fencing token when
+# results are recorded.
+
+def claim_due_notifications(db: Session, now: datetime, limit: int, lease_until: datetime) -> List[Any]:
+    """Lease up to `limit` notifications due for delivery, skipping rows other workers hold."""
+    due_ids = db.execute(
+        select(models.Notification.id).where(
+            models.Notification.next_attempt_at <= now,
+            models.Notification.is_sent == False
+        ).order_by(models.Notification.next_attempt_at).limit(limit).with_for_update(skip_locked=True)
+    ).scalars().all()
+    if not due_ids:
+        db.rollback()
+        return []
+    
+    db.execute(
+        update(models.Notification)
+        .where(models.Notification.id.in_(due_ids))
+        .values(
+            next_attempt_at=lease_until,
+            delivery_attempts=models.Notification.delivery_attempts + 1
+        )
+        .execution_options(synchronize_session=False)
+    )
+    claimed = db.execute(
+        select(
+            models.Notification.id,
+            models.Notification.title,
+            models.Notification.message,
+            models.Notification.action_url,
+            models.Notification.send_via,
+            models.Notification.delivered_via,
+            models.Notification.delivery_attempts,
+            models.User.email,
+            func.coalesce(models.Customer.phone, models.Builder.phone).label("phone")
+        ).join(
+            models.User, models.Notification.user_id == models.User.id
+        ).outerjoin(
+            models.Customer, models.Customer.user_id == models.User.id
+        ).outerjoin(
+            models.Builder, models.Builder.user_id == models.User.id
+        ).where(models.Notification.id.in_(due_ids)).order_by(models.Notification.id)
+    ).all()
+    db.commit()
+    return claimed
+
+def record_notification_deliveries(
+    db: Session,
+    sent_ids: List[int],
+    pending: List[Dict[str, Any]],
+    lease_until: datetime,
+    now: datetime
+) -> int:
+    """Mark delivered notifications sent in one UPDATE and reschedule the rest.
+    
+    `pending` holds ``{"id", "delivered_via", "next_attempt_at", "delivery_error"}``
+    per notification still (or never again) to be delivered. Returns how many
+    were marked sent; rows whose lease expired and was taken over by another
+    worker are left alone, whether sent or pending.
+    """
+    marked = 0
+    if sent_ids:
+        marked = db.execute(
+            update(models.Notification)
+            .where(
+                models.Notification.id.in_(sent_ids),
+                models.Notification.next_attempt_at == lease_until
+            )
+            .values(
+                is_sent=True,
+                sent_at=now,
+                next_attempt_at=None,
+                delivered_via=models.Notification.send_via
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+    if pending:
+        # One executemany UPDATE per row id, with the same lease check as above
+        notifications = models.Notification.__table__
+        db.execute(
+            update(notifications)
+            .where(
+                notifications.c.id == bindparam("notification_id"),
+                notifications.c.next_attempt_at == lease_until
+            )
+            .values(
+                delivered_via=bindparam("delivered", type_=notifications.c.delivered_via.type),
+                next_attempt_at=bindparam("retry_at", type_=notifications.c.next_attempt_at.type),
+                delivery_error=bindparam("error", type_=notifications.c.delivery_error.type)
+            ),
+            [
+                {
+                    "notification_id": row["id"],
+                    "delivered": row["delivered_via"],
+                    "retry_at": row["next_attempt_at"],
+                    "error": row["delivery_error"]
+                }
+                for row in pending
+            ]
+        )
+    db.commit()
+    return marked
+
+
+# ============= UNREAD COUNTERS CRUD =============
+# Per-user unread totals, adjusted atomically in the same transaction as the
+# write that changes them, so badge reads are a primary-key lookup.
+# services.rollups recomputes them from the source rows to repair drift.
+
+def bump_unread_counters(db: Session, deltas: Dict[int, int], column: str) -> None:
+    """Add per-user deltas to an unread counter column, never below zero (no commit)."""
+    counter = getattr(models.UserUnreadCounter, column)
+    greatest = func.max if db.get_bind().dialect.name == "sqlite" else func.greatest
+    by_delta: Dict[int, List[int]] = {}
+    for user_id, delta in deltas.items():
+        if delta:
+            by_delta.setdefault(delta, []).append(user_id)
+    for delta, user_ids in by_delta.items():
+        db.execute(
+            update(models.UserUnreadCounter)
+            .where(models.UserUnreadCounter.user_id.in_(user_ids))
+            .values({column: greatest(counter + delta, 0)})
+            .execution_options(synchronize_session=False)
+        )
+
+def recompute_unread_counters(db: Session, min_user_id: int, max_user_id: int) -> int:
+    """Create missing counters and fix drifted ones for users in an ID range. Returns rows fixed."""
+    in_range = models.User.id.between(min_user_id, max_user_id)
+    db.execute(insert(models.UserUnreadCounter).from_select(
+        ["user_id", "unread_notifications", "unread_messages"],
+        select(models.User.id, literal(0), literal(0)).where(
+            in_range,
+            ~exists().where(models.UserUnreadCounter.user_id == models.User.id)
+        )
+    ))
+    
+    actual_notifications = select(func.count(models.Notification.id)).where(
+        models.Notification.user_id == models.UserUnreadCounter.user_id,
+        models.Notification.is_read == False
+    ).scalar_subquery()
+    actual_messages = select(func.count(models.Message.id)).where(
+        models.Message.recipient_id == models.UserUnreadCounter.user_id,
+        models.Message.is_read == False
+    ).scalar_subquery()
+    return db.execute(
+        update(models.UserUnreadCounter)
+        .where(
+            models.UserUnreadCounter.user_id.between(min_user_id, max_user_id),
+            or_(
+                models.UserUnreadCounter.unread_notifications != actual_notifications,
+                models.UserUnreadCounter.unread_messages != actual_messages
+            )
+        )
+        .values(unread_notifications=actual_notifications, unread_messages=actual_messages)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+def get_unread_counter(db: Session, user_id: int) -> models.UserUnreadCounter:
+    """Get a user's unread counters, creating them from the source rows on first use."""
+    counter = db.query(models.UserUnreadCounter).filter(
+        models.UserUnreadCounter.user_id == user_id
+    ).first()
+    if counter is None:
+        recompute_unread_counters(db, user_id, user_id)
+        db.commit()
+        counter = db.query(models.UserUnreadCounter).filter(
+            models.UserUnreadCounter.user_id == user_id
+        ).first()
+    return counter
+
+
+# ============= DASHBOARD SUMMARY CRUD =============
+# One precomputed row of headline numbers per builder. Each metric is a single
+# GROUP BY builder query, so refreshing many builders costs the same handful
+# of queries as refreshing one.
+
+DASHBOARD_REFRESH_SECONDS = 60
+
+def _by_builder(query, builder_column, builder_ids: Optional[List[int]]):
+    """Group an aggregate query by builder, optionally limited to some builders.
+    
+    Aggregates over projects leave out projects that are being deleted.
+    """
+    if builder_column is models.Project.builder_id:
+        query = query.filter(models.Project.deletion_requested_at.is_(None))
+    if builder_ids is not None:
+        query = query.filter(builder_column.in_(builder_ids))
+    return {row[0]: row[1:] for row in query.group_by(builder_column)}
+
+def compute_dashboard_summaries(db: Session, builder_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """Compute dashboard headline numbers for builders from the live tables."""
+    project_builder = models.Project.builder_id
+    active_statuses = [models.ProjectStatus.PLANNING, models.ProjectStatus.CONSTRUCTION]
+    pending_statuses = [
+        models.BookingStatus.INQUIRY,
+        models.BookingStatus.SITE_VISIT_SCHEDULED,
+        models.BookingStatus.TOKEN_PAID
+    ]
+    
+    projects = _by_builder(db.query(
+        project_builder,
+        func.count(models.Project.id),
+        func.sum(case((models.Project.status.in_(active_statuses), 1), else_=0)),
+        func.sum(models.Project.total_units),
+        func.sum(models.Project.available_units)
+    ), project_builder, builder_ids)
+    
+    bookings = _by_builder(db.query(
+        project_builder,
+        func.count(models.Booking.id),
+        func.sum(case((models.Booking.booking_status.in_(pending_statuses), 1), else_=0)),
+        func.sum(case((models.Booking.booking_status == models.BookingStatus.BOOKING_CONFIRMED, 1), else_=0)),
+        func.sum(models.Booking.paid_amount),
+        func.sum(case(
+            (models.Booking.booking_status != models.BookingStatus.CANCELLED, models.Booking.pending_amount),
+            else_=0
+        ))
+    ).join(models.Unit, models.Booking.unit_id == models.Unit.id).join(
+        models.Project, models.Unit.project_id == models.Project.id
+    ), project_builder, builder_ids)
+    
+    appointments = _by_builder(db.query(
+        project_builder, func.count(models.Appointment.id)
+    ).join(models.Project, models.Appointment.project_id == models.Project.id).filter(
+        models.Appointment.appointment_date >= datetime.utcnow(),
+        models.Appointment.status.in_([
+            models.AppointmentStatus.SCHEDULED,
+            models.AppointmentStatus.CONFIRMED,
+            models.AppointmentStatus.RESCHEDULED
+        ])
+    ), project_builder, builder_ids)
+    
+    messages = _by_builder(db.query(
+        models.Builder.id, func.count(models.Message.id)
+    ).join(models.Message, models.Message.recipient_id == models.Builder.user_id).filter(
+        models.Message.is_read == False
+    ), models.Builder.id, builder_ids)
+    
+    change_requests = _by_builder(db.query(
+        project_builder, func.count(models.ChangeRequest.id)
+    ).join(models.Booking, models.ChangeRequest.booking_id == models.Booking.id).join(
+        models.Unit, models.Booking.unit_id == models.Unit.id
+    ).join(
+        models.Project, models.Unit.project_id == models.Project.id
+    ).filter(
+        models.ChangeRequest.status.in_([
+            models.ChangeRequestStatus.SUBMITTED,
+            models.ChangeRequestStatus.UNDER_REVIEW
+        ])
+    ), project_builder, builder_ids)
+    
+    progress = _by_builder(db.query(
+        project_builder, func.avg(models.ProjectProgress.progress_percentage)
+    ).join(models.Project, models.ProjectProgress.project_id == models.Project.id),
+        project_builder, builder_ids)
+    
+    if builder_ids is None:
+        builder_ids = [builder_id for (builder_id,) in db.query(models.Builder.id)]
+    
+    refreshed_at = datetime.utcnow()
+    summaries = []
+    for builder_id in builder_ids:
+        project_row = projects.get(builder_id, (0, 0, 0, 0))
+        booking_row = bookings.get(builder_id, (0, 0, 0, 0, 0))
+        summaries.append({
+            "builder_id": builder_id,
+            "total_projects": project_row[0] or 0,
+            "active_projects": project_row[1] or 0,
+            "total_units": project_row[2] or 0,
+            "available_units": project_row[3] or 0,
+            "total_bookings": booking_row[0] or 0,
+            "pending_bookings": booking_row[1] or 0,
+            "confirmed_bookings": booking_row[2] or 0,
+            "total_revenue": booking_row[3] or 0,
+            "pending_revenue": booking_row[4] or 0,
+            "upcoming_appointments": appointments.get(builder_id, (0,))[0],
+            "unread_messages": messages.get(builder_id, (0,))[0],
+            "open_change_requests": change_requests.get(builder_id, (0,))[0],
+            "average_progress": round(Decimal(progress.get(builder_id, (0,))[0] or 0), 2),
+            "refreshed_at": refreshed_at
+        })
+    return summaries
+
+def refresh_dashboard_summaries(db: Session, builder_ids: Optional[List[int]] = None) -> int:
+    """Recompute and store dashboard summaries. Returns the number of builders refreshed."""
+    summaries = compute_dashboard_summaries(db, builder_ids)
+    if summaries:
+        stmt = _upsert_insert(db, models.BuilderDashboardSummary, summaries)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["builder_id"],
+            set_={column: stmt.excluded[column] for column in summaries[0] if column != "builder_id"}
+        ))
+    db.commit()
+    return len(summaries)
+
+def get_dashboard_summary(db: Session, builder_id: int) -> Union[models.BuilderDashboardSummary, Dict[str, Any]]:
+    """Get a builder's dashboard summary without writing anything.
+    
+    Returns the stored row while it is fresh; otherwise (no refresher running,
+    or a builder it has not reached yet) the numbers are computed live and
+    left for services/dashboard.py to store.
+    """
+    summary = db.query(models.BuilderDashboardSummary).filter(
+        models.BuilderDashboardSummary.builder_id == builder_id
+    ).first()
+    
+    if summary is not None:
+        refreshed_at = summary.refreshed_at
+        if refreshed_at.tzinfo is not None:
+            refreshed_at = refreshed_at.astimezone(timezone.utc).replace(tzinfo=None)
+        if datetime.utcnow() - refreshed_at < timedelta(seconds=DASHBOARD_REFRESH_SECONDS):
+            return summary
+    
+    return compute_dashboard_summaries(db, [builder_id])[0]
 
 
 # ============= SYSTEM SETTINGS CRUD =============
@@ -8,10 +8,7 @@ from datetime import datetime, timedelta
 from jose import JWTError, jwt
 
 from database import crud, schemas, models
-from database.database import get_db, engine, Base
-
-# Create all tables
-Base.metadata.create_all(bind=engine)
+from database.database import get_db
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -567,12 +564,13 @@ def cancel_appointment(
 
 @app.get("/api/messages/conversations", response_model=dict)
 def get_user_conversations(
+    page: int = 1,
+    limit: int = 20,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get all conversations for current user."""
-    conversations = crud.get_conversations(db, current_user.id)
-    return {"conversations": conversations, "total": len(conversations)}
+    """Get the current user's conversations with latest message and unread count."""
+    return crud.get_conversations(db, current_user.id, page=page, limit=limit)
 
 
 @app.get("/api/messages/conversation/{customer_id}/{project_id}", response_model=dict)
@@ -603,12 +601,6 @@ def get_conversation_messages(
     total = query.count()
     messages = query.offset((page - 1) * limit).limit(limit).all()
     
-    # Mark messages as read
-    for msg in messages:
-        if msg.recipient_id == current_user.id and not msg.is_read:
-            msg.is_read = True
-    db.commit()
-    
     return {
         "messages": messages,
         "total": total,
@@ -627,12 +619,7 @@ def send_message(
     # Set sender_id to current user
     message_data = message.dict()
     message_data["sender_id"] = current_user.id
-    
-    db_message = models.Message(**message_data)
-    db.add(db_message)
-    db.commit()
-    db.refresh(db_message)
-    return db_message
+    return crud.create_message(db=db, message=schemas.MessageCreate(**message_data))
 
 
 @app.patch("/api/messages/conversation/{conversation_id}/read", response_model=dict)
@@ -641,19 +628,14 @@ def mark_conversation_read(
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Mark all messages in a conversation as read."""
-    messages = db.query(models.Message).filter(
-        models.Message.id >= conversation_id,
-        models.Message.recipient_id == current_user.id,
-        models.Message.is_read == False
-    ).all()
-    
-    count = 0
-    for msg in messages:
-        msg.is_read = True
-        count += 1
+    """Mark the conversation of a received message as read, up to that message."""
+    message = crud.get_message_by_id(db, conversation_id)
+    if not message or message.recipient_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Message not found")
     
-    db.commit()
+    count = crud.mark_conversation_read(
+        db, current_user.id, message.sender_id, message.project_id, up_to_message_id=message.id
+    )
     return {"success": True, "marked_read": count}
 
 
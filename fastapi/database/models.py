@@ -1,13 +1,19 @@
 from sqlalchemy import (
     Column, Integer, String, Boolean, DateTime, Date, 
-    ForeignKey, Text, Numeric, Enum, BigInteger, JSON
+    ForeignKey, Text, Numeric, Enum, BigInteger, JSON, Index, UniqueConstraint
 )
-from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import relationship, column_property
+from sqlalchemy.sql import func, false
 from database.database import Base
 import enum
 
 
+# JSON arrays searched by containment (see crud.json_contains_all): JSONB
+# with a GIN index on PostgreSQL, plain JSON elsewhere
+SearchableJSON = JSON().with_variant(JSONB(), "postgresql")
+
+
 # ============= ENUMS =============
 
 class UserType(str, enum.Enum):
@@ -170,6 +176,27 @@ class PreferredContactMethod(str, enum.Enum):
     PHONE = "phone"
     BOTH = "both"
 
+class PriceRevisionMode(str, enum.Enum):
+    PERCENTAGE = "percentage"
+    ABSOLUTE = "absolute"
+    PER_SQFT = "per_sqft"
+
+class RollupPeriod(str, enum.Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+class RevenueMetric(str, enum.Enum):
+    BOOKINGS = "bookings"
+    COLLECTIONS = "collections"
+    CANCELLATIONS = "cancellations"
+
+class FanoutStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
 
 # ============= MODELS =============
 
@@ -185,6 +212,8 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     last_login = Column(DateTime(timezone=True), nullable=True)
+    # SHA-256 of the secret in the user's calendar feed URL; NULL when revoked
+    calendar_feed_token_hash = Column(String(64), nullable=True, unique=True, index=True)
     
     # Relationships
     builder = relationship("Builder", back_populates="user", uselist=False, cascade="all, delete-orphan")
@@ -257,7 +286,7 @@ class Project(Base):
     price_range_min = Column(Numeric(15, 2), nullable=True, index=True)
     price_range_max = Column(Numeric(15, 2), nullable=True, index=True)
     project_area = Column(Numeric(10, 2), nullable=True)
-    amenities = Column(JSON, nullable=True)
+    amenities = Column(SearchableJSON, nullable=True)
     start_date = Column(Date, nullable=True)
     expected_completion_date = Column(Date, nullable=True)
     actual_completion_date = Column(Date, nullable=True)
@@ -265,24 +294,33 @@ class Project(Base):
     floor_plans = Column(JSON, nullable=True)
     brochure_url = Column(String(500), nullable=True)
     is_featured = Column(Boolean, default=False)
+    # Set when a (background) deletion starts; such projects drop out of the
+    # builder's dashboard and revenue figures and cannot be deleted again
+    deletion_requested_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
-    # Relationships
+    # Relationships. passive_deletes: deleting a project leaves its subtree to
+    # the ON DELETE CASCADE / SET NULL foreign keys instead of loading it.
     builder = relationship("Builder", back_populates="projects")
-    units = relationship("Unit", back_populates="project", cascade="all, delete-orphan")
-    appointments = relationship("Appointment", back_populates="project", cascade="all, delete-orphan")
-    progress = relationship("ProjectProgress", back_populates="project", cascade="all, delete-orphan")
-    updates = relationship("ConstructionUpdate", back_populates="project", cascade="all, delete-orphan")
-    messages = relationship("Message", back_populates="project")
-    models_3d = relationship("Model3D", back_populates="project", cascade="all, delete-orphan")
+    units = relationship("Unit", back_populates="project", cascade="all, delete-orphan", passive_deletes=True)
+    appointments = relationship("Appointment", back_populates="project", cascade="all, delete-orphan", passive_deletes=True)
+    progress = relationship("ProjectProgress", back_populates="project", cascade="all, delete-orphan", passive_deletes=True)
+    updates = relationship("ConstructionUpdate", back_populates="project", cascade="all, delete-orphan", passive_deletes=True)
+    messages = relationship("Message", back_populates="project", passive_deletes=True)
+    models_3d = relationship("Model3D", back_populates="project", cascade="all, delete-orphan", passive_deletes=True)
+    
+    __table_args__ = (
+        # amenities @> '["Gym", "Swimming Pool"]'
+        Index("ix_projects_amenities", "amenities", postgresql_using="gin", postgresql_ops={"amenities": "jsonb_path_ops"}),
+    )
 
 
 class Unit(Base):
     __tablename__ = "units"
     
     id = Column(Integer, primary_key=True, index=True)
-    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
     unit_number = Column(String(50), nullable=False)
     unit_type = Column(Enum(UnitType), nullable=False, index=True)
     floor_number = Column(Integer, nullable=False)
@@ -294,14 +332,39 @@ class Unit(Base):
     bathrooms = Column(Integer, nullable=False)
     parking_spaces = Column(Integer, default=0)
     floor_plan_url = Column(String(500), nullable=True)
-    features = Column(JSON, nullable=True)
+    features = Column(SearchableJSON, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     project = relationship("Project", back_populates="units")
-    bookings = relationship("Booking", back_populates="unit", cascade="all, delete-orphan")
-    models_3d = relationship("Model3D", back_populates="unit", cascade="all, delete-orphan")
+    bookings = relationship("Booking", back_populates="unit", cascade="all, delete-orphan", passive_deletes=True)
+    models_3d = relationship("Model3D", back_populates="unit", cascade="all, delete-orphan", passive_deletes=True)
+    price_history = relationship("UnitPriceHistory", back_populates="unit", cascade="all, delete-orphan", passive_deletes=True)
+    
+    __table_args__ = (
+        # A project's units, optionally by status (availability listings, rollups)
+        Index("ix_units_project_status", "project_id", "status"),
+        # features @> '["Corner Unit"]'
+        Index("ix_units_features", "features", postgresql_using="gin", postgresql_ops={"features": "jsonb_path_ops"}),
+    )
+
+
+class UnitPriceHistory(Base):
+    __tablename__ = "unit_price_history"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    unit_id = Column(Integer, ForeignKey("units.id", ondelete="CASCADE"), nullable=False, index=True)
+    old_price = Column(Numeric(15, 2), nullable=False)
+    new_price = Column(Numeric(15, 2), nullable=False)
+    old_status = Column(Enum(UnitStatus), nullable=True)
+    new_status = Column(Enum(UnitStatus), nullable=True)
+    reason = Column(Text, nullable=True)
+    changed_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    
+    # Relationships
+    unit = relationship("Unit", back_populates="price_history")
 
 
 class Booking(Base):
@@ -314,22 +377,28 @@ class Booking(Base):
     token_amount = Column(Numeric(15, 2), nullable=True)
     total_amount = Column(Numeric(15, 2), nullable=False)
     booking_date = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # Set when the booking moves to CANCELLED; the cancellation rollups' day
+    cancelled_at = Column(DateTime(timezone=True), nullable=True)
     expected_registration_date = Column(Date, nullable=True)
     actual_registration_date = Column(Date, nullable=True)
     payment_plan = Column(Enum(PaymentPlan), default=PaymentPlan.INSTALLMENTS)
     loan_approved = Column(Boolean, default=False)
     loan_amount = Column(Numeric(15, 2), nullable=True)
+    # Sum of completed payments, maintained atomically when payments are recorded
+    paid_amount = Column(Numeric(15, 2), nullable=False, default=0, server_default="0")
     special_requests = Column(Text, nullable=True)
     agent_id = Column(Integer, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
+    pending_amount = column_property(total_amount - paid_amount)
+    
     # Relationships
     customer = relationship("Customer", back_populates="bookings")
     unit = relationship("Unit", back_populates="bookings")
-    payments = relationship("Payment", back_populates="booking", cascade="all, delete-orphan")
-    change_requests = relationship("ChangeRequest", back_populates="booking", cascade="all, delete-orphan")
-    messages = relationship("Message", back_populates="booking")
+    payments = relationship("Payment", back_populates="booking", cascade="all, delete-orphan", passive_deletes=True)
+    change_requests = relationship("ChangeRequest", back_populates="booking", cascade="all, delete-orphan", passive_deletes=True)
+    messages = relationship("Message", back_populates="booking", passive_deletes=True)
 
 
 class Payment(Base):
@@ -340,17 +409,33 @@ class Payment(Base):
     payment_type = Column(Enum(PaymentType), nullable=False, index=True)
     amount = Column(Numeric(15, 2), nullable=False)
     payment_method = Column(Enum(PaymentMethod), nullable=False)
-    payment_status = Column(Enum(PaymentStatus), default=PaymentStatus.PENDING, index=True)
+    payment_status = Column(Enum(PaymentStatus), default=PaymentStatus.PENDING)
     transaction_id = Column(String(255), nullable=True)
     due_date = Column(Date, nullable=True, index=True)
     paid_date = Column(DateTime(timezone=True), nullable=True)
     receipt_url = Column(String(500), nullable=True)
     notes = Column(Text, nullable=True)
+    # Instalment generated by services.payment_schedule (replaced on regeneration)
+    is_scheduled = Column(Boolean, nullable=False, default=False, server_default=false())
+    # Set by services.overdue_payments once the overdue notifications are sent
+    overdue_notified_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     booking = relationship("Booking", back_populates="payments")
+    
+    __table_args__ = (
+        # Range scans for overdue/pending payments by due date
+        Index("ix_payments_status_due_date", "payment_status", "due_date"),
+        # Overdue scan: pending payments not yet notified, in (due_date, id) order.
+        # Rows leave the index once notified, so it stays small.
+        Index(
+            "ix_payments_overdue_unnotified", "due_date", "id",
+            postgresql_where=(payment_status == PaymentStatus.PENDING) & overdue_notified_at.is_(None),
+            sqlite_where=(payment_status == PaymentStatus.PENDING) & overdue_notified_at.is_(None)
+        ),
+    )
 
 
 class Appointment(Base):
@@ -358,7 +443,7 @@ class Appointment(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     customer_id = Column(Integer, ForeignKey("customers.id", ondelete="CASCADE"), nullable=False, index=True)
-    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
     appointment_type = Column(Enum(AppointmentType), nullable=False)
     appointment_date = Column(DateTime(timezone=True), nullable=False, index=True)
     duration_minutes = Column(Integer, default=60)
@@ -375,6 +460,28 @@ class Appointment(Base):
     # Relationships
     customer = relationship("Customer", back_populates="appointments")
     project = relationship("Project", back_populates="appointments")
+    
+    __table_args__ = (
+        # Project calendars and slot checks: a project's appointments in a date range
+        Index("ix_appointments_project_date", "project_id", "appointment_date"),
+    )
+
+
+class AppointmentReminder(Base):
+    __tablename__ = "appointment_reminders"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    appointment_id = Column(Integer, ForeignKey("appointments.id", ondelete="CASCADE"), nullable=False)
+    offset_minutes = Column(Integer, nullable=False)
+    appointment_date = Column(DateTime(timezone=True), nullable=False)
+    sent_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint(
+            "appointment_id", "offset_minutes", "appointment_date",
+            name="uq_appointment_reminders_sent"
+        ),
+    )
 
 
 class ProjectProgress(Base):
@@ -426,8 +533,8 @@ class Message(Base):
     __tablename__ = "messages"
     
     id = Column(Integer, primary_key=True, index=True)
-    sender_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    recipient_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    sender_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    recipient_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     project_id = Column(Integer, ForeignKey("projects.id", ondelete="SET NULL"), nullable=True, index=True)
     booking_id = Column(Integer, ForeignKey("bookings.id", ondelete="SET NULL"), nullable=True)
     subject = Column(String(255), nullable=True)
@@ -440,6 +547,20 @@ class Message(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     read_at = Column(DateTime(timezone=True), nullable=True)
     
+    __table_args__ = (
+        # Conversation list: both sides of a user's mailbox, newest first
+        Index("ix_messages_sender_created", "sender_id", "created_at"),
+        Index("ix_messages_recipient_created", "recipient_id", "created_at"),
+        # One conversation (both directions) on a project, newest first
+        Index("ix_messages_conversation", "sender_id", "recipient_id", "project_id", "created_at"),
+        # Unread messages per recipient and conversation (mark read, counters, dashboard)
+        Index(
+            "ix_messages_recipient_unread", "recipient_id", "sender_id", "project_id",
+            postgresql_where=is_read == False,
+            sqlite_where=is_read == False
+        ),
+    )
+    
     # Relationships
     sender = relationship("User", foreign_keys=[sender_id], back_populates="sent_messages")
     recipient = relationship("User", foreign_keys=[recipient_id], back_populates="received_messages")
@@ -503,7 +624,7 @@ class Notification(Base):
     __tablename__ = "notifications"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     notification_type = Column(Enum(NotificationType), nullable=False, index=True)
     title = Column(String(255), nullable=False)
     message = Column(Text, nullable=False)
@@ -518,9 +639,115 @@ class Notification(Base):
     read_at = Column(DateTime(timezone=True), nullable=True)
     action_url = Column(String(500), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # External delivery (email/SMS) state, see services.notification_delivery.
+    # next_attempt_at is NULL once there is nothing left to deliver.
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)
+    delivery_attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    delivered_via = Column(JSON, nullable=True)
+    delivery_error = Column(Text, nullable=True)
+    # Digests (services.notification_digest): how many notifications this row stands for
+    coalesced_count = Column(Integer, nullable=False, default=1, server_default="1")
+    coalesced_at = Column(DateTime(timezone=True), nullable=True)
     
     # Relationships
     user = relationship("User", back_populates="notifications")
+    
+    __table_args__ = (
+        # A user's notification list, newest first, optionally unread only
+        Index("ix_notifications_user_created", "user_id", "created_at"),
+        Index("ix_notifications_user_read_created", "user_id", "is_read", "created_at"),
+        Index(
+            "ix_notifications_delivery_due", "next_attempt_at",
+            postgresql_where=next_attempt_at.isnot(None),
+            sqlite_where=next_attempt_at.isnot(None)
+        ),
+    )
+
+
+class NotificationFanout(Base):
+    __tablename__ = "notification_fanouts"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
+    source_type = Column(String(50), nullable=False)
+    source_id = Column(Integer, nullable=False)
+    notification_type = Column(Enum(NotificationType), nullable=False)
+    priority = Column(Enum(Priority), default=Priority.MEDIUM)
+    title = Column(String(255), nullable=False)
+    message = Column(Text, nullable=False)
+    action_url = Column(String(500), nullable=True)
+    status = Column(Enum(FanoutStatus), nullable=False, default=FanoutStatus.PENDING, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_user_id = Column(Integer, nullable=False, default=0)
+    recipients = Column(Integer, nullable=False, default=0)
+    notifications_created = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    claimed_at = Column(DateTime(timezone=True), nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    
+    @property
+    def notifications_per_second(self):
+        if self.started_at is None or self.finished_at is None:
+            return None
+        seconds = (self.finished_at - self.started_at).total_seconds()
+        return round(self.notifications_created / seconds, 1) if seconds > 0 else None
+
+
+class RevenueRollup(Base):
+    __tablename__ = "revenue_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    period = Column(Enum(RollupPeriod), nullable=False)
+    period_start = Column(Date, nullable=False)
+    metric = Column(Enum(RevenueMetric), nullable=False)
+    # Collection breakdown; empty for bookings and cancellations
+    payment_type = Column(String(20), nullable=False, default="")
+    payment_method = Column(String(20), nullable=False, default="")
+    count = Column(Integer, nullable=False, default=0)
+    amount = Column(Numeric(17, 2), nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint(
+            "project_id", "period", "period_start", "metric", "payment_type", "payment_method",
+            name="uq_revenue_rollups_bucket"
+        ),
+        Index("ix_revenue_rollups_range", "period", "project_id", "period_start"),
+    )
+
+
+class BuilderDashboardSummary(Base):
+    __tablename__ = "builder_dashboard_summaries"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    builder_id = Column(Integer, ForeignKey("builders.id", ondelete="CASCADE"), unique=True, nullable=False)
+    total_projects = Column(Integer, nullable=False, default=0)
+    active_projects = Column(Integer, nullable=False, default=0)
+    total_units = Column(Integer, nullable=False, default=0)
+    available_units = Column(Integer, nullable=False, default=0)
+    total_bookings = Column(Integer, nullable=False, default=0)
+    pending_bookings = Column(Integer, nullable=False, default=0)
+    confirmed_bookings = Column(Integer, nullable=False, default=0)
+    total_revenue = Column(Numeric(17, 2), nullable=False, default=0)
+    pending_revenue = Column(Numeric(17, 2), nullable=False, default=0)
+    upcoming_appointments = Column(Integer, nullable=False, default=0)
+    unread_messages = Column(Integer, nullable=False, default=0)
+    open_change_requests = Column(Integer, nullable=False, default=0)
+    average_progress = Column(Numeric(5, 2), nullable=False, default=0)
+    refreshed_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class UserUnreadCounter(Base):
+    __tablename__ = "user_unread_counters"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), unique=True, nullable=False)
+    unread_notifications = Column(Integer, nullable=False, default=0)
+    unread_messages = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
 class SystemSetting(Base):
@@ -8,7 +8,8 @@ from database.models import (
     PaymentMethod, PaymentStatus, AppointmentType, AppointmentStatus,
     MeetingLocation, ProgressStatus, UpdateType, Priority, MessageType,
     ChangeRequestType, ChangeRequestStatus, ModelType, FileFormat,
-    AccessLevel, NotificationType, PreferredContactMethod
+    AccessLevel, NotificationType, PreferredContactMethod, PriceRevisionMode,
+    RollupPeriod, FanoutStatus
 )
 
 
@@ -159,6 +160,7 @@ class ProjectResponse(ProjectBase):
     id: int
     builder_id: int
     actual_completion_date: Optional[date] = None
+    deletion_requested_at: Optional[datetime] = None
     created_at: datetime
     builder: Optional[BuilderResponse] = None
     
@@ -203,6 +205,39 @@ class UnitResponse(UnitBase):
     class Config:
         from_attributes = True
 
+class UnitBulkCreate(BaseModel):
+    project_id: int
+    units: List[Dict[str, Any]] = Field(..., min_length=1, max_length=5000)
+
+class UnitRowError(BaseModel):
+    row: int
+    errors: List[str]
+
+class UnitBulkResult(BaseModel):
+    project_id: int
+    created: int
+    failed: int
+    errors: List[UnitRowError]
+
+class UnitBulkRevision(BaseModel):
+    project_id: int
+    # Filter
+    unit_type: Optional[UnitType] = None
+    min_floor: Optional[int] = None
+    max_floor: Optional[int] = None
+    facing: Optional[FacingDirection] = None
+    current_status: Optional[UnitStatus] = None
+    # Revision
+    mode: Optional[PriceRevisionMode] = None
+    value: Optional[Decimal] = None
+    status: Optional[UnitStatus] = None
+    reason: Optional[str] = None
+
+class UnitBulkRevisionResult(BaseModel):
+    project_id: int
+    updated: int
+    history_recorded: int
+
 
 # ============= BOOKING SCHEMAS =============
 
@@ -229,7 +264,10 @@ class BookingResponse(BookingBase):
     id: int
     customer_id: int
     booking_status: BookingStatus
+    paid_amount: Decimal = Decimal("0.00")
+    pending_amount: Optional[Decimal] = None
     booking_date: datetime
+    cancelled_at: Optional[datetime] = None
     actual_registration_date: Optional[date] = None
     loan_approved: bool
     agent_id: Optional[int] = None
@@ -265,12 +303,36 @@ class PaymentResponse(PaymentBase):
     transaction_id: Optional[str] = None
     paid_date: Optional[datetime] = None
     receipt_url: Optional[str] = None
+    is_scheduled: bool = False
     created_at: datetime
     
     class Config:
         from_attributes = True
 
 
+class PaymentScheduleOptions(BaseModel):
+    loan_interest_rate: Decimal = Field(default=Decimal("8.50"), ge=0, le=50)
+    loan_tenure_months: int = Field(default=240, ge=1, le=480)
+    installment_count: int = Field(default=10, ge=1, le=120)
+
+class PaymentScheduleItem(BaseModel):
+    id: int
+    payment_type: PaymentType
+    amount: Decimal
+    payment_method: PaymentMethod
+    payment_status: PaymentStatus
+    due_date: Optional[date] = None
+    notes: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
+
+class ProjectScheduleResult(BaseModel):
+    project_id: int
+    bookings: int
+    payments_created: int
+
+
 # ============= APPOINTMENT SCHEMAS =============
 
 class AppointmentBase(BaseModel):
@@ -284,6 +346,8 @@ class AppointmentBase(BaseModel):
 class AppointmentCreate(AppointmentBase):
     customer_id: int
     created_by: UserType
+    # Bounded for new bookings only; stored appointments may predate the limit
+    duration_minutes: int = Field(default=60, ge=15, le=480)
 
 class AppointmentUpdate(BaseModel):
     appointment_date: Optional[datetime] = None
@@ -291,6 +355,11 @@ class AppointmentUpdate(BaseModel):
     notes: Optional[str] = None
     reschedule_reason: Optional[str] = None
 
+class AppointmentReschedule(BaseModel):
+    appointment_date: Optional[datetime] = None
+    meeting_location: Optional[MeetingLocation] = None
+    reschedule_reason: Optional[str] = None
+
 class AppointmentResponse(AppointmentBase):
     id: int
     customer_id: int
@@ -304,6 +373,16 @@ class AppointmentResponse(AppointmentBase):
     class Config:
         from_attributes = True
 
+class AppointmentSlot(BaseModel):
+    start: datetime
+    end: datetime
+
+class AppointmentAvailabilityResponse(BaseModel):
+    project_id: int
+    duration_minutes: int
+    timezone: str
+    slots: List[AppointmentSlot]
+
 
 # ============= PROGRESS SCHEMAS =============
 
@@ -396,6 +475,29 @@ class MessageResponse(MessageBase):
     class Config:
         from_attributes = True
 
+class ConversationSummary(BaseModel):
+    customer_id: int  # the other participant's user id, as in /conversation/{customer_id}/{project_id}
+    customer_name: str
+    project_id: Optional[int] = None
+    project_name: Optional[str] = None
+    last_message_id: int
+    last_message: str
+    last_message_time: datetime
+    last_sender_id: int
+    unread_count: int
+
+class ConversationListResponse(BaseModel):
+    conversations: List[ConversationSummary]
+    pagination: Dict[str, Any]
+
+class ReadReceipt(BaseModel):
+    up_to_id: Optional[int] = None  # mark read up to and including this id; None marks everything
+
+class ReadReceiptResponse(BaseModel):
+    message: str
+    count: int
+    unread_count: int
+
 
 # ============= CHANGE REQUEST SCHEMAS =============
 
@@ -487,6 +589,7 @@ class NotificationResponse(NotificationBase):
     user_id: int
     is_read: bool
     is_sent: bool
+    coalesced_count: int = 1
     scheduled_send_time: Optional[datetime] = None
     sent_at: Optional[datetime] = None
     read_at: Optional[datetime] = None
@@ -496,6 +599,27 @@ class NotificationResponse(NotificationBase):
         from_attributes = True
 
 
+class NotificationFanoutResponse(BaseModel):
+    id: int
+    project_id: int
+    source_type: str
+    source_id: int
+    notification_type: NotificationType
+    title: str
+    status: FanoutStatus
+    attempts: int
+    recipients: int
+    notifications_created: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    notifications_per_second: Optional[float] = None
+    
+    class Config:
+        from_attributes = True
+
+
 # ============= SYSTEM SETTINGS SCHEMAS =============
 
 class SystemSettingBase(BaseModel):
@@ -518,6 +642,47 @@ class SystemSettingResponse(SystemSettingBase):
         from_attributes = True
 
 
+# ============= ANALYTICS SCHEMAS =============
+
+class RevenuePoint(BaseModel):
+    period_start: date
+    bookings_count: int = 0
+    bookings_amount: Decimal = Decimal("0")
+    collections_count: int = 0
+    collections_amount: Decimal = Decimal("0")
+    cancellations_count: int = 0
+    cancellations_amount: Decimal = Decimal("0")
+    collections_by_type: Dict[str, Decimal] = {}
+    collections_by_method: Dict[str, Decimal] = {}
+
+class BuilderDashboardResponse(BaseModel):
+    builder_id: int
+    total_projects: int
+    active_projects: int
+    total_units: int
+    available_units: int
+    total_bookings: int
+    pending_bookings: int
+    confirmed_bookings: int
+    total_revenue: Decimal
+    pending_revenue: Decimal
+    upcoming_appointments: int
+    unread_messages: int
+    open_change_requests: int
+    average_progress: Decimal
+    refreshed_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class RevenueSeriesResponse(BaseModel):
+    period: RollupPeriod
+    start: date
+    end: date
+    project_id: Optional[int] = None
+    series: List[RevenuePoint]
+
+
 # ============= PAGINATION & FILTER SCHEMAS =============
 
 class PaginationParams(BaseModel):
@@ -532,6 +697,8 @@ class ProjectFilter(PaginationParams):
     unit_type: Optional[UnitType] = None
     builder_id: Optional[int] = None
     project_type: Optional[ProjectType] = None
+    # Projects offering all of these amenities
+    amenities: Optional[List[str]] = None
 
 class BookingFilter(PaginationParams):
     customer_id: Optional[int] = None
@@ -541,6 +708,7 @@ class BookingFilter(PaginationParams):
 class NotificationFilter(PaginationParams):
     is_read: Optional[bool] = None
     notification_type: Optional[NotificationType] = None
+    since: Optional[datetime] = None
 
 
 # ============= API RESPONSE SCHEMAS =============
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """
 Database Initialization Script
-Creates all tables in the PostgreSQL database based on SQLAlchemy models.
+Brings the PostgreSQL schema up to date with the migrations and optionally
+loads sample data.
 """
 
 import sys
@@ -10,17 +11,22 @@ from pathlib import Path
 # Add the parent directory to sys.path to import database modules
 sys.path.insert(0, str(Path(__file__).parent))
 
-from database.database import engine, Base, SessionLocal
+from database.database import SessionLocal
 from database import models
 from database.models import UserType
 import database.crud as crud
 import database.schemas as schemas
+import migrate
 
 
 def create_tables():
-    """Create all database tables."""
-    print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
+    """Create or upgrade all database tables by running the migrations."""
+    print("Running database migrations...")
+    try:
+        migrate.upgrade()
+    except migrate.UnversionedDatabase as exc:
+        print(f"❌ {exc}")
+        sys.exit(1)
     print("✅ Database tables created successfully!")
 
 
@@ -0,0 +1,163 @@
+"""
+Load test for the real-time WebSocket endpoint.
+
+Opens N concurrent connections spread across a range of user ids, keeps them
+open for a while (optionally sending messages through the REST API to
+generate traffic) and reports connection success, handshake times, events
+received and end-to-end delivery latency.
+
+Tokens are minted locally with database.auth, so run it against a server
+using the same SECRET_KEY. 10k connections need ~10k file descriptors on
+both ends (the script raises its own soft limit; check `ulimit -n` for the
+server) and several uvicorn workers behind the Postgres pub/sub backend.
+
+Usage:
+    python load_test_realtime.py --connections 10000 --users 1-500 --duration 60 \\
+        [--url ws://localhost:8000/api/realtime/ws] [--api http://localhost:8000] \\
+        [--send-rate 20 --sender-id 1]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timezone
+
+import httpx
+import websockets
+
+from database.auth import create_access_token
+
+
+def raise_fd_limit():
+    """Raise the soft open-files limit to the hard limit (Unix only)."""
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * pct / 100), len(values) - 1)]
+
+
+class Stats:
+    def __init__(self):
+        self.connected = 0
+        self.failed = 0
+        self.closed_early = 0
+        self.events = 0
+        self.handshake_ms = []
+        self.latency_ms = []
+        self.sent = 0
+
+
+async def client(url, token, stats, stop_at, handshakes):
+    async with handshakes:
+        started = time.perf_counter()
+        try:
+            socket = await websockets.connect(f"{url}?token={token}", open_timeout=30, max_queue=None)
+        except Exception:
+            stats.failed += 1
+            return
+        stats.handshake_ms.append((time.perf_counter() - started) * 1000)
+        stats.connected += 1
+
+    try:
+        while True:
+            remaining = stop_at - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                raw = await asyncio.wait_for(socket.recv(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            if raw == "pong":
+                continue
+            stats.events += 1
+            created_at = json.loads(raw)["data"].get("created_at")
+            if created_at:
+                created = datetime.fromisoformat(created_at)
+                if created.tzinfo is None:
+                    created = created.replace(tzinfo=timezone.utc)
+                stats.latency_ms.append((datetime.now(timezone.utc) - created).total_seconds() * 1000)
+    except websockets.ConnectionClosed:
+        stats.closed_early += 1
+    finally:
+        await socket.close()
+
+
+async def sender(api, sender_id, user_ids, rate, stats, stop_at):
+    """Send `rate` messages per second to random users via the REST API."""
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(sender_id)})}"}
+    async with httpx.AsyncClient(base_url=api, headers=headers, timeout=30) as http:
+        while time.monotonic() < stop_at:
+            tick = time.monotonic()
+            for _ in range(rate):
+                response = await http.post("/api/messages", json={
+                    "sender_id": sender_id,
+                    "recipient_id": random.choice(user_ids),
+                    "message_content": "load test",
+                })
+                stats.sent += response.status_code == 201
+            await asyncio.sleep(max(0.0, 1 - (time.monotonic() - tick)))
+
+
+async def main(args):
+    raise_fd_limit()
+    first, last = (int(part) for part in args.users.split("-"))
+    user_ids = list(range(first, last + 1))
+    tokens = {user_id: create_access_token({"sub": str(user_id)}) for user_id in user_ids}
+
+    stats = Stats()
+    handshakes = asyncio.Semaphore(args.handshake_concurrency)
+    started = time.monotonic()
+    stop_at = started + args.ramp + args.duration
+
+    tasks = [
+        asyncio.create_task(client(args.url, tokens[user_ids[i % len(user_ids)]], stats, stop_at, handshakes))
+        for i in range(args.connections)
+    ]
+    if args.send_rate:
+        await asyncio.sleep(args.ramp)
+        tasks.append(asyncio.create_task(
+            sender(args.api, args.sender_id, user_ids, args.send_rate, stats, stop_at)
+        ))
+
+    while time.monotonic() < stop_at:
+        await asyncio.sleep(5)
+        print(f"[{time.monotonic() - started:5.0f}s] connected={stats.connected} failed={stats.failed} "
+              f"events={stats.events} sent={stats.sent}")
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    print("\n=== Results ===")
+    print(f"Connections: {stats.connected}/{args.connections} ok, {stats.failed} failed, "
+          f"{stats.closed_early} closed by server")
+    print(f"Handshake ms: p50={percentile(stats.handshake_ms, 50):.1f} "
+          f"p99={percentile(stats.handshake_ms, 99):.1f}")
+    print(f"Messages sent: {stats.sent}, events received: {stats.events}")
+    if stats.latency_ms:
+        print(f"Delivery ms: p50={percentile(stats.latency_ms, 50):.1f} "
+              f"p99={percentile(stats.latency_ms, 99):.1f} mean={statistics.mean(stats.latency_ms):.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="WebSocket fan-out load test")
+    parser.add_argument("--url", default="ws://localhost:8000/api/realtime/ws")
+    parser.add_argument("--api", default="http://localhost:8000")
+    parser.add_argument("--connections", type=int, default=10000)
+    parser.add_argument("--users", default="1-500", help="User id range the connections are spread over")
+    parser.add_argument("--duration", type=int, default=60, help="Seconds to hold connections after ramp-up")
+    parser.add_argument("--ramp", type=int, default=30, help="Seconds allowed for connecting")
+    parser.add_argument("--handshake-concurrency", type=int, default=500)
+    parser.add_argument("--send-rate", type=int, default=0, help="Messages per second sent via REST")
+    parser.add_argument("--sender-id", type=int, default=1, help="User id the messages are sent as")
+    asyncio.run(main(parser.parse_args()))
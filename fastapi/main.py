@@ -11,10 +11,11 @@ The application is organized in a modular structure:
 All routes are automatically included from the routes module.
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from database.database import engine, Base
 from routes import (
     auth_router,
     projects_router,
@@ -24,10 +25,24 @@ from routes import (
     messages_router,
     payments_router,
     notifications_router,
+    exports_router,
+    analytics_router,
+    builder_router,
+    realtime_router,
 )
+from services.realtime import hub
+
+# The schema is managed by migrations (python migrate.py upgrade), run once
+# before the workers start rather than by every worker on import.
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the real-time hub for the lifetime of the worker."""
+    await hub.start()
+    yield
+    await hub.stop()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
 # Initialize FastAPI application
 app = FastAPI(
@@ -44,6 +59,10 @@ app = FastAPI(
     - **Messages**: Communication between builders and customers
     - **Payments**: Track and record payment transactions
     - **Notifications**: User notification system
+    - **Exports**: Streaming CSV/JSONL exports of bookings, payments and units
+    - **Analytics**: Revenue and collections time series for builders
+    - **Builder**: Precomputed builder dashboard summary
+    - **Realtime**: WebSocket push of new messages and notifications
     
     ### Authentication
     Most endpoints require authentication using JWT bearer tokens.
@@ -60,6 +79,7 @@ app = FastAPI(
     version="2.0.0",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
+    lifespan=lifespan,
     contact={
         "name": "BuildCraft RealEstate",
         "url": "https://buildcraft.example.com",
@@ -93,6 +113,10 @@ app.include_router(appointments_router)
 app.include_router(messages_router)
 app.include_router(payments_router)
 app.include_router(notifications_router)
+app.include_router(exports_router)
+app.include_router(analytics_router)
+app.include_router(builder_router)
+app.include_router(realtime_router)
 
 
 # Health check and root endpoints
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Database migrations (Alembic).
+
+The schema is owned by the revisions in migrations/versions; the API no
+longer creates tables on import. Run ``upgrade`` once per deploy, before the
+API workers start (start.py does this). On PostgreSQL the upgrade holds an
+advisory lock, so deploys that start several hosts at once still migrate
+only once.
+
+Databases created by the old ``create_all`` have tables but no
+``alembic_version``; ``upgrade`` refuses to touch them until they are
+adopted with ``stamp 0001`` (the schema before the migrations existed).
+``stamp`` on such a database first builds the revision's schema in a
+scratch SQLite database and refuses if any table or column differs.
+
+Usage:
+    python migrate.py upgrade [head] [--sql]
+    python migrate.py downgrade <revision>
+    python migrate.py current | history
+    python migrate.py stamp <revision>
+    python migrate.py revision -m "add foo to bar"
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, Set
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect, text
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from database import models  # noqa: F401  (registers every table on Base.metadata)
+from database.database import Base, engine
+
+ALEMBIC_INI = Path(__file__).parent / "alembic.ini"
+BASELINE_REVISION = "0001"
+# Arbitrary application-wide key for pg_advisory_lock
+MIGRATION_LOCK_ID = 727_001
+
+
+class UnversionedDatabase(Exception):
+    """The database has tables but was never stamped with a revision."""
+
+
+class SchemaMismatch(Exception):
+    """The database's tables do not match the revision it is being stamped with."""
+
+
+def get_config(connection=None) -> Config:
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(Path(__file__).parent / "migrations"))
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def check_versioned(connection) -> None:
+    """Raise UnversionedDatabase for a create_all-era database."""
+    tables = set(inspect(connection).get_table_names())
+    if tables and "alembic_version" not in tables:
+        raise UnversionedDatabase(
+            f"Database has {len(tables)} tables but no alembic_version. If it was created by create_all "
+            f"before migrations, adopt it with: python migrate.py stamp {BASELINE_REVISION}"
+        )
+
+
+def _columns(connection, tables=None) -> Dict[str, Set[str]]:
+    inspector = inspect(connection)
+    names = set(inspector.get_table_names()) if tables is None else tables
+    return {table: {column["name"] for column in inspector.get_columns(table)} for table in names}
+
+
+def check_stamp(connection, revision: str) -> None:
+    """Raise SchemaMismatch unless an unversioned database has exactly `revision`'s tables and columns."""
+    tables = set(inspect(connection).get_table_names())
+    if not tables or "alembic_version" in tables:
+        return
+    scratch = create_engine("sqlite://")
+    with scratch.connect() as scratch_connection:
+        config = get_config(scratch_connection)
+        config.attributes["configure_logger"] = False
+        command.upgrade(config, revision)
+        expected = _columns(scratch_connection)
+    expected.pop("alembic_version", None)
+    # Model tables only: partitions and unrelated tables are not compared
+    unexpected = (tables & set(Base.metadata.tables)) - set(expected)
+    actual = _columns(connection, tables & set(expected))
+    problems = [f"missing table {table}" for table in sorted(set(expected) - tables)]
+    problems += [f"table {table} is not in {revision}" for table in sorted(unexpected)]
+    for table in sorted(actual):
+        problems += [f"missing column {table}.{column}" for column in sorted(expected[table] - actual[table])]
+        problems += [f"column {table}.{column} is not in {revision}" for column in sorted(actual[table] - expected[table])]
+    if problems:
+        raise SchemaMismatch(
+            f"Database schema does not match revision {revision}: " + "; ".join(problems)
+        )
+
+
+def stamp(revision: str) -> None:
+    """Record `revision` without running migrations, after checking the schema matches it."""
+    with engine.connect() as connection:
+        check_stamp(connection, revision)
+        connection.commit()
+        command.stamp(get_config(connection), revision)
+        connection.commit()
+
+
+def upgrade(revision: str = "head") -> None:
+    """Upgrade the database to `revision`, serialised across processes on PostgreSQL."""
+    with engine.connect() as connection:
+        locked = connection.dialect.name == "postgresql"
+        if locked:
+            connection.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+            connection.commit()
+        try:
+            check_versioned(connection)
+            # Leave the transactions to Alembic (autocommit blocks need that)
+            connection.commit()
+            command.upgrade(get_config(connection), revision)
+            connection.commit()
+        finally:
+            if locked:
+                connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+                connection.commit()
+
+
+def _run(name: str, *args, **kwargs) -> None:
+    with engine.connect() as connection:
+        getattr(command, name)(get_config(connection), *args, **kwargs)
+        connection.commit()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Manage database migrations")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    upgrade_parser = commands.add_parser("upgrade", help="Upgrade to a revision (default: head)")
+    upgrade_parser.add_argument("revision", nargs="?", default="head")
+    upgrade_parser.add_argument("--sql", action="store_true", help="Print the SQL instead of running it")
+
+    downgrade_parser = commands.add_parser("downgrade", help="Downgrade to a revision (e.g. -1)")
+    downgrade_parser.add_argument("revision")
+
+    commands.add_parser("current", help="Show the database's revision")
+    commands.add_parser("history", help="List revisions")
+
+    stamp_parser = commands.add_parser("stamp", help="Record a revision without running migrations")
+    stamp_parser.add_argument("revision")
+
+    revision_parser = commands.add_parser("revision", help="Create a revision autogenerated from the models")
+    revision_parser.add_argument("-m", "--message", required=True)
+    revision_parser.add_argument("--empty", action="store_true", help="Create an empty revision")
+
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "upgrade":
+            if args.sql:
+                command.upgrade(get_config(), args.revision, sql=True)
+            else:
+                upgrade(args.revision)
+                print(f"✅ Database upgraded to {args.revision}")
+        elif args.command == "downgrade":
+            _run("downgrade", args.revision)
+        elif args.command == "current":
+            _run("current", verbose=True)
+        elif args.command == "history":
+            command.history(get_config(), verbose=True)
+        elif args.command == "stamp":
+            stamp(args.revision)
+            print(f"✅ Database stamped with {args.revision}")
+        elif args.command == "revision":
+            _run("revision", message=args.message, autogenerate=not args.empty)
+    except (UnversionedDatabase, SchemaMismatch) as exc:
+        print(f"❌ {exc}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
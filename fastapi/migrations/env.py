@@ -0,0 +1,80 @@
+"""Alembic environment.
+
+Migrations run against ``database.database.engine`` unless a connection is
+handed in by migrate.py (``config.attributes["connection"]``) or a URL is set
+with ``sqlalchemy.url``. ``target_metadata`` is the models' metadata, so
+``python migrate.py revision -m "..."`` autogenerates from model changes.
+The monthly partitions managed by ``services.partitions`` are not models and
+are left out of autogenerate.
+"""
+
+import re
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine
+
+from database import models  # noqa: F401  (registers every table on Base.metadata)
+from database.database import Base, engine as app_engine
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+_PARTITION_TABLE = re.compile(r"^(messages|notifications)_(p\d{4}_\d{2}|default|unpartitioned)$")
+
+
+def include_name(name, type_, parent_names) -> bool:
+    if type_ == "schema":
+        return name is None
+    if type_ == "table":
+        return not _PARTITION_TABLE.match(name)
+    return True
+
+
+def _url() -> str:
+    return config.get_main_option("sqlalchemy.url") or app_engine.url.render_as_string(hide_password=False)
+
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL instead of running it (``migrate.py upgrade --sql``)."""
+    context.configure(
+        url=_url(),
+        target_metadata=target_metadata,
+        include_name=include_name,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def _run_with(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_name=include_name,
+        compare_type=True,
+        transaction_per_migration=True,
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run_with(connection)
+        return
+    engine = create_engine(_url()) if config.get_main_option("sqlalchemy.url") else app_engine
+    with engine.connect() as connection:
+        _run_with(connection)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
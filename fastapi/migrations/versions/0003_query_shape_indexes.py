@@ -0,0 +1,89 @@
+"""query shape indexes
+
+Composite and partial indexes matching how crud and the jobs actually filter
+and sort (see check_query_plans.py, which fails on sequential scans of the
+hot tables). Single-column indexes that became a prefix of a composite are
+dropped to keep write amplification down on the append-heavy tables.
+
+On PostgreSQL indexes are built CONCURRENTLY so writes are not blocked,
+except on partitioned tables (services.partitions), which do not support it.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 08:34:18.096007
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns, postgresql_where, sqlite_where)
+NEW_INDEXES = (
+    ("ix_notifications_user_created", "notifications", ["user_id", "created_at"], None, None),
+    ("ix_notifications_user_read_created", "notifications", ["user_id", "is_read", "created_at"], None, None),
+    ("ix_messages_conversation", "messages", ["sender_id", "recipient_id", "project_id", "created_at"], None, None),
+    ("ix_messages_recipient_unread", "messages", ["recipient_id", "sender_id", "project_id"], "is_read = false", "is_read = 0"),
+    ("ix_units_project_status", "units", ["project_id", "status"], None, None),
+    ("ix_payments_pending_due", "payments", ["due_date", "id"], "payment_status = 'PENDING'", "payment_status = 'PENDING'"),
+    ("ix_appointments_project_date", "appointments", ["project_id", "appointment_date"], None, None),
+)
+
+# Covered by a composite above: (name, table, column)
+REDUNDANT_INDEXES = (
+    ("ix_notifications_user_id", "notifications", "user_id"),
+    ("ix_messages_sender_id", "messages", "sender_id"),
+    ("ix_messages_recipient_id", "messages", "recipient_id"),
+    ("ix_units_project_id", "units", "project_id"),
+    ("ix_payments_payment_status", "payments", "payment_status"),
+    ("ix_appointments_project_id", "appointments", "project_id"),
+)
+
+
+def _concurrently(table: str) -> bool:
+    if op.get_context().dialect.name != "postgresql" or context.is_offline_mode():
+        return False
+    partitioned = op.get_bind().execute(
+        sa.text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"),
+        {"table": table}
+    ).scalar()
+    return not partitioned
+
+
+def _create_index(name, table, columns, postgresql_where=None, sqlite_where=None) -> None:
+    kwargs = {}
+    if postgresql_where:
+        kwargs["postgresql_where"] = sa.text(postgresql_where)
+    if sqlite_where:
+        kwargs["sqlite_where"] = sa.text(sqlite_where)
+    if _concurrently(table):
+        with op.get_context().autocommit_block():
+            op.create_index(name, table, columns, postgresql_concurrently=True, **kwargs)
+    else:
+        op.create_index(name, table, columns, **kwargs)
+
+
+def _drop_index(name, table) -> None:
+    if _concurrently(table):
+        with op.get_context().autocommit_block():
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+    else:
+        op.drop_index(name, table_name=table)
+
+
+def upgrade() -> None:
+    # Build the replacements before dropping anything they cover
+    for name, table, columns, postgresql_where, sqlite_where in NEW_INDEXES:
+        _create_index(name, table, columns, postgresql_where, sqlite_where)
+    for name, table, _column in REDUNDANT_INDEXES:
+        _drop_index(name, table)
+
+
+def downgrade() -> None:
+    for name, table, column in REDUNDANT_INDEXES:
+        _create_index(name, table, [column])
+    for name, table, *_ in reversed(NEW_INDEXES):
+        _drop_index(name, table)
@@ -0,0 +1,67 @@
+"""jsonb amenities and features
+
+``projects.amenities`` and ``units.features`` become JSONB on PostgreSQL
+with GIN (jsonb_path_ops) indexes, so the ``amenities=``/``features=``
+containment filters are answered by ``@>`` index lookups. Other databases
+keep JSON columns and get a plain index under the same name.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 09:05:12.441310
+"""
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+# (index name, table, column)
+SEARCHABLE_COLUMNS = (
+    ("ix_projects_amenities", "projects", "amenities"),
+    ("ix_units_features", "units", "features"),
+)
+
+
+def _is_postgresql() -> bool:
+    return op.get_context().dialect.name == "postgresql"
+
+
+def upgrade() -> None:
+    if not _is_postgresql():
+        for name, table, column in SEARCHABLE_COLUMNS:
+            op.create_index(name, table, [column])
+        return
+
+    for name, table, column in SEARCHABLE_COLUMNS:
+        op.alter_column(
+            table, column,
+            type_=postgresql.JSONB(),
+            existing_type=sa.JSON(),
+            existing_nullable=True,
+            postgresql_using=f"{column}::jsonb"
+        )
+    for name, table, column in SEARCHABLE_COLUMNS:
+        kwargs = {"postgresql_using": "gin", "postgresql_ops": {column: "jsonb_path_ops"}}
+        if context.is_offline_mode():
+            op.create_index(name, table, [column], **kwargs)
+        else:
+            with op.get_context().autocommit_block():
+                op.create_index(name, table, [column], postgresql_concurrently=True, **kwargs)
+
+
+def downgrade() -> None:
+    for name, table, column in SEARCHABLE_COLUMNS:
+        op.drop_index(name, table_name=table)
+    if _is_postgresql():
+        for name, table, column in SEARCHABLE_COLUMNS:
+            op.alter_column(
+                table, column,
+                type_=sa.JSON(),
+                existing_type=postgresql.JSONB(),
+                existing_nullable=True,
+                postgresql_using=f"{column}::json"
+            )
@@ -0,0 +1,49 @@
+"""payments.is_scheduled
+
+Marks the instalments generated by ``services.payment_schedule`` so that
+regenerating a schedule replaces only those and keeps pending payments that
+were recorded by hand. Existing pending rows are marked from the notes the
+schedule engine writes.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 11:02:47.310552
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+# Notes written by payment_schedule.build_schedule
+SCHEDULE_NOTES = ("Token amount", "Full payment", "Instalment %", "Milestone: %", "EMI %")
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('is_scheduled', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+    payments = sa.table(
+        'payments',
+        sa.column('is_scheduled', sa.Boolean()),
+        sa.column('payment_status', sa.String()),
+        sa.column('due_date', sa.Date()),
+        sa.column('notes', sa.Text()),
+    )
+    op.execute(
+        payments.update()
+        .where(
+            payments.c.payment_status == 'PENDING',
+            payments.c.due_date.isnot(None),
+            sa.or_(*(payments.c.notes.like(note) for note in SCHEDULE_NOTES))
+        )
+        .values(is_scheduled=True)
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.drop_column('is_scheduled')
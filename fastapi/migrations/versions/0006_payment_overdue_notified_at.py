@@ -0,0 +1,94 @@
+"""payments.overdue_notified_at
+
+The overdue scanner marks each payment it has notified about instead of
+keeping a (due_date, id) watermark, which skipped payments inserted later
+with an earlier due date. Payments at or before the old watermark are
+marked as notified and the watermark setting is removed. The partial index
+for the scan now covers only pending payments that have not been notified.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 11:41:09.582214
+"""
+from datetime import date
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+WATERMARK_KEY = "jobs.overdue_payments.watermark"
+
+
+def _concurrently() -> bool:
+    return op.get_context().dialect.name == "postgresql" and not context.is_offline_mode()
+
+
+def _create_index(name, columns, where) -> None:
+    kwargs = {"postgresql_where": sa.text(where), "sqlite_where": sa.text(where)}
+    if _concurrently():
+        with op.get_context().autocommit_block():
+            op.create_index(name, 'payments', columns, postgresql_concurrently=True, **kwargs)
+    else:
+        op.create_index(name, 'payments', columns, **kwargs)
+
+
+def _drop_index(name) -> None:
+    if _concurrently():
+        with op.get_context().autocommit_block():
+            op.drop_index(name, table_name='payments', postgresql_concurrently=True)
+    else:
+        op.drop_index(name, table_name='payments')
+
+
+def _backfill_from_watermark() -> None:
+    """Mark the payments the watermark-based scanner had already notified about."""
+    if context.is_offline_mode():
+        # The watermark lives in a JSON setting; run `upgrade` online to carry it over
+        return
+    settings = sa.table('system_settings', sa.column('setting_key', sa.String()), sa.column('setting_value', sa.JSON()))
+    watermark = op.get_bind().execute(
+        sa.select(settings.c.setting_value).where(settings.c.setting_key == WATERMARK_KEY)
+    ).scalar()
+    if not watermark or not watermark.get("due_date"):
+        return
+    due_date, payment_id = date.fromisoformat(watermark["due_date"]), watermark.get("payment_id", 0)
+    payments = sa.table(
+        'payments',
+        sa.column('id', sa.Integer()),
+        sa.column('due_date', sa.Date()),
+        sa.column('overdue_notified_at', sa.DateTime(timezone=True)),
+    )
+    op.execute(
+        payments.update()
+        .where(sa.or_(
+            payments.c.due_date < due_date,
+            sa.and_(payments.c.due_date == due_date, payments.c.id <= payment_id)
+        ))
+        .values(overdue_notified_at=sa.func.now())
+    )
+    op.execute(settings.delete().where(settings.c.setting_key == WATERMARK_KEY))
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('overdue_notified_at', sa.DateTime(timezone=True), nullable=True))
+    _backfill_from_watermark()
+    _create_index(
+        'ix_payments_overdue_unnotified', ['due_date', 'id'],
+        "payment_status = 'PENDING' AND overdue_notified_at IS NULL"
+    )
+    _drop_index('ix_payments_pending_due')
+
+
+def downgrade() -> None:
+    _create_index(
+        'ix_payments_pending_due', ['due_date', 'id'], "payment_status = 'PENDING'"
+    )
+    _drop_index('ix_payments_overdue_unnotified')
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.drop_column('overdue_notified_at')
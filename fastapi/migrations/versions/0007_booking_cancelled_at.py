@@ -0,0 +1,42 @@
+"""bookings.cancelled_at
+
+Cancellation rollups are bucketed by ``cancelled_at`` both when a booking is
+cancelled and when ``services.revenue_rollups`` rebuilds them; the rebuild
+used ``updated_at``, which moves on every later edit. Already cancelled
+bookings take their ``updated_at`` as the best available value. Run
+``python -m services.revenue_rollups`` afterwards to re-bucket.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 12:18:33.904127
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('cancelled_at', sa.DateTime(timezone=True), nullable=True))
+
+    bookings = sa.table(
+        'bookings',
+        sa.column('booking_status', sa.String()),
+        sa.column('updated_at', sa.DateTime(timezone=True)),
+        sa.column('cancelled_at', sa.DateTime(timezone=True)),
+    )
+    op.execute(
+        bookings.update()
+        .where(bookings.c.booking_status == 'CANCELLED')
+        .values(cancelled_at=sa.func.coalesce(bookings.c.updated_at, sa.func.now()))
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.drop_column('cancelled_at')
@@ -0,0 +1,31 @@
+"""users.calendar_feed_token_hash
+
+Calendar feed URLs carry a random per-user secret (only its hash is stored)
+instead of a year-long JWT signed with the API key, so a leaked feed URL
+grants nothing but the feed and can be revoked. Feed URLs issued before this
+revision stop working and have to be created again.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 13:26:51.077340
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('calendar_feed_token_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_users_calendar_feed_token_hash'), ['calendar_feed_token_hash'], unique=True)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_calendar_feed_token_hash'))
+        batch_op.drop_column('calendar_feed_token_hash')
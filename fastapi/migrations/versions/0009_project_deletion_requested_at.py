@@ -0,0 +1,29 @@
+"""projects.deletion_requested_at
+
+Large projects are deleted by a background purge. The project is flagged
+when that purge starts so a second delete is refused instead of running a
+concurrent purge, and so the builder's dashboard and revenue figures leave
+it out while its rows are being removed.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 14:12:37.904518
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('deletion_requested_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.drop_column('deletion_requested_at')
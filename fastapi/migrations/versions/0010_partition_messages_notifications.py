@@ -0,0 +1,42 @@
+"""partition messages and notifications
+
+On PostgreSQL ``messages`` and ``notifications`` become tables partitioned
+by month on ``created_at`` (see services.partitions), with partitions from
+the oldest row through ``MONTHS_AHEAD`` months ahead; the daily
+``python -m services.partitions`` run keeps extending them. Other databases
+keep plain tables.
+
+Converting copies every row, so it needs a live connection: offline SQL
+(``upgrade --sql``) skips it, and ``python -m services.partitions --convert``
+does it afterwards.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 16:41:08.275193
+"""
+from datetime import date
+
+from alembic import context, op
+
+from services.partitions import PARTITIONED_TABLES, PartitionManager
+
+
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name != "postgresql" or context.is_offline_mode():
+        return
+    manager = PartitionManager(op.get_bind())
+    for table in PARTITIONED_TABLES:
+        if not manager.is_partitioned(table):
+            manager.convert(table, date.today())
+
+
+def downgrade() -> None:
+    # The partitioned tables keep the same columns, indexes and foreign keys
+    # (the primary key is (id, created_at)), so earlier revisions work on them.
+    pass
@@ -9,6 +9,10 @@ from .messages import router as messages_router
 from .payments import router as payments_router
 from .notifications import router as notifications_router
 from .change_requests import router as change_requests_router
+from .exports import router as exports_router
+from .analytics import router as analytics_router
+from .builder import router as builder_router
+from .realtime import router as realtime_router
 
 __all__ = [
     "auth_router",
@@ -20,4 +24,8 @@ __all__ = [
     "payments_router",
     "notifications_router",
     "change_requests_router",
+    "exports_router",
+    "analytics_router",
+    "builder_router",
+    "realtime_router",
 ]
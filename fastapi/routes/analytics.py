@@ -0,0 +1,43 @@
+"""Analytics routes."""
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from datetime import date, timedelta
+from typing import Optional
+
+from database import crud, schemas, models
+from database.database import get_db
+from database.auth import require_builder
+
+router = APIRouter(prefix="/api/analytics", tags=["Analytics"])
+
+
+@router.get("/revenue", response_model=schemas.RevenueSeriesResponse)
+def get_revenue(
+    period: models.RollupPeriod = models.RollupPeriod.DAY,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    project_id: Optional[int] = None,
+    current_user: models.User = Depends(require_builder),
+    db: Session = Depends(get_db)
+):
+    """Bookings, collections and cancellations over time (Builder only).
+    
+    Served entirely from precomputed rollups; defaults to the last 30 days.
+    """
+    builder = crud.get_builder_by_user_id(db, current_user.id)
+    if not builder:
+        raise HTTPException(status_code=403, detail="Builder not found")
+    
+    end = end or date.today()
+    start = start or end - timedelta(days=30)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    
+    return {
+        "period": period,
+        "start": start,
+        "end": end,
+        "project_id": project_id,
+        "series": crud.get_revenue_series(db, builder.id, period, start, end, project_id=project_id)
+    }
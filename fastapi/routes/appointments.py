@@ -1,24 +1,145 @@
 """Appointment routes."""
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from datetime import date, timedelta
+from email.utils import format_datetime, parsedate_to_datetime
 
 from database import crud, schemas, models
 from database.database import get_db
-from database.auth import get_current_user, require_builder
+from database.auth import (
+    get_current_user, require_builder, get_calendar_user, issue_calendar_feed_token, revoke_calendar_feed_token
+)
+from services import appointment_slots, calendar
 
 router = APIRouter(prefix="/api/appointments", tags=["Appointments"])
 
 
+def _require_working_hours(db: Session, project_id: int, appointment_date, duration_minutes: Optional[int]) -> None:
+    """Reject times outside the project's working hours, as availability does."""
+    if not appointment_slots.within_working_hours(db, project_id, appointment_date, duration_minutes):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Appointment is outside the project's working hours"
+        )
+
+
 @router.post("", response_model=schemas.AppointmentResponse, status_code=status.HTTP_201_CREATED)
 def create_appointment(
     appointment: schemas.AppointmentCreate,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Create a new appointment."""
-    return crud.create_appointment(db=db, appointment=appointment, user_id=current_user.id)
+    """Create a new appointment if it is within working hours and its slot is still free."""
+    _require_working_hours(db, appointment.project_id, appointment.appointment_date, appointment.duration_minutes)
+    db_appointment = crud.create_appointment(db=db, appointment=appointment)
+    if db_appointment is None:
+        raise HTTPException(status_code=409, detail="Appointment slot is no longer available")
+    return db_appointment
+
+
+@router.get("/availability", response_model=schemas.AppointmentAvailabilityResponse)
+def get_availability(
+    project_id: int,
+    date_from: date,
+    date_to: Optional[date] = None,
+    duration_minutes: int = Query(60, ge=15, le=480),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get free appointment slots for a project between two dates (inclusive)."""
+    date_to = date_to or date_from
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="date_to must not be before date_from")
+    if date_to - date_from >= timedelta(days=appointment_slots.MAX_AVAILABILITY_DAYS):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Range cannot exceed {appointment_slots.MAX_AVAILABILITY_DAYS} days"
+        )
+    if not crud.get_project_by_id(db, project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    availability = appointment_slots.get_availability(db, project_id, date_from, date_to, duration_minutes)
+    return {"project_id": project_id, "duration_minutes": duration_minutes, **availability}
+
+
+@router.post("/calendar/feed-url", response_model=dict)
+def create_calendar_feed_url(
+    request: Request,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Create the current user's personal ICS feed URL for calendar apps.
+    
+    The URL is only shown once; creating a new one revokes the previous URL.
+    """
+    token = issue_calendar_feed_token(db, current_user.id)
+    return {"url": str(request.url_for("get_calendar_feed").include_query_params(token=token))}
+
+
+@router.delete("/calendar/feed-url", response_model=dict)
+def revoke_calendar_feed_url(
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Revoke the current user's ICS feed URL."""
+    revoke_calendar_feed_token(db, current_user.id)
+    return {"message": "Calendar feed URL revoked"}
+
+
+@router.get("/calendar.ics", name="get_calendar_feed")
+def get_calendar_feed(
+    project_id: Optional[int] = None,
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+    current_user: models.User = Depends(get_calendar_user),
+    db: Session = Depends(get_db)
+):
+    """Stream the user's appointments as an iCalendar feed.
+    
+    Customers get their own appointments; builders get appointments for
+    their projects (optionally one project). Conditional requests are
+    answered with 304 while no appointment in the feed has changed.
+    """
+    customer_id = None
+    project_ids = None
+    calendar_name = "My appointments"
+    if current_user.user_type == models.UserType.BUILDER:
+        builder = crud.get_builder_by_user_id(db, current_user.id)
+        if not builder:
+            raise HTTPException(status_code=403, detail="Builder not found")
+        project_ids = [project.id for project in crud.get_projects_by_builder(db, builder.id)]
+        calendar_name = f"{builder.company_name} appointments"
+        if project_id is not None:
+            if project_id not in project_ids:
+                raise HTTPException(status_code=403, detail="Not authorized")
+            project_ids = [project_id]
+    else:
+        customer = crud.get_customer_by_user_id(db, current_user.id)
+        if not customer:
+            raise HTTPException(status_code=403, detail="Customer not found")
+        customer_id = customer.id
+    
+    etag, last_modified = calendar.feed_validator(db, customer_id=customer_id, project_ids=project_ids)
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=0, must-revalidate"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    
+    try:
+        modified_since = parsedate_to_datetime(if_modified_since) if if_modified_since else None
+    except (TypeError, ValueError):
+        modified_since = None
+    if calendar.not_modified(etag, last_modified, if_none_match, modified_since):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    query = calendar.feed_query(customer_id=customer_id, project_ids=project_ids)
+    return StreamingResponse(
+        calendar.stream_feed(query, calendar_name),
+        media_type="text/calendar; charset=utf-8",
+        headers={**headers, "Content-Disposition": 'inline; filename="appointments.ics"'}
+    )
 
 
 @router.get("/customer/{customer_id}", response_model=List[schemas.AppointmentResponse])
@@ -154,7 +275,7 @@ def update_appointment_status(
 @router.patch("/{appointment_id}/reschedule", response_model=schemas.AppointmentResponse)
 def reschedule_appointment(
     appointment_id: int,
-    reschedule_data: dict,
+    reschedule_data: schemas.AppointmentReschedule,
     builder: models.User = Depends(require_builder),
     db: Session = Depends(get_db)
 ):
@@ -168,10 +289,18 @@ def reschedule_appointment(
         raise HTTPException(status_code=403, detail="Not authorized")
     
     # Update appointment details
-    if "appointment_date" in reschedule_data:
-        appointment.appointment_date = reschedule_data["appointment_date"]
-    if "meeting_location" in reschedule_data:
-        appointment.meeting_location = reschedule_data["meeting_location"]
+    if reschedule_data.meeting_location is not None:
+        appointment.meeting_location = reschedule_data.meeting_location
+    if reschedule_data.appointment_date is not None:
+        _require_working_hours(
+            db, appointment.project_id, reschedule_data.appointment_date, appointment.duration_minutes
+        )
+        appointment = crud.reschedule_appointment(
+            db, appointment, reschedule_data.appointment_date, reschedule_data.reschedule_reason
+        )
+        if appointment is None:
+            raise HTTPException(status_code=409, detail="Appointment slot is no longer available")
+        return appointment
     
     db.commit()
     db.refresh(appointment)
@@ -7,6 +7,7 @@ from typing import List, Optional
 from database import crud, schemas, models
 from database.database import get_db
 from database.auth import get_current_user, require_builder, require_customer
+from services import payment_schedule
 
 router = APIRouter(prefix="/api/bookings", tags=["Bookings"])
 
@@ -179,16 +180,46 @@ def get_booking_payments(
         raise HTTPException(status_code=403, detail="Not authorized")
     
     payments = crud.get_payments_by_booking(db, booking_id=booking_id)
+    schedule = [
+        schemas.PaymentScheduleItem.model_validate(payment)
+        for payment in payments
+        if payment.payment_status == models.PaymentStatus.PENDING and payment.due_date
+    ]
     
     return {
         "booking_id": booking_id,
         "payments": payments,
         "total_paid": booking.paid_amount,
         "total_pending": booking.pending_amount,
-        "payment_schedule": []  # Can be enhanced later
+        "payment_schedule": schedule
     }
 
 
+@router.post("/{booking_id}/payment-schedule", response_model=List[schemas.PaymentScheduleItem])
+def generate_payment_schedule(
+    booking_id: int,
+    options: schemas.PaymentScheduleOptions = schemas.PaymentScheduleOptions(),
+    builder: models.User = Depends(require_builder),
+    db: Session = Depends(get_db)
+):
+    """Generate (or regenerate) the payment schedule for a booking (Builder only).
+    
+    Pending instalments generated by an earlier schedule are replaced;
+    pending payments entered by hand are kept, and completed payments are
+    deducted from the earliest instalments.
+    """
+    booking = crud.get_booking_by_id(db, booking_id=booking_id)
+    if not booking:
+        raise HTTPException(status_code=404, detail="Booking not found")
+    
+    # Verify ownership
+    builder_profile = crud.get_builder_by_user_id(db, builder.id)
+    if not builder_profile or booking.unit.project.builder_id != builder_profile.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    return payment_schedule.generate_booking_schedule(db, booking=booking, options=options)
+
+
 @router.post("/{booking_id}/generate-agreement", response_model=dict)
 def generate_booking_agreement(
     booking_id: int,
@@ -0,0 +1,28 @@
+"""Builder portal routes."""
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from database import crud, schemas, models
+from database.database import get_db
+from database.auth import require_builder
+
+router = APIRouter(prefix="/api/builder", tags=["Builder"])
+
+
+@router.get("/dashboard", response_model=schemas.BuilderDashboardResponse)
+def get_dashboard(
+    current_user: models.User = Depends(require_builder),
+    db: Session = Depends(get_db)
+):
+    """Headline numbers for the builder dashboard (Builder only).
+    
+    Read-only: served from the precomputed summary row that
+    `python -m services.dashboard --interval 30` keeps fresh, or computed live
+    when that row is missing or more than a minute old.
+    """
+    builder = crud.get_builder_by_user_id(db, current_user.id)
+    if not builder:
+        raise HTTPException(status_code=403, detail="Builder not found")
+    
+    return crud.get_dashboard_summary(db, builder.id)
@@ -0,0 +1,77 @@
+"""Export routes."""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from database import crud, models
+from database.database import get_db
+from database.auth import require_builder
+from services import exports
+
+router = APIRouter(prefix="/api/exports", tags=["Exports"])
+
+FORMAT_QUERY = Query("csv", alias="format", pattern="^(csv|jsonl)$")
+
+
+def _get_builder(db: Session, current_user: models.User) -> models.Builder:
+    """Resolve the builder profile of the current user."""
+    builder = crud.get_builder_by_user_id(db, current_user.id)
+    if not builder:
+        raise HTTPException(status_code=403, detail="Builder not found")
+    return builder
+
+
+def _export_response(query, name: str, export_format: str) -> StreamingResponse:
+    """Wrap an export query in a streaming download response."""
+    return StreamingResponse(
+        exports.stream_rows(query, export_format),
+        media_type=exports.MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{export_format}"'}
+    )
+
+
+@router.get("/bookings")
+def export_bookings(
+    export_format: str = FORMAT_QUERY,
+    status: Optional[models.BookingStatus] = None,
+    project_id: Optional[int] = None,
+    payment_status: Optional[str] = Query(None, pattern="^(pending|partial|completed)$"),
+    current_user: models.User = Depends(require_builder),
+    db: Session = Depends(get_db)
+):
+    """Stream all bookings for the builder's projects as CSV or JSONL (Builder only)."""
+    builder = _get_builder(db, current_user)
+    query = exports.bookings_export_query(
+        builder.id, status=status, project_id=project_id, payment_status=payment_status
+    )
+    return _export_response(query, "bookings", export_format)
+
+
+@router.get("/payments")
+def export_payments(
+    export_format: str = FORMAT_QUERY,
+    project_id: Optional[int] = None,
+    payment_status: Optional[models.PaymentStatus] = None,
+    current_user: models.User = Depends(require_builder),
+    db: Session = Depends(get_db)
+):
+    """Stream all payments for the builder's projects as CSV or JSONL (Builder only)."""
+    builder = _get_builder(db, current_user)
+    query = exports.payments_export_query(builder.id, project_id=project_id, payment_status=payment_status)
+    return _export_response(query, "payments", export_format)
+
+
+@router.get("/units")
+def export_units(
+    export_format: str = FORMAT_QUERY,
+    project_id: Optional[int] = None,
+    status: Optional[models.UnitStatus] = None,
+    current_user: models.User = Depends(require_builder),
+    db: Session = Depends(get_db)
+):
+    """Stream the unit inventory of the builder's projects as CSV or JSONL (Builder only)."""
+    builder = _get_builder(db, current_user)
+    query = exports.units_export_query(builder.id, project_id=project_id, status=status)
+    return _export_response(query, "units", export_format)
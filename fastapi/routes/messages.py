@@ -1,6 +1,6 @@
 """Message routes."""
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, and_
 from typing import Optional
@@ -12,14 +12,15 @@ from database.auth import get_current_user
 router = APIRouter(prefix="/api/messages", tags=["Messages"])
 
 
-@router.get("/conversations", response_model=dict)
+@router.get("/conversations", response_model=schemas.ConversationListResponse)
 def get_conversations(
+    page: int = Query(1, ge=1),
+    limit: int = Query(20, ge=1, le=100),
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get all conversations for current user."""
-    conversations = crud.get_conversations(db, user_id=current_user.id)
-    return {"conversations": conversations}
+    """Get the current user's conversations with latest message and unread count."""
+    return crud.get_conversations(db, user_id=current_user.id, page=page, limit=limit)
 
 
 @router.get("/conversation/{customer_id}/{project_id}", response_model=dict)
@@ -31,7 +32,7 @@ def get_conversation_messages(
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get messages in a specific conversation."""
+    """Get messages in a specific conversation (read-only; see POST .../read)."""
     skip = (page - 1) * limit
     
     # Get messages between current user and the other party for this project
@@ -52,12 +53,6 @@ def get_conversation_messages(
     total = query.count()
     messages = query.offset(skip).limit(limit).all()
     
-    # Mark messages as read
-    for msg in messages:
-        if msg.recipient_id == current_user.id and not msg.is_read:
-            msg.is_read = True
-    db.commit()
-    
     return {
         "messages": messages,
         "total": total,
@@ -66,6 +61,26 @@ def get_conversation_messages(
     }
 
 
+@router.post("/conversation/{customer_id}/{project_id}/read", response_model=schemas.ReadReceiptResponse)
+def mark_conversation_messages_read(
+    customer_id: int,
+    project_id: int,
+    receipt: Optional[schemas.ReadReceipt] = None,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Mark messages from the other party in a conversation as read, up to `up_to_id` if given."""
+    count = crud.mark_conversation_read(
+        db, current_user.id, customer_id, project_id,
+        up_to_message_id=receipt.up_to_id if receipt else None
+    )
+    return {
+        "message": "Messages marked as read",
+        "count": count,
+        "unread_count": crud.get_unread_message_count(db, current_user.id)
+    }
+
+
 @router.post("", response_model=schemas.MessageResponse, status_code=status.HTTP_201_CREATED)
 def send_message(
     message: schemas.MessageCreate,
@@ -84,23 +99,18 @@ def mark_conversation_read(
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Mark all messages in a conversation as read."""
-    messages = db.query(models.Message).filter(
-        models.Message.id == conversation_id,
-        models.Message.recipient_id == current_user.id,
-        models.Message.is_read == False
-    ).all()
-    
-    count = 0
-    for msg in messages:
-        msg.is_read = True
-        count += 1
-    
-    db.commit()
+    """Mark the conversation of a received message as read, up to that message."""
+    message = crud.get_message_by_id(db, conversation_id)
+    if not message or message.recipient_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Message not found")
     
+    count = crud.mark_conversation_read(
+        db, current_user.id, message.sender_id, message.project_id, up_to_message_id=message.id
+    )
     return {
         "message": "Messages marked as read",
-        "count": count
+        "count": count,
+        "unread_count": crud.get_unread_message_count(db, current_user.id)
     }
 
 
@@ -1,42 +1,143 @@
 """Notification routes."""
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import json
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import Optional
 from sqlalchemy.orm import Session
 
 from database import crud, schemas, models
-from database.database import get_db
-from database.auth import get_current_user
+from database.database import get_db, SessionLocal
+from database.auth import get_current_user, get_user_from_token
+from services.realtime import hub
 
 router = APIRouter(prefix="/api/notifications", tags=["Notifications"])
 
+SSE_HEARTBEAT_SECONDS = 15
+SSE_BACKLOG_LIMIT = 100
+
 
 @router.get("")
 def get_notifications(
     unread_only: bool = False,
-    limit: int = 20,
+    limit: int = Query(20, ge=1, le=100),
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get notifications for current user."""
-    query = db.query(models.Notification).filter(
-        models.Notification.user_id == current_user.id
-    )
-    
-    if unread_only:
-        query = query.filter(models.Notification.is_read == False)
-    
-    notifications = query.order_by(models.Notification.created_at.desc()).limit(limit).all()
-    unread_count = db.query(models.Notification).filter(
-        models.Notification.user_id == current_user.id,
-        models.Notification.is_read == False
-    ).count()
+    """Get the current user's latest notifications (bounded to recent partitions by crud)."""
+    result = crud.get_notifications_for_user(db, current_user.id, schemas.NotificationFilter(
+        limit=limit,
+        is_read=False if unread_only else None
+    ))
     
     return {
-        "notifications": notifications,
-        "unread_count": unread_count
+        "notifications": result["notifications"],
+        "unread_count": result["unreadCount"]
     }
 
 
+def _sse(event: str, data: dict, event_id: Optional[int] = None) -> str:
+    """Format one Server-Sent Event."""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _authenticate(token: str) -> Optional[int]:
+    db = SessionLocal()
+    try:
+        user = get_user_from_token(db, token)
+        return user.id if user else None
+    finally:
+        db.close()
+
+
+def _stream_state(user_id: int, last_event_id: Optional[int]):
+    """Missed notifications since `last_event_id`, unread count and newest id."""
+    db = SessionLocal()
+    try:
+        backlog = []
+        if last_event_id is not None:
+            backlog = [
+                schemas.NotificationResponse.model_validate(n).model_dump(mode="json")
+                for n in crud.get_notifications_after(db, user_id, last_event_id, SSE_BACKLOG_LIMIT + 1)
+            ]
+        latest_id = crud.get_latest_notification_id(db, user_id)
+        return backlog, crud.get_unread_notification_count(db, user_id), latest_id
+    finally:
+        db.close()
+
+
+@router.get("/stream")
+async def stream_notifications(
+    token: str = Query(..., description="Access token (EventSource cannot send headers)"),
+    last_event_id: Optional[int] = Header(None),
+    resume_from: Optional[int] = Query(None, description="Resume after this notification id"),
+):
+    """Server-Sent Events stream of new notifications and unread-count changes.
+    
+    Events:
+    - `notification` (id = notification id): a new notification, or an
+      updated digest (`coalesced_count` > 1, sent without an event id)
+    - `unread`: `{"unread_count": n}` on connect, then `{"delta": +1/-n}`
+    - `resync`: more was missed than can be replayed; refetch over REST
+    
+    On reconnect the browser sends `Last-Event-ID` and missed notifications
+    are replayed first.
+    """
+    user_id = await run_in_threadpool(_authenticate, token)
+    if user_id is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+    
+    resume_after = last_event_id if last_event_id is not None else resume_from
+    
+    async def events():
+        # Register before reading the backlog so nothing falls in between
+        connection = hub.connect(user_id, kinds={"notification", "notification_unread"})
+        try:
+            backlog, unread_count, latest_id = await run_in_threadpool(_stream_state, user_id, resume_after)
+            streamed_ids = set()  # notifications newer than latest_id already sent on this stream
+            yield "retry: 5000\n\n"
+            yield _sse("unread", {"unread_count": unread_count})
+            for notification in backlog[:SSE_BACKLOG_LIMIT]:
+                yield _sse("notification", notification, notification["id"])
+            if len(backlog) > SSE_BACKLOG_LIMIT:
+                yield _sse("resync", {"reason": "backlog_too_large"})
+            
+            while True:
+                try:
+                    item = await asyncio.wait_for(connection.queue.get(), SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if item is None:
+                    yield _sse("resync", {"reason": "slow_consumer"})
+                    return
+                if item["type"] == "notification_unread":
+                    yield _sse("unread", item["data"])
+                elif item["data"]["id"] > latest_id and item["data"]["id"] not in streamed_ids:
+                    # Older ones are in the backlog/count; commits may arrive out of id order
+                    streamed_ids.add(item["data"]["id"])
+                    yield _sse("notification", item["data"], item["data"]["id"])
+                    if not item["data"]["is_read"]:
+                        yield _sse("unread", {"delta": 1})
+                elif item["data"]["coalesced_count"] > 1:
+                    # A digest the client already has absorbed another notification: new
+                    # content, same count. No event id, so Last-Event-ID keeps pointing
+                    # at the newest.
+                    yield _sse("notification", item["data"])
+        finally:
+            hub.disconnect(connection)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.patch("/{notification_id}/read", response_model=schemas.NotificationResponse)
 def mark_notification_read(
     notification_id: int,
@@ -44,16 +145,25 @@ def mark_notification_read(
     db: Session = Depends(get_db)
 ):
     """Mark notification as read."""
-    notification = db.query(models.Notification).filter(
-        models.Notification.id == notification_id,
-        models.Notification.user_id == current_user.id
-    ).first()
-    
-    if not notification:
+    notification = crud.get_notification_by_id(db, notification_id)
+    if not notification or notification.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Notification not found")
     
-    notification.is_read = True
-    db.commit()
-    db.refresh(notification)
-    
-    return notification
+    return crud.mark_notification_as_read(db, notification_id)
+
+
+@router.post("/read-all", response_model=schemas.ReadReceiptResponse)
+def mark_all_notifications_read(
+    receipt: Optional[schemas.ReadReceipt] = None,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Mark all of the current user's notifications read, up to `up_to_id` if given."""
+    count = crud.mark_all_notifications_as_read(
+        db, current_user.id, up_to_notification_id=receipt.up_to_id if receipt else None
+    )
+    return {
+        "message": "Notifications marked as read",
+        "count": count,
+        "unread_count": crud.get_unread_notification_count(db, current_user.id)
+    }
@@ -16,29 +16,18 @@ def create_payment(
     builder: models.User = Depends(require_builder),
     db: Session = Depends(get_db)
 ):
-    """Record a payment (Builder only)."""
+    """Record a payment (Builder only).
+    
+    The payment is stored as completed and the booking balance is credited
+    with an atomic SQL increment in the same transaction.
+    """
     # Verify booking exists and belongs to builder
     booking = crud.get_booking_by_id(db, booking_id=payment.booking_id)
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     
-    if booking.project.builder_id != builder.id:
+    builder_profile = crud.get_builder_by_user_id(db, builder.id)
+    if not builder_profile or booking.unit.project.builder_id != builder_profile.id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    # Create payment
-    db_payment = crud.create_payment(db=db, payment=payment)
-    
-    # Update booking amounts
-    booking.paid_amount += payment.amount
-    booking.pending_amount = booking.total_amount - booking.paid_amount
-    
-    # Update booking status if fully paid
-    if booking.paid_amount >= booking.total_amount:
-        booking.status = "completed"
-    elif booking.paid_amount > 0 and booking.status == "pending":
-        booking.status = "active"
-    
-    db.commit()
-    db.refresh(db_payment)
-    
-    return db_payment
+    return crud.record_payment(db=db, payment=payment)
@@ -1,16 +1,25 @@
 """Project routes."""
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from database import crud, schemas, models
 from database.database import get_db
 from database.auth import get_current_user, require_builder
+from services import notification_fanout, payment_schedule, project_purge
 
 router = APIRouter(prefix="/api/projects", tags=["Projects"])
 
 
+def _split_values(values: Optional[List[str]]) -> Optional[List[str]]:
+    """Accept both ?amenities=Gym&amenities=Pool and ?amenities=Gym,Pool."""
+    if not values:
+        return None
+    split = [value.strip() for item in values for value in item.split(",") if value.strip()]
+    return split or None
+
+
 @router.get("", response_model=schemas.ProjectListResponse)
 def get_projects(
     page: int = 1,
@@ -22,6 +31,7 @@ def get_projects(
     min_price: float = None,
     max_price: float = None,
     builder_id: int = None,
+    amenities: Optional[List[str]] = Query(None, description="Only projects with all of these amenities"),
     db: Session = Depends(get_db)
 ):
     """Get list of projects with filters."""
@@ -37,7 +47,8 @@ def get_projects(
         status=status,
         min_price=min_price,
         max_price=max_price,
-        builder_id=builder_id
+        builder_id=builder_id,
+        amenities=_split_values(amenities)
     )
     
     # Get projects with filters
@@ -95,10 +106,16 @@ def update_project(
 @router.delete("/{project_id}", status_code=status.HTTP_200_OK)
 def delete_project(
     project_id: int,
+    response: Response,
+    background_tasks: BackgroundTasks,
     current_user: models.User = Depends(require_builder),
     db: Session = Depends(get_db)
 ):
-    """Delete project (Builder only)."""
+    """Delete project (Builder only).
+    
+    Large projects are purged in chunks after responding (202 Accepted);
+    while that runs the project is flagged and further deletes get 409.
+    """
     project = crud.get_project(db, project_id=project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -112,6 +129,16 @@ def delete_project(
     if project.builder_id != builder.id:
         raise HTTPException(status_code=403, detail="Not authorized to delete this project")
     
+    if project.deletion_requested_at is not None:
+        raise HTTPException(status_code=409, detail="Project deletion is already in progress")
+    
+    if crud.count_project_units(db, project_id) > project_purge.BACKGROUND_PURGE_UNITS:
+        if not crud.mark_project_deleting(db, project_id):
+            raise HTTPException(status_code=409, detail="Project deletion is already in progress")
+        background_tasks.add_task(project_purge.purge_in_background, project_id)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return {"message": "Project deletion started"}
+    
     success = crud.delete_project(db=db, project_id=project_id)
     if not success:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -120,9 +147,14 @@ def delete_project(
 
 
 @router.get("/{project_id}/units", response_model=List[schemas.UnitResponse])
-def get_project_units(project_id: int, db: Session = Depends(get_db)):
-    """Get all units for a project."""
-    return crud.get_units_by_project(db, project_id=project_id)
+def get_project_units(
+    project_id: int,
+    status: Optional[models.UnitStatus] = None,
+    features: Optional[List[str]] = Query(None, description="Only units with all of these features"),
+    db: Session = Depends(get_db)
+):
+    """Get a project's units, optionally filtered by status and features."""
+    return crud.get_units_by_project(db, project_id=project_id, status=status, features=_split_values(features))
 
 
 @router.get("/{project_id}/progress", response_model=List[schemas.ProjectProgressResponse])
@@ -148,3 +180,91 @@ def get_construction_updates(
             raise HTTPException(status_code=403, detail="No access to this project")
     
     return crud.get_updates_by_project(db, project_id=project_id)
+
+
+def _get_owned_project(db: Session, project_id: int, current_user: models.User) -> models.Project:
+    """Load a project the current builder owns, or raise 404/403."""
+    project = crud.get_project(db, project_id=project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    builder = crud.get_builder_by_user_id(db, current_user.id)
+    if not builder or project.builder_id != builder.id:
+        raise HTTPException(status_code=403, detail="Not authorized to manage this project")
+    return project
+
+
+@router.post("/{project_id}/updates", response_model=schemas.ConstructionUpdateResponse, status_code=status.HTTP_201_CREATED)
+def create_construction_update(
+    project_id: int,
+    update: schemas.ConstructionUpdateBase,
+    background_tasks: BackgroundTasks,
+    current_user: models.User = Depends(require_builder),
+    db: Session = Depends(get_db)
+):
+    """Post a construction update (Builder only). Published updates notify every buyer."""
+    _get_owned_project(db, project_id, current_user)
+    db_update = crud.create_construction_update(db, schemas.ConstructionUpdateCreate(
+        **update.dict(), project_id=project_id, posted_by=current_user.id
+    ))
+    if db_update.is_published:
+        fanout_id = crud.get_pending_fanout_id(db, "construction_update", db_update.id)
+        if fanout_id is not None:
+            background_tasks.add_task(notification_fanout.deliver_in_background, fanout_id)
+    return db_update
+
+
+@router.patch("/{project_id}/progress/{progress_id}", response_model=schemas.ProjectProgressResponse)
+def update_project_progress(
+    project_id: int,
+    progress_id: int,
+    progress_update: schemas.ProjectProgressUpdate,
+    background_tasks: BackgroundTasks,
+    current_user: models.User = Depends(require_builder),
+    db: Session = Depends(get_db)
+):
+    """Update a construction phase (Builder only). Status changes notify every buyer."""
+    _get_owned_project(db, project_id, current_user)
+    progress = crud.get_project_progress_by_id(db, progress_id)
+    if not progress or progress.project_id != project_id:
+        raise HTTPException(status_code=404, detail="Progress phase not found")
+    
+    previous_status = progress.status
+    progress = crud.update_project_progress(db, progress_id, progress_update)
+    if progress.status != previous_status and progress.customer_visible:
+        fanout_id = crud.get_pending_fanout_id(db, "project_progress", progress.id)
+        if fanout_id is not None:
+            background_tasks.add_task(notification_fanout.deliver_in_background, fanout_id)
+    return progress
+
+
+@router.get("/{project_id}/fanouts", response_model=List[schemas.NotificationFanoutResponse])
+def get_notification_fanouts(
+    project_id: int,
+    limit: int = 20,
+    current_user: models.User = Depends(require_builder),
+    db: Session = Depends(get_db)
+):
+    """Delivery status and throughput of a project's recent announcements (Builder only)."""
+    _get_owned_project(db, project_id, current_user)
+    return crud.get_notification_fanouts_by_project(db, project_id, limit=min(limit, 100))
+
+
+@router.post("/{project_id}/payment-schedules", response_model=schemas.ProjectScheduleResult)
+def recompute_payment_schedules(
+    project_id: int,
+    options: schemas.PaymentScheduleOptions = schemas.PaymentScheduleOptions(),
+    current_user: models.User = Depends(require_builder),
+    db: Session = Depends(get_db)
+):
+    """Recompute payment schedules for every active booking in a project (Builder only)."""
+    project = crud.get_project(db, project_id=project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    # Verify ownership
+    builder = crud.get_builder_by_user_id(db, current_user.id)
+    if not builder or project.builder_id != builder.id:
+        raise HTTPException(status_code=403, detail="Not authorized to manage this project")
+    
+    return payment_schedule.recompute_project_schedules(db, project_id=project_id, options=options)
@@ -0,0 +1,64 @@
+"""Real-time routes."""
+
+import asyncio
+
+from fastapi import APIRouter, Query, WebSocket
+from fastapi.concurrency import run_in_threadpool
+
+from database.auth import get_user_from_token
+from database.database import SessionLocal
+from services.realtime import hub
+
+router = APIRouter(prefix="/api/realtime", tags=["Realtime"])
+
+# RFC 6455 close codes
+POLICY_VIOLATION = 1008
+TRY_AGAIN_LATER = 1013
+
+
+def _authenticate(token: str):
+    db = SessionLocal()
+    try:
+        return get_user_from_token(db, token)
+    finally:
+        db.close()
+
+
+@router.websocket("/ws")
+async def realtime_socket(websocket: WebSocket, token: str = Query(...)):
+    """Push new messages and notifications to the connected user.
+
+    Browsers cannot set headers on a WebSocket, so the access token is passed
+    as `?token=`. Events are sent as `{"type": "message"|"notification",
+    "data": {...}}`; a client sending "ping" receives "pong". A client that
+    cannot keep up is closed with code 1013 and should reconnect and refetch.
+    """
+    user = await run_in_threadpool(_authenticate, token)
+    if user is None:
+        await websocket.close(code=POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    connection = hub.connect(user.id)
+
+    async def send_events():
+        while True:
+            item = await connection.queue.get()
+            if item is None:
+                await websocket.close(code=TRY_AGAIN_LATER)
+                return
+            await websocket.send_json(item)
+
+    async def receive_pings():
+        while True:
+            if await websocket.receive_text() == "ping":
+                await websocket.send_text("pong")
+
+    tasks = [asyncio.create_task(send_events()), asyncio.create_task(receive_pings())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        hub.disconnect(connection)
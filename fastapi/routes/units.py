@@ -1,15 +1,28 @@
 """Unit routes."""
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, File, Form, UploadFile
 from sqlalchemy.orm import Session
 
 from database import crud, schemas, models
 from database.database import get_db
 from database.auth import require_builder
+from services import unit_import
 
 router = APIRouter(prefix="/api/units", tags=["Units"])
 
 
+def _verify_project_owner(db: Session, project_id: int, current_user: models.User) -> models.Project:
+    """Return the project if it belongs to the current builder."""
+    project = crud.get_project(db, project_id=project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    builder = crud.get_builder_by_user_id(db, current_user.id)
+    if not builder or project.builder_id != builder.id:
+        raise HTTPException(status_code=403, detail="Not authorized to manage units for this project")
+    return project
+
+
 @router.post("", response_model=schemas.UnitResponse, status_code=status.HTTP_201_CREATED)
 def create_unit(
     unit: schemas.UnitCreate,
@@ -17,9 +30,66 @@ def create_unit(
     db: Session = Depends(get_db)
 ):
     """Create a new unit (Builder only)."""
-    # Verify project ownership
-    project = crud.get_project(db, project_id=unit.project_id)
-    if not project or project.builder_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized to create units for this project")
-    
+    _verify_project_owner(db, unit.project_id, current_user)
     return crud.create_unit(db=db, unit=unit)
+
+
+@router.post("/bulk", response_model=schemas.UnitBulkResult, status_code=status.HTTP_201_CREATED)
+def bulk_create_units(
+    payload: schemas.UnitBulkCreate,
+    current_user: models.User = Depends(require_builder),
+    db: Session = Depends(get_db)
+):
+    """Create many units for a project in one request (Builder only)."""
+    _verify_project_owner(db, payload.project_id, current_user)
+    return crud.bulk_create_units(db, project_id=payload.project_id, rows=payload.units)
+
+
+@router.post("/import", response_model=schemas.UnitBulkResult, status_code=status.HTTP_201_CREATED)
+def import_units(
+    project_id: int = Form(...),
+    file: UploadFile = File(...),
+    current_user: models.User = Depends(require_builder),
+    db: Session = Depends(get_db)
+):
+    """Import units from a CSV or XLSX inventory sheet (Builder only).
+    
+    The first row must hold column names matching the unit fields; multiple
+    features go in one cell separated by "|".
+    """
+    _verify_project_owner(db, project_id, current_user)
+    
+    try:
+        rows = unit_import.iter_rows(file.filename or "", file.file)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        return crud.bulk_create_units(db, project_id=project_id, rows=rows)
+    except unit_import.UnreadableFile as e:
+        # Nothing is committed until the whole file has been read
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/bulk-revision", response_model=schemas.UnitBulkRevisionResult)
+def bulk_revise_units(
+    revision: schemas.UnitBulkRevision,
+    current_user: models.User = Depends(require_builder),
+    db: Session = Depends(get_db)
+):
+    """Revise price and/or status of every unit matching a filter (Builder only).
+    
+    Price modes: `percentage` (e.g. 3 for +3%), `absolute` (amount added to the
+    price) and `per_sqft` (new rate multiplied by the unit area).
+    """
+    if revision.mode is None and revision.status is None:
+        raise HTTPException(status_code=400, detail="Provide a price mode or a new status")
+    if revision.mode is not None and revision.value is None:
+        raise HTTPException(status_code=400, detail="A value is required for price revisions")
+    
+    _verify_project_owner(db, revision.project_id, current_user)
+    result = crud.bulk_revise_units(db, revision=revision, user_id=current_user.id)
+    if result is None:
+        raise HTTPException(status_code=400, detail="Revision would set a unit price to zero or less")
+    return result
@@ -0,0 +1 @@
+"""Domain services and background jobs that sit on top of the CRUD layer."""
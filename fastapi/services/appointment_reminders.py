@@ -0,0 +1,207 @@
+"""Appointment reminder scheduler.
+
+Sends APPOINTMENT_REMINDER notifications to the customer and the builder
+ahead of each upcoming appointment (24h and 1h before by default).
+
+Only the next ``window`` of reminders is held in memory, in a heap ordered by
+send time. The heap is refilled every poll with a range query on the indexed
+``appointment_date`` column. Sends are recorded in ``appointment_reminders``
+keyed by (appointment, offset, appointment date), in the same transaction as
+the notifications:
+
+- a restart never sends a reminder twice;
+- a rescheduled appointment gets fresh reminders for its new date;
+- a queued reminder whose appointment has moved or been cancelled is dropped
+  when it comes due.
+
+Usage:
+    python -m services.appointment_reminders [--poll 60] [--window 900] [--once]
+"""
+
+import argparse
+import heapq
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from database import crud, models
+from database.database import SessionLocal
+from services.appointment_slots import as_utc
+
+REMINDER_OFFSETS = (24 * 60, 60)
+ACTIVE_STATUSES = [
+    models.AppointmentStatus.SCHEDULED,
+    models.AppointmentStatus.CONFIRMED,
+    models.AppointmentStatus.RESCHEDULED
+]
+
+# (remind_at, appointment_id, offset_minutes, appointment_date as stored)
+Entry = Tuple[datetime, int, int, datetime]
+
+
+def _upcoming_query(start: datetime, end: datetime, appointment_id: Optional[int] = None):
+    """Active appointments starting in (start, end], with who to remind."""
+    query = select(
+        models.Appointment.id,
+        models.Appointment.appointment_date,
+        models.Appointment.appointment_type,
+        models.Project.project_name,
+        models.Customer.user_id.label("customer_user_id"),
+        models.Builder.user_id.label("builder_user_id")
+    ).join(models.Project, models.Appointment.project_id == models.Project.id).join(
+        models.Builder, models.Project.builder_id == models.Builder.id
+    ).join(
+        models.Customer, models.Appointment.customer_id == models.Customer.id
+    ).where(
+        models.Appointment.appointment_date > start,
+        models.Appointment.appointment_date <= end,
+        models.Appointment.status.in_(ACTIVE_STATUSES)
+    )
+    if appointment_id is not None:
+        query = query.where(models.Appointment.id == appointment_id)
+    return query
+
+
+def _notification_rows(appointment, offset_minutes: int, now: datetime) -> List[Dict]:
+    """Customer and builder reminders for one appointment."""
+    starts_at = as_utc(appointment.appointment_date)
+    when = starts_at.strftime("%d %b %Y %H:%M UTC")
+    minutes = max(round((starts_at - now).total_seconds() / 60), 1)
+    lead = f"{round(minutes / 60)} hours" if minutes >= 120 else f"{minutes} minutes"
+    kind = appointment.appointment_type.value.replace("_", " ")
+    common = {
+        "notification_type": models.NotificationType.APPOINTMENT_REMINDER,
+        "related_entity_type": "appointment",
+        "related_entity_id": appointment.id,
+        "priority": models.Priority.HIGH if offset_minutes <= 60 else models.Priority.MEDIUM,
+        "title": f"Upcoming {kind} in {lead}",
+    }
+    return [
+        {
+            **common,
+            "user_id": appointment.customer_user_id,
+            "message": f"Your {kind} at {appointment.project_name} is scheduled for {when}.",
+            "action_url": "/customer/appointments",
+        },
+        {
+            **common,
+            "user_id": appointment.builder_user_id,
+            "message": f"A {kind} at {appointment.project_name} is scheduled for {when}.",
+            "action_url": "/builder/appointments",
+        },
+    ]
+
+
+class ReminderScheduler:
+    """Time-ordered queue of the reminders due within the next window."""
+
+    def __init__(self, offsets=REMINDER_OFFSETS, window: timedelta = timedelta(minutes=15)):
+        self.offsets = sorted(offsets)
+        self.window = window
+        self._heap: List[Entry] = []
+        self._queued: Set[Tuple[int, int, datetime]] = set()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def refill(self, db: Session, now: datetime) -> int:
+        """Queue reminders due before now + window. Returns how many were added."""
+        horizon = now + self.window
+        # Keys stay in _queued after sending so refills skip them; forget them
+        # once the appointment has started.
+        self._queued = {key for key in self._queued if as_utc(key[2]) > now}
+        rows = db.execute(_upcoming_query(now, horizon + timedelta(minutes=self.offsets[-1]))).all()
+        added = 0
+        for row in rows:
+            starts_at = as_utc(row.appointment_date)
+            # Smallest offset first: if several reminders are overdue (e.g. the
+            # appointment was booked late), only the most recent one is sent.
+            overdue_sent = False
+            for offset in self.offsets:
+                remind_at = starts_at - timedelta(minutes=offset)
+                if remind_at > horizon:
+                    continue
+                if remind_at <= now:
+                    if overdue_sent:
+                        continue
+                    overdue_sent = True
+                key = (row.id, offset, row.appointment_date)
+                if key not in self._queued:
+                    self._queued.add(key)
+                    heapq.heappush(self._heap, (remind_at, row.id, offset, row.appointment_date))
+                    added += 1
+        return added
+
+    def next_due(self) -> Optional[datetime]:
+        """Send time of the earliest queued reminder."""
+        return self._heap[0][0] if self._heap else None
+
+    def send_due(self, db: Session, now: datetime) -> int:
+        """Send every queued reminder that is due. Returns notifications created."""
+        created = 0
+        while self._heap and self._heap[0][0] <= now:
+            remind_at, appointment_id, offset, appointment_date = heapq.heappop(self._heap)
+            created += self._send(db, appointment_id, offset, appointment_date, now)
+        return created
+
+    def _send(self, db: Session, appointment_id: int, offset: int, appointment_date: datetime, now: datetime) -> int:
+        # Re-read the appointment: a reschedule or cancellation since it was
+        # queued makes this entry stale (the new date is queued by refill).
+        appointment = db.execute(_upcoming_query(
+            appointment_date - timedelta(microseconds=1), appointment_date, appointment_id
+        )).first()
+        if appointment is None:
+            return 0
+        if not crud.claim_appointment_reminder(db, appointment_id, offset, appointment_date):
+            db.rollback()
+            return 0
+        rows = _notification_rows(appointment, offset, now)
+        crud.insert_notifications(db, rows)
+        db.commit()
+        return len(rows)
+
+    def run_once(self, db: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+        """One scheduler tick: refill the queue and send what is due."""
+        now = now or datetime.now(timezone.utc)
+        queued = self.refill(db, now)
+        return {"queued": queued, "notifications": self.send_due(db, now)}
+
+
+def run(poll_seconds: int = 60, window_seconds: int = 900) -> None:
+    """Run the scheduler until interrupted."""
+    scheduler = ReminderScheduler(window=timedelta(seconds=window_seconds))
+    next_poll = datetime.now(timezone.utc)
+    while True:
+        now = datetime.now(timezone.utc)
+        db = SessionLocal()
+        try:
+            if now >= next_poll:
+                scheduler.refill(db, now)
+                next_poll = now + timedelta(seconds=poll_seconds)
+            scheduler.send_due(db, now)
+        finally:
+            db.close()
+
+        wake = min(filter(None, [scheduler.next_due(), next_poll]))
+        time.sleep(max((wake - datetime.now(timezone.utc)).total_seconds(), 0.5))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send appointment reminders")
+    parser.add_argument("--poll", type=int, default=60, help="Seconds between queue refills (default: 60)")
+    parser.add_argument("--window", type=int, default=900, help="Seconds of reminders held in memory (default: 900)")
+    parser.add_argument("--once", action="store_true", help="Run a single tick and exit (e.g. from cron)")
+    args = parser.parse_args()
+
+    if args.once:
+        db = SessionLocal()
+        try:
+            result = ReminderScheduler(window=timedelta(seconds=args.window)).run_once(db)
+        finally:
+            db.close()
+        print(f"Sent {result['notifications']} appointment reminder notifications")
+    else:
+        run(poll_seconds=args.poll, window_seconds=args.window)
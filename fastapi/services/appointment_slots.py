@@ -0,0 +1,169 @@
+"""Appointment slot engine.
+
+Each project has one sales team, so its appointments must not overlap. Busy
+time is kept in an ``IntervalIndex``: the project's non-cancelled
+appointments as a sorted list of merged, disjoint intervals. An overlap check
+is then a single bisect, and free slots are found by walking the gaps between
+busy intervals inside the working-hours window of each day.
+
+Working hours come from the ``appointments.working_hours`` system setting.
+A project can override it with ``appointments.working_hours.project_<id>``.
+"""
+
+from bisect import bisect_right
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy.orm import Session
+
+from database import crud
+
+WORKING_HOURS_KEY = "appointments.working_hours"
+DEFAULT_WORKING_HOURS = {
+    "start": "09:00",
+    "end": "18:00",
+    "days": [0, 1, 2, 3, 4, 5],  # Monday..Saturday
+    "slot_minutes": 30,
+    "timezone": "UTC"
+}
+MAX_AVAILABILITY_DAYS = 31
+
+Interval = Tuple[datetime, datetime]
+
+
+def as_utc(value: datetime) -> datetime:
+    """Normalise a datetime to aware UTC (naive values are taken as UTC)."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+class IntervalIndex:
+    """Sorted, merged busy intervals supporting O(log n) overlap checks."""
+
+    def __init__(self, intervals: Iterable[Interval] = ()):
+        self._starts: List[datetime] = []
+        self._ends: List[datetime] = []
+        for start, end in sorted(intervals):
+            if self._ends and start <= self._ends[-1]:
+                self._ends[-1] = max(self._ends[-1], end)
+            else:
+                self._starts.append(start)
+                self._ends.append(end)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        """Whether [start, end) intersects any busy interval."""
+        i = bisect_right(self._starts, start) - 1
+        if i >= 0 and self._ends[i] > start:
+            return True
+        return i + 1 < len(self._starts) and self._starts[i + 1] < end
+
+    def gaps(self, window_start: datetime, window_end: datetime) -> List[Interval]:
+        """Free intervals inside [window_start, window_end)."""
+        free = []
+        cursor = window_start
+        i = max(bisect_right(self._starts, window_start) - 1, 0)
+        while i < len(self._starts) and self._starts[i] < window_end:
+            if self._ends[i] > cursor:
+                if self._starts[i] > cursor:
+                    free.append((cursor, self._starts[i]))
+                cursor = self._ends[i]
+            i += 1
+        if cursor < window_end:
+            free.append((cursor, window_end))
+        return free
+
+
+def appointment_interval(appointment_date: datetime, duration_minutes: Optional[int]) -> Interval:
+    """The UTC interval occupied by an appointment."""
+    start = as_utc(appointment_date)
+    return start, start + timedelta(minutes=duration_minutes or 60)
+
+
+def get_working_hours(db: Session, project_id: int) -> Dict[str, Any]:
+    """Working hours for a project: project override, then global setting, then defaults."""
+    hours = dict(DEFAULT_WORKING_HOURS)
+    for key in (WORKING_HOURS_KEY, f"{WORKING_HOURS_KEY}.project_{project_id}"):
+        setting = crud.get_system_setting_by_key(db, key)
+        if setting is not None and isinstance(setting.setting_value, dict):
+            hours.update(setting.setting_value)
+    return hours
+
+
+def working_windows(hours: Dict[str, Any], date_from: date, date_to: date) -> List[Interval]:
+    """UTC working-hours windows for each working day in [date_from, date_to]."""
+    tz = ZoneInfo(hours["timezone"])
+    opens = time.fromisoformat(hours["start"])
+    closes = time.fromisoformat(hours["end"])
+    windows = []
+    day = date_from
+    while day <= date_to:
+        if day.weekday() in hours["days"]:
+            windows.append((
+                datetime.combine(day, opens, tzinfo=tz).astimezone(timezone.utc),
+                datetime.combine(day, closes, tzinfo=tz).astimezone(timezone.utc)
+            ))
+        day += timedelta(days=1)
+    return windows
+
+
+def within_working_hours(db: Session, project_id: int, appointment_date: datetime, duration_minutes: Optional[int]) -> bool:
+    """Whether an appointment fits inside one of the project's working-hours windows."""
+    hours = get_working_hours(db, project_id)
+    start, end = appointment_interval(appointment_date, duration_minutes)
+    day = start.astimezone(ZoneInfo(hours["timezone"])).date()
+    return any(
+        window_start <= start and end <= window_end
+        for window_start, window_end in working_windows(hours, day, day)
+    )
+
+
+def free_slots(
+    index: IntervalIndex,
+    windows: List[Interval],
+    duration_minutes: int,
+    slot_minutes: int,
+    not_before: Optional[datetime] = None
+) -> List[Interval]:
+    """Slots of `duration_minutes` on a `slot_minutes` grid that avoid busy time."""
+    duration = timedelta(minutes=duration_minutes)
+    step = timedelta(minutes=slot_minutes)
+    slots = []
+    for window_start, window_end in windows:
+        for gap_start, gap_end in index.gaps(window_start, window_end):
+            # Align to the window's grid so slots read 09:00, 09:30, ...
+            offset = (gap_start - window_start) % step
+            start = gap_start if not offset else gap_start + (step - offset)
+            while start + duration <= gap_end:
+                if not_before is None or start >= not_before:
+                    slots.append((start, start + duration))
+                start += step
+    return slots
+
+
+def get_availability(
+    db: Session,
+    project_id: int,
+    date_from: date,
+    date_to: date,
+    duration_minutes: int = 60
+) -> Dict[str, Any]:
+    """Free appointment slots for a project between two dates (inclusive)."""
+    hours = get_working_hours(db, project_id)
+    windows = working_windows(hours, date_from, date_to)
+    if not windows:
+        return {"timezone": hours["timezone"], "slots": []}
+
+    index = crud.get_project_busy_index(db, project_id, windows[0][0], windows[-1][1])
+    slots = free_slots(
+        index, windows, duration_minutes, hours["slot_minutes"],
+        not_before=datetime.now(timezone.utc)
+    )
+    return {
+        "timezone": hours["timezone"],
+        "slots": [{"start": start, "end": end} for start, end in slots]
+    }
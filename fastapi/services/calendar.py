@@ -0,0 +1,161 @@
+"""iCalendar (RFC 5545) feeds of appointments.
+
+Feeds are polled every few minutes by calendar apps, so each feed has a cheap
+validator: ``max(updated_at)`` and ``count(*)`` over the feed's appointments,
+one indexed aggregate. Unchanged feeds answer 304 without reading any rows.
+The body itself is streamed from a server-side cursor like the exports, with
+its own session.
+"""
+
+import hashlib
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from database import models
+from database.database import SessionLocal
+from services.appointment_slots import as_utc
+
+FEED_BATCH_SIZE = 500
+PRODID = "-//Real Estate Platform//Appointments//EN"
+UID_DOMAIN = "appointments.realestate"
+
+STATUS_MAP = {
+    models.AppointmentStatus.SCHEDULED: "TENTATIVE",
+    models.AppointmentStatus.RESCHEDULED: "TENTATIVE",
+    models.AppointmentStatus.CONFIRMED: "CONFIRMED",
+    models.AppointmentStatus.COMPLETED: "CONFIRMED",
+    models.AppointmentStatus.CANCELLED: "CANCELLED",
+}
+
+
+def _feed_filter(customer_id: Optional[int] = None, project_ids: Optional[List[int]] = None) -> list:
+    """WHERE clauses selecting a customer's or a set of projects' appointments."""
+    if customer_id is not None:
+        return [models.Appointment.customer_id == customer_id]
+    return [models.Appointment.project_id.in_(project_ids or [])]
+
+
+def feed_validator(db: Session, customer_id: Optional[int] = None, project_ids: Optional[List[int]] = None) -> Tuple[str, Optional[datetime]]:
+    """ETag and Last-Modified for a feed, from max(updated_at) and the row count."""
+    count, last_modified = db.execute(
+        select(func.count(models.Appointment.id), func.max(models.Appointment.updated_at)).where(
+            *_feed_filter(customer_id, project_ids)
+        )
+    ).one()
+    if last_modified is not None:
+        last_modified = as_utc(last_modified).replace(microsecond=0)
+    scope = f"c{customer_id}" if customer_id is not None else "p" + ",".join(map(str, sorted(project_ids or [])))
+    digest = hashlib.sha1(f"{scope}:{count}:{last_modified}".encode()).hexdigest()[:20]
+    return f'W/"{digest}"', last_modified
+
+
+def feed_query(customer_id: Optional[int] = None, project_ids: Optional[List[int]] = None):
+    """Appointments of a feed with the project details shown in calendar events."""
+    return select(
+        models.Appointment.id,
+        models.Appointment.appointment_type,
+        models.Appointment.appointment_date,
+        models.Appointment.duration_minutes,
+        models.Appointment.status,
+        models.Appointment.meeting_location,
+        models.Appointment.agenda,
+        models.Appointment.created_at,
+        models.Appointment.updated_at,
+        models.Project.project_name,
+        models.Project.location_address,
+        models.Project.location_city
+    ).join(models.Project, models.Appointment.project_id == models.Project.id).where(
+        *_feed_filter(customer_id, project_ids)
+    ).order_by(models.Appointment.appointment_date)
+
+
+def _escape(text: str) -> str:
+    """Escape a TEXT property value."""
+    return (
+        text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def _fold(line: str) -> str:
+    """Fold a content line at 75 octets and terminate it with CRLF."""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts = []
+    while len(encoded) > 75:
+        cut = 75 if not parts else 74
+        # Never split inside a multi-byte UTF-8 character
+        while cut and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode("utf-8"))
+        encoded = encoded[cut:]
+    parts.append(encoded.decode("utf-8"))
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _ics_time(value: datetime) -> str:
+    """Format a datetime as an iCalendar UTC DATE-TIME."""
+    return as_utc(value).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _event(row) -> str:
+    """One VEVENT for an appointment row."""
+    starts_at = as_utc(row.appointment_date)
+    kind = row.appointment_type.value.replace("_", " ").capitalize()
+    location = f"{row.location_address}, {row.location_city}"
+    if row.meeting_location == models.MeetingLocation.ONLINE:
+        location = "Online"
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:appointment-{row.id}@{UID_DOMAIN}",
+        f"DTSTAMP:{_ics_time(row.updated_at or row.created_at)}",
+        f"LAST-MODIFIED:{_ics_time(row.updated_at or row.created_at)}",
+        f"DTSTART:{_ics_time(starts_at)}",
+        f"DTEND:{_ics_time(starts_at + timedelta(minutes=row.duration_minutes or 60))}",
+        f"SUMMARY:{_escape(f'{kind} - {row.project_name}')}",
+        f"LOCATION:{_escape(location)}",
+        f"STATUS:{STATUS_MAP.get(row.status, 'TENTATIVE')}",
+    ]
+    if row.agenda:
+        lines.append(f"DESCRIPTION:{_escape(row.agenda)}")
+    lines.append("END:VEVENT")
+    return "".join(_fold(line) for line in lines)
+
+
+def stream_feed(query, calendar_name: str) -> Iterator[str]:
+    """Yield an ICS document for the query, one cursor batch at a time."""
+    yield "".join(_fold(line) for line in [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape(calendar_name)}",
+        "X-PUBLISHED-TTL:PT15M",
+    ])
+    db = SessionLocal()
+    try:
+        result = db.execute(query.execution_options(yield_per=FEED_BATCH_SIZE))
+        for partition in result.partitions():
+            yield "".join(_event(row) for row in partition)
+    finally:
+        db.close()
+    yield _fold("END:VCALENDAR")
+
+
+def not_modified(
+    etag: str,
+    last_modified: Optional[datetime],
+    if_none_match: Optional[str],
+    if_modified_since: Optional[datetime]
+) -> bool:
+    """Whether conditional request headers show the client's copy is current."""
+    if if_none_match is not None:
+        return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+    if if_modified_since is not None and last_modified is not None:
+        return last_modified <= as_utc(if_modified_since)
+    return False
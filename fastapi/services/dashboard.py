@@ -0,0 +1,42 @@
+"""Refresher for the precomputed builder dashboard summaries.
+
+Recomputes every builder's summary row in batches; run it once (cron) or in a
+loop with ``--interval`` so dashboard requests always find a fresh row. The
+dashboard endpoint never writes: without this job every request computes the
+numbers live.
+
+Usage:
+    python -m services.dashboard [--batch-size 200] [--interval SECONDS]
+"""
+
+import argparse
+import time
+
+from database import crud, models
+from database.database import SessionLocal
+
+
+def refresh_all(batch_size: int = 200) -> int:
+    """Refresh dashboard summaries for every builder, one batch per transaction."""
+    db = SessionLocal()
+    try:
+        builder_ids = [builder_id for (builder_id,) in db.query(models.Builder.id).order_by(models.Builder.id)]
+        refreshed = 0
+        for start in range(0, len(builder_ids), batch_size):
+            refreshed += crud.refresh_dashboard_summaries(db, builder_ids[start:start + batch_size])
+        return refreshed
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh builder dashboard summaries")
+    parser.add_argument("--batch-size", type=int, default=200, help="Builders per transaction (default: 200)")
+    parser.add_argument("--interval", type=int, default=0, help="Repeat every N seconds (default: run once)")
+    args = parser.parse_args()
+    
+    while True:
+        print(f"Refreshed {refresh_all(batch_size=args.batch_size)} builder dashboards")
+        if not args.interval:
+            break
+        time.sleep(args.interval)
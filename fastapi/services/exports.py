@@ -0,0 +1,173 @@
+"""Streaming CSV/JSONL exports for builder data.
+
+Rows are read through a server-side cursor (``yield_per``) and written out one
+partition at a time, so memory stays flat regardless of export size. The
+generators open their own session because the request-scoped one is closed
+before a streaming body is sent.
+"""
+
+import csv
+import enum
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Iterator, Optional
+
+from sqlalchemy import select
+
+from database import models
+from database.database import SessionLocal
+
+EXPORT_BATCH_SIZE = 1000
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+}
+
+
+def _export_value(value: Any) -> Any:
+    """Convert a column value to a plain CSV/JSON friendly value."""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def bookings_export_query(
+    builder_id: int,
+    status: Optional[models.BookingStatus] = None,
+    project_id: Optional[int] = None,
+    payment_status: Optional[str] = None
+):
+    """Bookings for a builder's projects, filtered like ``/api/bookings/builder``."""
+    paid_amount = models.Booking.paid_amount
+    query = select(
+        models.Booking.id,
+        models.Booking.booking_status,
+        models.Project.id.label("project_id"),
+        models.Project.project_name,
+        models.Unit.unit_number,
+        models.Customer.first_name,
+        models.Customer.last_name,
+        models.Customer.phone,
+        models.Booking.total_amount,
+        models.Booking.token_amount,
+        models.Booking.paid_amount,
+        models.Booking.payment_plan,
+        models.Booking.loan_amount,
+        models.Booking.booking_date
+    ).join(models.Unit, models.Booking.unit_id == models.Unit.id).join(
+        models.Project, models.Unit.project_id == models.Project.id
+    ).join(
+        models.Customer, models.Booking.customer_id == models.Customer.id
+    ).where(models.Project.builder_id == builder_id)
+    
+    if status:
+        query = query.where(models.Booking.booking_status == status)
+    if project_id:
+        query = query.where(models.Project.id == project_id)
+    if payment_status == "pending":
+        query = query.where(paid_amount == 0)
+    elif payment_status == "partial":
+        query = query.where(paid_amount > 0, paid_amount < models.Booking.total_amount)
+    elif payment_status == "completed":
+        query = query.where(paid_amount >= models.Booking.total_amount)
+    
+    return query.order_by(models.Booking.id)
+
+
+def payments_export_query(
+    builder_id: int,
+    project_id: Optional[int] = None,
+    payment_status: Optional[models.PaymentStatus] = None
+):
+    """Payments against bookings in a builder's projects."""
+    query = select(
+        models.Payment.id,
+        models.Payment.booking_id,
+        models.Project.id.label("project_id"),
+        models.Unit.unit_number,
+        models.Payment.payment_type,
+        models.Payment.amount,
+        models.Payment.payment_method,
+        models.Payment.payment_status,
+        models.Payment.transaction_id,
+        models.Payment.due_date,
+        models.Payment.paid_date,
+        models.Payment.created_at
+    ).join(models.Booking, models.Payment.booking_id == models.Booking.id).join(
+        models.Unit, models.Booking.unit_id == models.Unit.id
+    ).join(
+        models.Project, models.Unit.project_id == models.Project.id
+    ).where(models.Project.builder_id == builder_id)
+    
+    if project_id:
+        query = query.where(models.Project.id == project_id)
+    if payment_status:
+        query = query.where(models.Payment.payment_status == payment_status)
+    
+    return query.order_by(models.Payment.id)
+
+
+def units_export_query(
+    builder_id: int,
+    project_id: Optional[int] = None,
+    status: Optional[models.UnitStatus] = None
+):
+    """Units in a builder's projects."""
+    query = select(
+        models.Unit.id,
+        models.Unit.project_id,
+        models.Project.project_name,
+        models.Unit.unit_number,
+        models.Unit.unit_type,
+        models.Unit.floor_number,
+        models.Unit.area_sqft,
+        models.Unit.price,
+        models.Unit.status,
+        models.Unit.facing,
+        models.Unit.balconies,
+        models.Unit.bathrooms,
+        models.Unit.parking_spaces
+    ).join(models.Project, models.Unit.project_id == models.Project.id).where(
+        models.Project.builder_id == builder_id
+    )
+    
+    if project_id:
+        query = query.where(models.Unit.project_id == project_id)
+    if status:
+        query = query.where(models.Unit.status == status)
+    
+    return query.order_by(models.Unit.project_id, models.Unit.id)
+
+
+def stream_rows(query, export_format: str) -> Iterator[str]:
+    """Yield the query result as CSV or JSONL text, one cursor batch at a time."""
+    db = SessionLocal()
+    try:
+        result = db.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        columns = list(result.keys())
+        
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            for partition in result.partitions():
+                writer.writerows([_export_value(v) for v in row] for row in partition)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+        else:
+            for partition in result.partitions():
+                yield "".join(
+                    json.dumps({c: _export_value(v) for c, v in zip(columns, row)}) + "\n"
+                    for row in partition
+                )
+    finally:
+        db.close()
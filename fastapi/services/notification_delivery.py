@@ -0,0 +1,279 @@
+"""Email/SMS delivery worker for notifications.
+
+Notifications whose ``send_via`` names an external channel get a
+``next_attempt_at`` when they are created (their ``scheduled_send_time``, or
+now). Each worker tick:
+
+1. leases a batch of due rows with ``SELECT ... FOR UPDATE SKIP LOCKED``, so
+   any number of worker processes claim disjoint batches without waiting on
+   each other, and commits straight away;
+2. sends every (notification, channel) pair concurrently on a thread pool;
+3. marks the fully delivered ones ``is_sent``/``sent_at`` in one UPDATE and
+   reschedules the rest with exponential backoff, remembering which channels
+   already succeeded so a retry does not resend them.
+
+A worker that dies mid-batch leaves its lease to expire, after which the rows
+are claimed again; its late results are then discarded.
+
+Channels are pluggable. The backend and the SMTP / SMS gateway settings come
+from the environment (``NOTIFICATION_DELIVERY_BACKEND``, ``SMTP_HOST``,
+``SMTP_PORT``, ``SMTP_USERNAME``, ``SMTP_PASSWORD``, ``SMTP_USE_TLS``,
+``EMAIL_FROM``, ``SMS_GATEWAY_URL``, ``SMS_API_KEY``). The backend is
+``live`` unless ``fake`` is chosen explicitly, which records messages in
+memory instead of sending them and is meant for tests.
+
+Usage:
+    python -m services.notification_delivery [--backend live] [--batch-size 100] [--concurrency 16] [--poll 5] [--once]
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import smtplib
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from database import crud
+from database.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# "live" sends through SMTP and the SMS gateway; "fake" records in memory (tests)
+DELIVERY_BACKEND = os.environ.get("NOTIFICATION_DELIVERY_BACKEND", "live")
+BATCH_SIZE = 100
+CONCURRENCY = 16
+LEASE = timedelta(minutes=5)
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+SEND_TIMEOUT_SECONDS = 10
+
+SMTP_HOST = os.environ.get("SMTP_HOST", "localhost")
+SMTP_PORT = int(os.environ.get("SMTP_PORT", "587"))
+SMTP_USERNAME = os.environ.get("SMTP_USERNAME")
+SMTP_PASSWORD = os.environ.get("SMTP_PASSWORD")
+SMTP_USE_TLS = os.environ.get("SMTP_USE_TLS", "true").lower() not in ("0", "false", "no")
+EMAIL_FROM = os.environ.get("EMAIL_FROM", "notifications@buildcraft.example")
+SMS_GATEWAY_URL = os.environ.get("SMS_GATEWAY_URL", "http://localhost:9000/sms")
+SMS_API_KEY = os.environ.get("SMS_API_KEY")
+
+
+class Undeliverable(Exception):
+    """A channel can never deliver this notification (e.g. no phone number)."""
+
+
+# ============= CHANNELS =============
+
+class Channel:
+    """Sends one notification to its user; raises on failure."""
+
+    name = ""
+
+    def send(self, notification) -> None:
+        raise NotImplementedError
+
+
+class EmailChannel(Channel):
+    name = "email"
+
+    def send(self, notification) -> None:
+        if not notification.email:
+            raise Undeliverable("user has no email address")
+        message = EmailMessage()
+        message["From"] = EMAIL_FROM
+        message["To"] = notification.email
+        message["Subject"] = notification.title
+        body = notification.message
+        if notification.action_url:
+            body += f"\n\n{notification.action_url}"
+        message.set_content(body)
+        with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SEND_TIMEOUT_SECONDS) as smtp:
+            if SMTP_USE_TLS:
+                smtp.starttls()
+            if SMTP_USERNAME:
+                smtp.login(SMTP_USERNAME, SMTP_PASSWORD)
+            smtp.send_message(message)
+
+
+class SmsChannel(Channel):
+    name = "sms"
+
+    def send(self, notification) -> None:
+        if not notification.phone:
+            raise Undeliverable("user has no phone number")
+        request = urllib.request.Request(
+            SMS_GATEWAY_URL,
+            data=json.dumps({"to": notification.phone, "body": f"{notification.title}: {notification.message}"}).encode(),
+            headers={"Content-Type": "application/json", "Authorization": f"Bearer {SMS_API_KEY or ''}"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=SEND_TIMEOUT_SECONDS) as response:
+            if response.status >= 300:
+                raise RuntimeError(f"SMS gateway returned {response.status}")
+
+
+class FakeChannel(Channel):
+    """Records sent notifications in ``outbox``; fails a `failure_rate` share of sends."""
+
+    def __init__(self, name: str, failure_rate: float = 0.0):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.outbox: List[int] = []
+        self._lock = threading.Lock()
+
+    def send(self, notification) -> None:
+        if random.random() < self.failure_rate:
+            raise RuntimeError(f"fake {self.name} failure")
+        with self._lock:
+            self.outbox.append(notification.id)
+
+
+def create_channels(name: str = DELIVERY_BACKEND) -> Dict[str, Channel]:
+    """Build the channel adapters for the configured backend."""
+    if name == "fake":
+        return {channel: FakeChannel(channel) for channel in crud.DELIVERY_CHANNELS}
+    if name == "live":
+        return {"email": EmailChannel(), "sms": SmsChannel()}
+    raise ValueError(f"Unknown delivery backend: {name}")
+
+
+# ============= WORKER =============
+
+def _remaining_channels(send_via: Optional[List[str]], delivered: Optional[List[str]]) -> List[str]:
+    """External channels of `send_via` not yet delivered, in order."""
+    return [
+        channel for channel in dict.fromkeys(send_via or [])
+        if channel in crud.DELIVERY_CHANNELS and channel not in (delivered or [])
+    ]
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff with jitter after `attempts` failed attempts."""
+    seconds = min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+    return timedelta(seconds=seconds * random.uniform(0.8, 1.2))
+
+
+class DeliveryWorker:
+    """Claims due notifications and delivers them over the configured channels."""
+
+    def __init__(
+        self,
+        channels: Optional[Dict[str, Channel]] = None,
+        batch_size: int = BATCH_SIZE,
+        concurrency: int = CONCURRENCY,
+        backend: str = DELIVERY_BACKEND
+    ):
+        self.channels = channels if channels is not None else create_channels(backend)
+        self.batch_size = batch_size
+        self._pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="notification-delivery")
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+
+    def _send(self, channel: str, notification) -> Tuple[bool, Optional[str]]:
+        """(delivered or permanently undeliverable, error message)."""
+        adapter = self.channels.get(channel)
+        if adapter is None:
+            return True, f"{channel}: no channel configured"
+        try:
+            adapter.send(notification)
+            return True, None
+        except Undeliverable as exc:
+            return True, f"{channel}: {exc}"
+        except Exception as exc:
+            logger.warning("Delivering notification %s via %s failed: %s", notification.id, channel, exc)
+            return False, f"{channel}: {exc}"
+
+    def run_once(self, db: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Claim and deliver one batch."""
+        now = now or datetime.now(timezone.utc)
+        lease_until = now + LEASE
+        batch = crud.claim_due_notifications(db, now, self.batch_size, lease_until)
+        if not batch:
+            return {"claimed": 0, "sent": 0, "retrying": 0, "failed": 0}
+
+        futures = {
+            (notification.id, channel): self._pool.submit(self._send, channel, notification)
+            for notification in batch
+            for channel in _remaining_channels(notification.send_via, notification.delivered_via)
+        }
+        wait(futures.values())
+        finished_at = datetime.now(timezone.utc)
+        sent_ids: List[int] = []
+        pending: List[Dict] = []
+        retrying = failed = 0
+        for notification in batch:
+            delivered = list(notification.delivered_via or [])
+            errors = []
+            for channel in _remaining_channels(notification.send_via, notification.delivered_via):
+                ok, error = futures[(notification.id, channel)].result()
+                if ok:
+                    delivered.append(channel)
+                if error:
+                    errors.append(error)
+            if not _remaining_channels(notification.send_via, delivered):
+                sent_ids.append(notification.id)
+                continue
+            if notification.delivery_attempts >= MAX_ATTEMPTS:
+                next_attempt_at = None
+                failed += 1
+            else:
+                next_attempt_at = finished_at + retry_delay(notification.delivery_attempts)
+                retrying += 1
+            pending.append({
+                "id": notification.id,
+                "delivered_via": delivered,
+                "next_attempt_at": next_attempt_at,
+                "delivery_error": "; ".join(errors)[:1000] or None,
+            })
+
+        sent = crud.record_notification_deliveries(db, sent_ids, pending, lease_until, finished_at)
+        return {"claimed": len(batch), "sent": sent, "retrying": retrying, "failed": failed}
+
+
+def run(worker: DeliveryWorker, poll_seconds: int = 5) -> None:
+    """Deliver until interrupted; drains full batches back to back."""
+    while True:
+        db = SessionLocal()
+        try:
+            result = worker.run_once(db)
+        finally:
+            db.close()
+        if result["claimed"] < worker.batch_size:
+            time.sleep(poll_seconds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deliver notifications by email and SMS")
+    parser.add_argument("--backend", choices=["live", "fake"], default=DELIVERY_BACKEND, help=f"Channel backend (default: {DELIVERY_BACKEND})")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help=f"Notifications claimed per batch (default: {BATCH_SIZE})")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help=f"Concurrent sends (default: {CONCURRENCY})")
+    parser.add_argument("--poll", type=int, default=5, help="Seconds to wait when nothing is due (default: 5)")
+    parser.add_argument("--once", action="store_true", help="Deliver a single batch and exit (e.g. from cron)")
+    args = parser.parse_args()
+
+    worker = DeliveryWorker(batch_size=args.batch_size, concurrency=args.concurrency, backend=args.backend)
+    try:
+        if args.once:
+            db = SessionLocal()
+            try:
+                result = worker.run_once(db)
+            finally:
+                db.close()
+            print(
+                f"Claimed {result['claimed']} notifications: {result['sent']} sent, "
+                f"{result['retrying']} retrying, {result['failed']} failed"
+            )
+        else:
+            run(worker, poll_seconds=args.poll)
+    finally:
+        worker.close()
@@ -0,0 +1,137 @@
+"""Notification digests.
+
+Busy projects produce bursts of same-type notifications about the same
+thing (a project's progress updates, a booking's status changes). Before
+notifications are inserted, crud passes them through ``coalesce`` which
+merges each one into an open digest instead of adding a row:
+
+- key: (user, notification type, related entity);
+- a digest is open while it is unread, not yet sent by email/SMS and was
+  created within the type's window;
+- merging bumps ``coalesced_count``, keeps the latest title/message and does
+  not change the user's unread count (the digest is already unread);
+- several rows with the same key in one insert collapse the same way.
+
+Windows default to ``DIGEST_WINDOWS`` and can be overridden with the
+``notifications.digest_windows`` system setting, e.g.
+``{"progress_update": 720, "booking_update": 0}`` (minutes; 0 turns
+coalescing off for that type). Types without a window are never coalesced.
+Entries with an unknown type or a non-numeric window are logged and ignored,
+so a bad setting cannot break notification inserts.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from database import crud, models
+
+logger = logging.getLogger(__name__)
+
+DIGEST_SETTING_KEY = "notifications.digest_windows"
+
+# Payment and appointment reminders are time-critical and never coalesced
+DIGEST_WINDOWS: Dict[models.NotificationType, timedelta] = {
+    models.NotificationType.PROGRESS_UPDATE: timedelta(hours=6),
+    models.NotificationType.BOOKING_UPDATE: timedelta(minutes=30),
+    models.NotificationType.CHANGE_REQUEST_UPDATE: timedelta(hours=1),
+    models.NotificationType.MESSAGE_RECEIVED: timedelta(minutes=10),
+}
+
+DigestKey = Tuple[int, models.NotificationType, str, int]
+
+
+def get_digest_windows(db: Session) -> Dict[models.NotificationType, timedelta]:
+    """Coalescing window per notification type: defaults, then the system setting."""
+    windows = dict(DIGEST_WINDOWS)
+    setting = crud.get_system_setting_by_key(db, DIGEST_SETTING_KEY)
+    if setting is not None and isinstance(setting.setting_value, dict):
+        for type_value, minutes in setting.setting_value.items():
+            try:
+                windows[models.NotificationType(type_value)] = timedelta(minutes=minutes)
+            except (ValueError, TypeError):
+                logger.warning("Ignoring invalid %s entry %r: %r", DIGEST_SETTING_KEY, type_value, minutes)
+    return {kind: window for kind, window in windows.items() if window > timedelta(0)}
+
+
+def _key(row: Dict[str, Any]) -> Optional[DigestKey]:
+    if row.get("related_entity_type") is None or row.get("related_entity_id") is None:
+        return None
+    return (row["user_id"], models.NotificationType(row["notification_type"]), row["related_entity_type"], row["related_entity_id"])
+
+
+def _digest_title(title: str, count: int) -> str:
+    return title if count == 1 else f"{title} (+{count - 1} more)"[:255]
+
+
+def coalesce(
+    db: Session,
+    rows: List[Dict[str, Any]],
+    now: Optional[datetime] = None
+) -> Tuple[List[Dict[str, Any]], List[Tuple[int, int]]]:
+    """Merge notification rows into open digests (no commit).
+
+    Returns the rows that still have to be inserted and the (id, user_id) of
+    existing digests that were updated.
+    """
+    windows = get_digest_windows(db)
+    # Latest row and count per key, in arrival order
+    groups: Dict[DigestKey, Tuple[Dict[str, Any], int]] = {}
+    passthrough: List[Dict[str, Any]] = []
+    for row in rows:
+        key = _key(row)
+        if key is None or key[1] not in windows:
+            passthrough.append(row)
+            continue
+        count = groups[key][1] + 1 if key in groups else 1
+        groups[key] = (row, count)
+    if not groups:
+        return rows, []
+
+    now = now or datetime.now(timezone.utc)
+    open_digests: Dict[DigestKey, Tuple[int, int]] = {}
+    for kind in {key[1] for key in groups}:
+        user_ids = sorted({key[0] for key in groups if key[1] == kind})
+        candidates = db.execute(
+            select(
+                models.Notification.id,
+                models.Notification.user_id,
+                models.Notification.related_entity_type,
+                models.Notification.related_entity_id,
+                models.Notification.coalesced_count
+            ).where(
+                models.Notification.user_id.in_(user_ids),
+                models.Notification.notification_type == kind,
+                models.Notification.is_read == False,
+                models.Notification.is_sent == False,
+                models.Notification.created_at >= now - windows[kind]
+            ).order_by(models.Notification.id)
+        ).all()
+        for candidate in candidates:
+            # Newest open digest wins
+            key = (candidate.user_id, kind, candidate.related_entity_type, candidate.related_entity_id)
+            open_digests[key] = (candidate.id, candidate.coalesced_count)
+
+    to_insert = [{**row, "coalesced_count": 1} for row in passthrough]
+    merged = []
+    merged_ids = []
+    for key, (row, count) in groups.items():
+        if key in open_digests:
+            digest_id, coalesced_count = open_digests[key]
+            total = coalesced_count + count
+            merged.append({
+                "id": digest_id,
+                "title": _digest_title(row["title"], total),
+                "message": row["message"],
+                "coalesced_count": total,
+                "coalesced_at": now,
+            })
+            merged_ids.append((digest_id, key[0]))
+        else:
+            to_insert.append({**row, "title": _digest_title(row["title"], count), "coalesced_count": count})
+    if merged:
+        db.execute(update(models.Notification), merged)
+    return to_insert, merged_ids
@@ -0,0 +1,147 @@
+"""Notification fan-out for project-wide announcements.
+
+Publishing a construction update or changing a milestone's status queues a
+``notification_fanouts`` row in the same transaction (see crud). This worker
+delivers it to every customer with an active booking in the project:
+
+- recipients are resolved with one join query, in user ID order;
+- notifications are written in chunked multi-row INSERTs (via
+  ``crud.insert_notifications``, which also bumps unread counters and queues
+  real-time pushes), each chunk committed with the fan-out's ``last_user_id``
+  cursor, so a crashed run resumes without notifying anyone twice;
+- a claim on the row keeps two workers off the same fan-out; claims older
+  than ``STALE_AFTER`` are taken over.
+
+After responding, the API delivers the one fan-out its request queued as a
+background task; this module's CLI is the worker that sweeps anything left
+pending, failed or stuck and reports throughput per fan-out.
+
+Usage:
+    python -m services.notification_fanout [--chunk-size 1000] [--loop --poll 5]
+"""
+
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from database import crud, models
+from database.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000
+MAX_ATTEMPTS = 3
+STALE_AFTER = timedelta(minutes=10)
+
+
+def _notification_rows(fanout: models.NotificationFanout, user_ids: List[int]) -> List[Dict]:
+    """One notification per recipient, copied from the fan-out."""
+    return [
+        {
+            "user_id": user_id,
+            "notification_type": fanout.notification_type,
+            "title": fanout.title,
+            "message": fanout.message,
+            # Keyed on the project so a burst of announcements coalesces into one digest
+            "related_entity_type": "project",
+            "related_entity_id": fanout.project_id,
+            "priority": fanout.priority,
+            "action_url": fanout.action_url,
+        }
+        for user_id in user_ids
+    ]
+
+
+def deliver_fanout(db: Session, fanout_id: int, chunk_size: int = CHUNK_SIZE, now: Optional[datetime] = None) -> Optional[Dict]:
+    """Claim and deliver one fan-out. Returns throughput stats, or None if not claimed."""
+    now = now or datetime.now(timezone.utc)
+    if not crud.claim_notification_fanout(db, fanout_id, now, now - STALE_AFTER):
+        return None
+    fanout = db.get(models.NotificationFanout, fanout_id)
+    started = time.perf_counter()
+    created = 0
+    try:
+        user_ids = crud.get_fanout_recipient_ids(db, fanout.project_id, after_user_id=fanout.last_user_id)
+        if fanout.last_user_id == 0:
+            fanout.recipients = len(user_ids)
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            inserted = crud.insert_notifications(db, _notification_rows(fanout, chunk))
+            fanout.last_user_id = chunk[-1]
+            fanout.notifications_created += inserted
+            fanout.claimed_at = datetime.now(timezone.utc)
+            db.commit()
+            created += inserted
+        fanout.status = models.FanoutStatus.COMPLETED
+        fanout.finished_at = datetime.now(timezone.utc)
+        db.commit()
+    except Exception as exc:
+        db.rollback()
+        fanout = db.get(models.NotificationFanout, fanout_id)
+        fanout.status = models.FanoutStatus.FAILED
+        fanout.error = str(exc)[:1000]
+        db.commit()
+        logger.exception("Notification fan-out %s failed after %s notifications", fanout_id, created)
+        return None
+
+    seconds = time.perf_counter() - started
+    return {
+        "fanout_id": fanout_id,
+        "recipients": fanout.recipients,
+        "notifications": created,
+        "seconds": round(seconds, 3),
+        "per_second": round(created / seconds, 1) if seconds > 0 else None,
+    }
+
+
+def deliver_in_background(fanout_id: int, chunk_size: int = CHUNK_SIZE) -> None:
+    """Background-task entry point: deliver one fan-out with a session of its own."""
+    db = SessionLocal()
+    try:
+        deliver_fanout(db, fanout_id, chunk_size=chunk_size)
+    finally:
+        db.close()
+
+
+def run_pending(chunk_size: int = CHUNK_SIZE) -> List[Dict]:
+    """Deliver every runnable fan-out. Returns stats for those delivered."""
+    db = SessionLocal()
+    try:
+        now = datetime.now(timezone.utc)
+        results = []
+        for fanout_id in crud.get_runnable_fanout_ids(db, now - STALE_AFTER, MAX_ATTEMPTS):
+            result = deliver_fanout(db, fanout_id, chunk_size=chunk_size)
+            if result is not None:
+                results.append(result)
+        return results
+    finally:
+        db.close()
+
+
+def _report(results: List[Dict]) -> None:
+    for result in results:
+        print(
+            f"Fan-out {result['fanout_id']}: {result['notifications']} notifications "
+            f"to {result['recipients']} recipients in {result['seconds']}s ({result['per_second']}/s)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deliver queued project-wide notifications")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help=f"Notifications per INSERT/commit (default: {CHUNK_SIZE})")
+    parser.add_argument("--loop", action="store_true", help="Keep polling for new fan-outs")
+    parser.add_argument("--poll", type=int, default=5, help="Seconds between polls with --loop (default: 5)")
+    args = parser.parse_args()
+
+    while True:
+        results = run_pending(chunk_size=args.chunk_size)
+        _report(results)
+        if not args.loop:
+            if not results:
+                print("No pending fan-outs")
+            break
+        time.sleep(args.poll)
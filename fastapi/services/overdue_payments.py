@@ -0,0 +1,126 @@
+"""Overdue payment scanner.
+
+Finds pending payments whose due date has passed and notifies the customer
+and the builder. Each payment is marked with ``overdue_notified_at`` in the
+same transaction as its notifications, so a crash never double-notifies and
+payments added later with an earlier due date (back-dated or regenerated
+instalments) are still picked up. Batches are read from the partial index of
+pending, not yet notified payments.
+
+Usage (e.g. from cron, once a day):
+    python -m services.overdue_payments [--batch-size 500]
+"""
+
+import argparse
+from datetime import date, datetime
+from typing import Dict, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session, aliased
+
+from database import crud, models
+from database.database import SessionLocal
+
+BATCH_SIZE = 500
+
+
+def _overdue_batch_query(today: date, batch_size: int):
+    """Next batch of overdue payments not yet notified, in (due_date, id) order."""
+    builder_user = aliased(models.Builder)
+    query = select(
+        models.Payment.id,
+        models.Payment.booking_id,
+        models.Payment.amount,
+        models.Payment.due_date,
+        models.Customer.user_id.label("customer_user_id"),
+        builder_user.user_id.label("builder_user_id")
+    ).join(models.Booking, models.Payment.booking_id == models.Booking.id).join(
+        models.Customer, models.Booking.customer_id == models.Customer.id
+    ).join(
+        models.Unit, models.Booking.unit_id == models.Unit.id
+    ).join(
+        models.Project, models.Unit.project_id == models.Project.id
+    ).join(
+        builder_user, models.Project.builder_id == builder_user.id
+    ).where(
+        models.Payment.payment_status == models.PaymentStatus.PENDING,
+        models.Payment.overdue_notified_at.is_(None),
+        models.Payment.due_date < today
+    )
+    # Claim the batch so overlapping runs cannot notify the same payments
+    return query.order_by(models.Payment.due_date, models.Payment.id).limit(batch_size).with_for_update(
+        of=models.Payment, skip_locked=True
+    )
+
+
+def _notification_rows(payment) -> list:
+    """Customer reminder and builder alert for one overdue payment."""
+    booking_number = f"BK-{payment.booking_id:03d}"
+    common = {
+        "notification_type": models.NotificationType.PAYMENT_DUE,
+        "related_entity_type": "payment",
+        "related_entity_id": payment.id,
+        "priority": models.Priority.HIGH,
+    }
+    return [
+        {
+            **common,
+            "user_id": payment.customer_user_id,
+            "title": "Payment overdue",
+            "message": f"Your payment of {payment.amount} for booking {booking_number} was due on {payment.due_date}.",
+            "action_url": "/customer/bookings",
+        },
+        {
+            **common,
+            "user_id": payment.builder_user_id,
+            "title": "Customer payment overdue",
+            "message": f"Payment of {payment.amount} for booking {booking_number} was due on {payment.due_date}.",
+            "action_url": "/builder/bookings",
+        },
+    ]
+
+
+def scan_overdue_payments(
+    db: Session,
+    today: Optional[date] = None,
+    batch_size: int = BATCH_SIZE
+) -> Dict[str, int]:
+    """Notify about overdue payments that have not been notified yet."""
+    today = today or date.today()
+    
+    payments_seen = 0
+    notifications_created = 0
+    while True:
+        batch = db.execute(_overdue_batch_query(today, batch_size)).all()
+        if not batch:
+            break
+        
+        rows = [row for payment in batch for row in _notification_rows(payment)]
+        crud.insert_notifications(db, rows)
+        db.execute(
+            update(models.Payment)
+            .where(models.Payment.id.in_([payment.id for payment in batch]))
+            .values(overdue_notified_at=datetime.utcnow()),
+            execution_options={"synchronize_session": False}
+        )
+        db.commit()
+        
+        payments_seen += len(batch)
+        notifications_created += len(rows)
+        if len(batch) < batch_size:
+            break
+    
+    return {"payments": payments_seen, "notifications": notifications_created}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Notify customers and builders about overdue payments")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help=f"Payments per batch (default: {BATCH_SIZE})")
+    args = parser.parse_args()
+    
+    db = SessionLocal()
+    try:
+        result = scan_overdue_payments(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"Notified {result['notifications']} users about {result['payments']} overdue payments")
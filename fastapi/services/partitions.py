@@ -0,0 +1,258 @@
+"""Monthly range partitions for messages and notifications (Postgres).
+
+Both tables are append-heavy and read by user over recent ``created_at``
+ranges. On Postgres they are partitioned by ``RANGE (created_at)``, one
+partition per calendar month (``notifications_p2026_10``) plus a DEFAULT
+partition that catches rows outside the created months:
+
+- ``convert`` is the one-time migration of an existing plain table: the
+  rows are copied into a new partitioned table with the same columns,
+  sequence, indexes and foreign keys. The primary key becomes
+  ``(id, created_at)`` as Postgres requires; the ORM keeps using ``id``.
+  The self-reference ``messages.parent_message_id`` loses its FOREIGN KEY
+  (a partitioned table cannot be referenced by ``id`` alone). Migration
+  0010 runs it, so ``migrate.py upgrade`` leaves both tables partitioned;
+  ``--convert`` is only needed when that migration was applied as offline
+  SQL (``upgrade --sql``), where it is skipped.
+- ``maintain`` (run daily) creates the partitions for the next
+  ``MONTHS_AHEAD`` months and applies the retention policy: partitions older
+  than ``RETENTION_MONTHS`` are detached into the ``archive`` schema or
+  dropped, a catalog operation instead of a row-by-row DELETE. Unread
+  counters are repaired afterwards since unread rows may have gone.
+  Rows that landed in the DEFAULT partition for a month that gets its own
+  partition later are moved into it.
+
+Queries that bound ``created_at`` (see crud) only scan the partitions in
+range. SQLite and other databases keep plain tables; everything here is a
+no-op for them.
+
+Usage:
+    python -m services.partitions [--convert] [--months-ahead 3] [--dry-run]
+"""
+
+import argparse
+import logging
+import re
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from database.database import engine as default_engine
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = ("messages", "notifications")
+MONTHS_AHEAD = 3
+RETENTION_MONTHS: Dict[str, int] = {"messages": 36, "notifications": 12}
+RETENTION_ACTION = "archive"  # or "drop"
+ARCHIVE_SCHEMA = "archive"
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+class PartitionManager:
+    """Creates, lists and retires the monthly partitions of one connection's database.
+
+    Statements are logged in ``executed``; with ``dry_run`` they are only
+    logged.
+    """
+
+    def __init__(self, connection: Connection, dry_run: bool = False):
+        self.connection = connection
+        self.dry_run = dry_run
+        self.executed: List[str] = []
+
+    def _run(self, sql: str) -> None:
+        self.executed.append(sql)
+        if not self.dry_run:
+            self.connection.execute(text(sql))
+
+    def is_partitioned(self, table: str) -> bool:
+        return self.connection.execute(
+            text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"),
+            {"table": table}
+        ).scalar()
+
+    def list_partitions(self, table: str) -> List[Tuple[str, date]]:
+        """Monthly partitions of a table as (name, month), oldest first."""
+        names = self.connection.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = to_regclass(:table)"
+            ),
+            {"table": table}
+        ).scalars().all()
+        pattern = re.compile(rf"^{table}_p(\d{{4}})_(\d{{2}})$")
+        months = []
+        for name in names:
+            match = pattern.match(name)
+            if match:
+                months.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+        return sorted(months, key=lambda item: item[1])
+
+    def _default_has_rows(self, table: str, month: date) -> bool:
+        """Whether the DEFAULT partition holds rows of `month` (which has no partition yet)."""
+        if self.connection.execute(
+            text("SELECT to_regclass(:partition) IS NOT NULL OR to_regclass(:default) IS NULL"),
+            {"partition": partition_name(table, month), "default": f"{table}_default"}
+        ).scalar():
+            return False
+        return self.connection.execute(
+            text(
+                f"SELECT EXISTS (SELECT 1 FROM {table}_default "
+                f"WHERE created_at >= :start AND created_at < :end)"
+            ),
+            {"start": month, "end": _add_months(month, 1)}
+        ).scalar()
+
+    def create_partition(self, table: str, month: date) -> None:
+        name = partition_name(table, month)
+        start, end = f"'{month} 00:00:00+00'", f"'{_add_months(month, 1)} 00:00:00+00'"
+        if not self._default_has_rows(table, month):
+            self._run(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} FOR VALUES FROM ({start}) TO ({end})")
+            return
+        # Postgres refuses a new partition over rows the DEFAULT partition holds:
+        # move them into a plain table, then attach it (indexes and foreign keys
+        # are created on attach)
+        self._run(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)")
+        self._run(
+            f"WITH moved AS (DELETE FROM {table}_default WHERE created_at >= {start} AND created_at < {end} "
+            f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+        )
+        self._run(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ({start}) TO ({end})")
+
+    def ensure_partitions(self, table: str, first: date, last: date) -> None:
+        """Create the monthly partitions covering [first, last] and the DEFAULT partition."""
+        month = _month_start(first)
+        while month <= last:
+            self.create_partition(table, month)
+            month = _add_months(month, 1)
+        self._run(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT")
+
+    def apply_retention(self, table: str, keep_months: int, today: date, action: str = RETENTION_ACTION) -> List[str]:
+        """Archive or drop partitions entirely older than `keep_months`. Returns their names."""
+        cutoff = _add_months(_month_start(today), -keep_months)
+        retired = []
+        for name, month in self.list_partitions(table):
+            if _add_months(month, 1) > cutoff:
+                break
+            if action == "drop":
+                self._run(f"DROP TABLE {name}")
+            else:
+                self._run(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}")
+                self._run(f"ALTER TABLE {table} DETACH PARTITION {name}")
+                self._run(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}")
+            retired.append(name)
+        return retired
+
+    def convert(self, table: str, today: date, months_ahead: int = MONTHS_AHEAD) -> None:
+        """One-time migration of a plain table into a partitioned one, in one transaction.
+
+        Indexes and foreign keys are copied from the live table rather than
+        the models, so this gives the same result whichever revision the
+        schema is at (it also runs as migration 0010).
+        """
+        legacy = f"{table}_unpartitioned"
+
+        self._run(f"UPDATE {table} SET created_at = now() WHERE created_at IS NULL")
+        oldest = self.connection.execute(text(f"SELECT min(created_at) FROM {table}")).scalar()
+        sequence = self.connection.execute(
+            text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": table}
+        ).scalar()
+        # Definitions name the table, which the partitioned table takes over
+        indexes = self.connection.execute(
+            text(
+                "SELECT pg_get_indexdef(indexrelid) FROM pg_index "
+                "WHERE indrelid = to_regclass(:table) AND NOT indisprimary ORDER BY indexrelid"
+            ),
+            {"table": table}
+        ).scalars().all()
+        foreign_keys = self.connection.execute(
+            text(
+                "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conrelid = to_regclass(:table) AND contype = 'f' AND confrelid <> conrelid ORDER BY conname"
+            ),
+            {"table": table}
+        ).all()
+
+        self._run(f"ALTER TABLE {table} RENAME TO {legacy}")
+        self._run(
+            f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING GENERATED) "
+            f"PARTITION BY RANGE (created_at)"
+        )
+        first = _month_start(oldest.date() if oldest is not None else today)
+        self.ensure_partitions(table, first, _add_months(_month_start(today), months_ahead))
+        self._run(f"INSERT INTO {table} SELECT * FROM {legacy}")
+        if sequence:
+            self._run(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id")
+        self._run(f"DROP TABLE {legacy}")
+
+        self._run(f"ALTER TABLE {table} ADD PRIMARY KEY (id, created_at)")
+        for definition in indexes:
+            self._run(definition)
+        for name, definition in foreign_keys:
+            self._run(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
+
+
+def _repair_unread_counters() -> None:
+    from services.rollups import recompute_all_unread_counters
+    recompute_all_unread_counters()
+
+
+def maintain(
+    engine: Engine = default_engine,
+    today: Optional[date] = None,
+    months_ahead: int = MONTHS_AHEAD,
+    convert: bool = False,
+    dry_run: bool = False
+) -> Dict[str, Dict[str, List[str]]]:
+    """Convert (if asked), extend and retire partitions of every partitioned table."""
+    if engine.dialect.name != "postgresql":
+        return {}
+    today = today or date.today()
+    report = {}
+    for table in PARTITIONED_TABLES:
+        with engine.begin() as connection:
+            manager = PartitionManager(connection, dry_run=dry_run)
+            if not manager.is_partitioned(table):
+                if not convert:
+                    logger.warning("%s is not partitioned; run with --convert once", table)
+                    continue
+                manager.convert(table, today, months_ahead)
+            else:
+                manager.ensure_partitions(table, _month_start(today), _add_months(_month_start(today), months_ahead))
+            retired = manager.apply_retention(table, RETENTION_MONTHS[table], today)
+            report[table] = {"retired": retired, "statements": manager.executed}
+    if not dry_run and any(result["retired"] for result in report.values()):
+        _repair_unread_counters()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain monthly partitions of messages and notifications")
+    parser.add_argument("--convert", action="store_true", help="Convert plain tables to partitioned tables (one-time)")
+    parser.add_argument("--months-ahead", type=int, default=MONTHS_AHEAD, help=f"Future months to create (default: {MONTHS_AHEAD})")
+    parser.add_argument("--dry-run", action="store_true", help="Print the statements without running them")
+    args = parser.parse_args()
+
+    if default_engine.dialect.name != "postgresql":
+        print("Partitioning needs PostgreSQL; nothing to do")
+    else:
+        for table, result in maintain(months_ahead=args.months_ahead, convert=args.convert, dry_run=args.dry_run).items():
+            if args.dry_run:
+                print("\n".join(f"{statement};" for statement in result["statements"]))
+            retired = ", ".join(result["retired"]) or "none"
+            print(f"{table}: partitions ready through {args.months_ahead} months ahead; retired: {retired}")
@@ -0,0 +1,272 @@
+"""Payment schedule engine.
+
+Builds the full instalment plan for a booking from its payment plan and the
+project's construction milestones (``ProjectProgress`` phases), then replaces
+the booking's pending scheduled payments (``Payment.is_scheduled``) with one
+bulk insert; payments recorded by hand are never touched. No instalment falls
+due before the day the schedule is generated. Amounts are
+computed in closed form over the whole schedule (equal splits with the
+rounding residue on the last row, EMI principal per period from the annuity
+formula, paid amounts applied as a cumulative-sum waterfall) using Decimal
+arithmetic so rows always sum exactly to the booking total.
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal, ROUND_DOWN
+from itertools import accumulate
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import select, insert
+from sqlalchemy.orm import Session
+
+from database import models, schemas
+
+CENT = Decimal("0.01")
+FULL_PAYMENT_DUE_DAYS = 30
+
+
+@dataclass
+class BookingTerms:
+    """The booking fields the schedule depends on."""
+    booking_id: int
+    total_amount: Decimal
+    token_amount: Decimal
+    payment_plan: models.PaymentPlan
+    loan_amount: Decimal
+    start_date: date
+    paid_amount: Decimal = Decimal("0")
+    # Instalments that would fall due earlier are moved to this date
+    earliest_due_date: Optional[date] = None
+
+
+def split_amount(total: Decimal, count: int) -> List[Decimal]:
+    """Split an amount into equal parts, putting the rounding residue on the last."""
+    if count <= 0:
+        return []
+    base = (total / count).quantize(CENT, rounding=ROUND_DOWN)
+    parts = [base] * count
+    parts[-1] = total - base * (count - 1)
+    return parts
+
+
+def emi_breakdown(
+    principal: Decimal,
+    annual_rate: Decimal,
+    months: int
+) -> Tuple[Decimal, List[Decimal], List[Decimal]]:
+    """Return (emi, principal parts, interest parts) for a fully amortising loan.
+    
+    The principal repaid in period k is emi / (1 + r)^(n - k + 1), so every
+    period is computed directly rather than by iterating the balance.
+    """
+    rate = annual_rate / 1200
+    if rate == 0:
+        parts = split_amount(principal, months)
+        return parts[0], parts, [Decimal("0.00")] * months
+    
+    growth = (1 + rate) ** months
+    emi = principal * rate * growth / (growth - 1)
+    principal_parts = [
+        (emi / (1 + rate) ** (months - k + 1)).quantize(CENT) for k in range(1, months + 1)
+    ]
+    principal_parts[-1] += principal - sum(principal_parts)
+    emi = emi.quantize(CENT)
+    return emi, principal_parts, [emi - p for p in principal_parts]
+
+
+def milestone_due_dates(
+    milestones: Sequence[Tuple[str, Optional[date]]],
+    start_date: date,
+    installment_count: int
+) -> List[Tuple[str, date]]:
+    """Due dates for construction-linked instalments, falling back to monthly ones.
+    
+    Milestones already past their due date fall due on the start date.
+    """
+    if not milestones:
+        return [
+            (f"Instalment {k}", start_date + relativedelta(months=k))
+            for k in range(1, installment_count + 1)
+        ]
+    # Milestones come in due-date order; undated ones follow a month apart
+    due_dates = []
+    previous = start_date
+    for name, due in milestones:
+        previous = max(due or previous + relativedelta(months=1), start_date)
+        due_dates.append((f"Milestone: {name}", previous))
+    return due_dates
+
+
+def build_schedule(
+    terms: BookingTerms,
+    milestones: Sequence[Tuple[str, Optional[date]]],
+    options: schemas.PaymentScheduleOptions
+) -> List[Dict[str, Any]]:
+    """Build the outstanding schedule for a booking as Payment row dicts."""
+    rows = []
+    
+    def add(payment_type, amount, method, due_date, notes):
+        if terms.earliest_due_date is not None:
+            due_date = max(due_date, terms.earliest_due_date)
+        rows.append({
+            "booking_id": terms.booking_id,
+            "payment_type": payment_type,
+            "amount": amount,
+            "payment_method": method,
+            "payment_status": models.PaymentStatus.PENDING,
+            "due_date": due_date,
+            "notes": notes,
+            "is_scheduled": True,
+        })
+    
+    token = min(terms.token_amount, terms.total_amount)
+    if token > 0:
+        add(models.PaymentType.TOKEN, token, models.PaymentMethod.BANK_TRANSFER, terms.start_date, "Token amount")
+    
+    remaining = terms.total_amount - token
+    if terms.payment_plan == models.PaymentPlan.FULL_PAYMENT:
+        if remaining > 0:
+            add(
+                models.PaymentType.FINAL, remaining, models.PaymentMethod.BANK_TRANSFER,
+                terms.start_date + timedelta(days=FULL_PAYMENT_DUE_DAYS), "Full payment"
+            )
+    else:
+        loan = Decimal("0")
+        if terms.payment_plan == models.PaymentPlan.LOAN:
+            loan = min(terms.loan_amount, remaining)
+        own_contribution = remaining - loan
+        
+        if own_contribution > 0:
+            due_dates = milestone_due_dates(milestones, terms.start_date, options.installment_count)
+            for (label, due), amount in zip(due_dates, split_amount(own_contribution, len(due_dates))):
+                add(models.PaymentType.INSTALLMENT, amount, models.PaymentMethod.BANK_TRANSFER, due, label)
+        
+        if loan > 0:
+            # The builder receives the principal; the full EMI is recorded for reference
+            emi, principal_parts, interest_parts = emi_breakdown(
+                loan, options.loan_interest_rate, options.loan_tenure_months
+            )
+            for k, (principal, interest) in enumerate(zip(principal_parts, interest_parts), start=1):
+                add(
+                    models.PaymentType.INSTALLMENT, principal, models.PaymentMethod.LOAN,
+                    terms.start_date + relativedelta(months=k),
+                    f"EMI {k}/{options.loan_tenure_months}: {emi} = principal {principal} + interest {interest}"
+                )
+    
+    rows.sort(key=lambda row: row["due_date"])
+    return apply_paid_amount(rows, terms.paid_amount)
+
+
+def apply_paid_amount(rows: List[Dict[str, Any]], paid_amount: Decimal) -> List[Dict[str, Any]]:
+    """Drop rows already covered by completed payments, oldest first."""
+    if paid_amount <= 0:
+        return rows
+    outstanding = []
+    for row, cumulative in zip(rows, accumulate(row["amount"] for row in rows)):
+        if cumulative > paid_amount:
+            outstanding.append({**row, "amount": min(row["amount"], cumulative - paid_amount)})
+    return outstanding
+
+
+def _project_milestones(db: Session, project_id: int) -> List[Tuple[str, Optional[date]]]:
+    """Construction phases of a project in due-date order."""
+    return [
+        (phase.phase_name, phase.expected_end_date)
+        for phase in db.query(
+            models.ProjectProgress.phase_name, models.ProjectProgress.expected_end_date
+        ).filter(
+            models.ProjectProgress.project_id == project_id
+        ).order_by(
+            models.ProjectProgress.expected_end_date.asc().nullslast(), models.ProjectProgress.id
+        )
+    ]
+
+
+def _booking_terms(row) -> BookingTerms:
+    """Convert a booking result row into BookingTerms, due no earlier than today."""
+    booking_date = row.booking_date or datetime.utcnow()
+    return BookingTerms(
+        booking_id=row.id,
+        total_amount=Decimal(row.total_amount),
+        token_amount=Decimal(row.token_amount or 0),
+        payment_plan=row.payment_plan or models.PaymentPlan.INSTALLMENTS,
+        loan_amount=Decimal(row.loan_amount or 0),
+        start_date=booking_date.date() if isinstance(booking_date, datetime) else booking_date,
+        paid_amount=Decimal(row.paid_amount or 0),
+        earliest_due_date=date.today(),
+    )
+
+
+def _replace_schedules(db: Session, booking_ids, rows: List[Dict[str, Any]]) -> None:
+    """Delete pending generated payments for the bookings and bulk insert new rows."""
+    db.query(models.Payment).filter(
+        models.Payment.booking_id.in_(booking_ids),
+        models.Payment.payment_status == models.PaymentStatus.PENDING,
+        models.Payment.is_scheduled.is_(True)
+    ).delete(synchronize_session=False)
+    if rows:
+        db.execute(insert(models.Payment), rows)
+
+
+def _bookings_query():
+    return select(
+        models.Booking.id,
+        models.Booking.total_amount,
+        models.Booking.token_amount,
+        models.Booking.payment_plan,
+        models.Booking.loan_amount,
+        models.Booking.booking_date,
+        models.Booking.paid_amount
+    )
+
+
+def generate_booking_schedule(
+    db: Session,
+    booking: models.Booking,
+    options: schemas.PaymentScheduleOptions
+) -> List[models.Payment]:
+    """(Re)generate and persist the pending payment schedule for one booking.
+    
+    Pending generated instalments are replaced; completed payments are kept
+    and deducted from the earliest instalments, and pending payments recorded
+    by hand are left alone.
+    """
+    row = db.execute(_bookings_query().where(models.Booking.id == booking.id)).one()
+    rows = build_schedule(_booking_terms(row), _project_milestones(db, booking.unit.project_id), options)
+    _replace_schedules(db, [booking.id], rows)
+    db.commit()
+    
+    return db.query(models.Payment).filter(
+        models.Payment.booking_id == booking.id,
+        models.Payment.payment_status == models.PaymentStatus.PENDING,
+        models.Payment.is_scheduled.is_(True)
+    ).order_by(models.Payment.due_date, models.Payment.id).all()
+
+
+def recompute_project_schedules(
+    db: Session,
+    project_id: int,
+    options: schemas.PaymentScheduleOptions
+) -> Dict[str, Any]:
+    """Regenerate schedules for every active booking in a project in one batch."""
+    milestones = _project_milestones(db, project_id)
+    booking_rows = db.execute(
+        _bookings_query().join(models.Unit, models.Booking.unit_id == models.Unit.id).where(
+            models.Unit.project_id == project_id,
+            models.Booking.booking_status != models.BookingStatus.CANCELLED
+        )
+    ).all()
+    
+    rows = []
+    for booking_row in booking_rows:
+        rows.extend(build_schedule(_booking_terms(booking_row), milestones, options))
+    _replace_schedules(db, [booking_row.id for booking_row in booking_rows], rows)
+    db.commit()
+    
+    return {
+        "project_id": project_id,
+        "bookings": len(booking_rows),
+        "payments_created": len(rows)
+    }
@@ -0,0 +1,106 @@
+"""Chunked purge of very large projects.
+
+``crud.delete_project`` deletes a project with one DELETE and lets the
+ON DELETE CASCADE foreign keys remove the rest. For a project with thousands
+of units that single statement cascades into every booking, payment and
+change request at once: one long transaction holding row locks and writing
+a burst of WAL. Above ``BACKGROUND_PURGE_UNITS`` the API instead flags the
+project (``deletion_requested_at``, so a second delete is refused and the
+project drops out of the builder's dashboard and revenue figures) and runs
+``purge_project`` after responding:
+
+- units are deleted ``CHUNK_SIZE`` at a time (each cascading to its
+  bookings, payments, change requests, price history and 3D models), one
+  short transaction per chunk; then the appointments the same way;
+- finally the project row itself, which cascades to what little is left.
+
+Nothing is loaded into the session, so memory stays flat. A purge that is
+interrupted has only removed whole units and leaves the project flagged;
+running it again with ``--resume`` finishes the job.
+
+Usage:
+    python -m services.project_purge PROJECT_ID [--chunk-size 500] [--resume]
+"""
+
+import argparse
+import logging
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from database import crud, models
+from database.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 500
+# Projects with more units than this are purged in the background
+BACKGROUND_PURGE_UNITS = 1000
+
+
+def _delete_chunk(db: Session, model, project_id: int, chunk_size: int) -> int:
+    """Delete up to `chunk_size` of a project's rows of `model` (lowest ids first) and commit."""
+    ids = select(model.id).where(model.project_id == project_id).order_by(model.id).limit(chunk_size)
+    result = db.execute(
+        delete(model).where(model.id.in_(ids.scalar_subquery())),
+        execution_options={"synchronize_session": False}
+    )
+    db.commit()
+    return result.rowcount
+
+
+def purge_project(db: Session, project_id: int, chunk_size: int = CHUNK_SIZE) -> Optional[Dict]:
+    """Delete a project and everything under it in chunks. Returns stats, or None if not found."""
+    if db.get(models.Project, project_id) is None:
+        return None
+    started = time.perf_counter()
+    stats = {"project_id": project_id, "units": 0, "appointments": 0}
+    for model, key in ((models.Unit, "units"), (models.Appointment, "appointments")):
+        while True:
+            deleted = _delete_chunk(db, model, project_id, chunk_size)
+            stats[key] += deleted
+            if deleted < chunk_size:
+                break
+    crud.delete_project(db, project_id)
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    return stats
+
+
+def purge_in_background(project_id: int, chunk_size: int = CHUNK_SIZE) -> None:
+    """Background-task entry point: purge with a session of its own."""
+    db = SessionLocal()
+    try:
+        stats = purge_project(db, project_id, chunk_size=chunk_size)
+        if stats is not None:
+            logger.info("Purged project %s: %s units, %s appointments in %ss",
+                        project_id, stats["units"], stats["appointments"], stats["seconds"])
+    except Exception:
+        db.rollback()
+        logger.exception(
+            "Purging project %s failed; run `python -m services.project_purge %s --resume` to finish",
+            project_id, project_id
+        )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete a (large) project in chunks")
+    parser.add_argument("project_id", type=int)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help=f"Units/appointments per transaction (default: {CHUNK_SIZE})")
+    parser.add_argument("--resume", action="store_true", help="Finish a purge that was started before and interrupted")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if db.get(models.Project, args.project_id) is None:
+            print(f"Project {args.project_id} not found")
+        elif not crud.mark_project_deleting(db, args.project_id) and not args.resume:
+            print(f"Project {args.project_id} is already being deleted; pass --resume if that purge was interrupted")
+        else:
+            stats = purge_project(db, args.project_id, chunk_size=args.chunk_size)
+            print(f"Deleted project {args.project_id}: {stats['units']} units, {stats['appointments']} appointments in {stats['seconds']}s")
+    finally:
+        db.close()
@@ -0,0 +1,368 @@
+"""Real-time push of new messages and notifications.
+
+crud queues an event on the session whenever it creates a message or a
+notification. The pub/sub backend publishes the event only if that
+transaction commits:
+
+- ``postgres`` issues ``pg_notify`` inside the transaction, so every API
+  worker (and job process) sees it as soon as it commits;
+- ``memory`` hands it to this process's hub after commit (one worker, tests).
+
+The backend is read from the ``REALTIME_BACKEND`` environment variable;
+unset, it is ``postgres`` when the database is Postgres and ``memory``
+otherwise.
+
+Each worker runs one ``RealtimeHub``. The hub keeps a registry of local
+connections per user and, for every event addressed to a connected user,
+loads the row once and offers it to each of that user's connections.
+Connections have a bounded send queue; a client that falls behind is
+disconnected rather than buffered without limit, and resynchronises over
+REST when it reconnects.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from database import models, schemas
+from database.database import SessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "realtime_events"
+# "postgres" (LISTEN/NOTIFY, any number of workers) or "memory" (one worker, tests)
+REALTIME_BACKEND = os.environ.get(
+    "REALTIME_BACKEND", "postgres" if engine.dialect.name == "postgresql" else "memory"
+)
+SEND_QUEUE_SIZE = 100
+MAX_NOTIFY_PAYLOAD = 7900  # bytes; Postgres rejects NOTIFY payloads of 8000+
+PENDING_EVENTS_KEY = "realtime_events"
+
+# Event kind -> (model, response schema) used to load what is pushed
+EVENT_SOURCES = {
+    "message": (models.Message, schemas.MessageResponse),
+    "notification": (models.Notification, schemas.NotificationResponse),
+}
+
+
+# ============= PUBLISHING =============
+
+def queue_event(
+    db: Session,
+    user_ids: Iterable[int],
+    kind: str,
+    entity_id: Optional[int] = None,
+    data: Optional[Dict[str, Any]] = None
+) -> None:
+    """Publish an event to `user_ids` when the session's transaction commits.
+    
+    Row events (a kind from EVENT_SOURCES plus `entity_id`) are loaded by the
+    hub before delivery; small events such as unread-count deltas carry
+    their `data` inline.
+    """
+    published = {"user_ids": sorted(set(user_ids)), "kind": kind}
+    if data is not None:
+        published["data"] = data
+    else:
+        published["id"] = entity_id
+    db.info.setdefault(PENDING_EVENTS_KEY, []).append(published)
+
+
+@event.listens_for(Session, "before_commit")
+def _before_commit(session: Session) -> None:
+    events = session.info.get(PENDING_EVENTS_KEY)
+    if events:
+        hub.backend.publish_in_transaction(session, events)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    events = session.info.pop(PENDING_EVENTS_KEY, None)
+    if events:
+        hub.backend.publish_after_commit(events)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop(PENDING_EVENTS_KEY, None)
+
+
+# ============= PUB/SUB BACKENDS =============
+
+class PubSubBackend:
+    """Delivers committed events to the hub of every worker."""
+
+    def publish_in_transaction(self, session: Session, events: List[Dict[str, Any]]) -> None:
+        """Called before commit, inside the transaction that created the rows."""
+
+    def publish_after_commit(self, events: List[Dict[str, Any]]) -> None:
+        """Called once the transaction has committed."""
+
+    async def start(self, handler: Callable[[Dict[str, Any]], None]) -> None:
+        """Start delivering published events to `handler` on the running loop."""
+
+    async def stop(self) -> None:
+        """Stop delivering events."""
+
+
+class InMemoryBackend(PubSubBackend):
+    """Single-process backend: events go straight to this process's hub."""
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._handler: Optional[Callable[[Dict[str, Any]], None]] = None
+
+    def publish_after_commit(self, events: List[Dict[str, Any]]) -> None:
+        if self._loop is None or self._loop.is_closed():
+            return
+        # Commits happen on threadpool workers; hand over to the loop thread
+        for published in events:
+            self._loop.call_soon_threadsafe(self._handler, published)
+
+    async def start(self, handler: Callable[[Dict[str, Any]], None]) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._handler = handler
+
+    async def stop(self) -> None:
+        self._loop = None
+
+
+class PostgresBackend(PubSubBackend):
+    """Multi-worker backend over Postgres LISTEN/NOTIFY.
+
+    NOTIFY is transactional, so events are only delivered for committed
+    rows. Payloads carry ids only; a transaction's events are packed into
+    as few NOTIFYs as the payload limit allows, so bulk fan-outs send a
+    handful of NOTIFYs per chunk rather than one per row.
+    """
+
+    RECONNECT_SECONDS = 5
+
+    def __init__(self, dsn: Optional[str] = None):
+        self._dsn = dsn or engine.url.render_as_string(hide_password=False)
+        self._connection = None
+        self._handler: Optional[Callable[[Dict[str, Any]], None]] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def publish_in_transaction(self, session: Session, events: List[Dict[str, Any]]) -> None:
+        for payload in self._pack(events):
+            session.execute(select(func.pg_notify(CHANNEL, payload)))
+
+    @staticmethod
+    def _pack(events: List[Dict[str, Any]]) -> Iterable[str]:
+        """JSON arrays of events, each within MAX_NOTIFY_PAYLOAD (json.dumps output is ASCII)."""
+        batch: List[str] = []
+        size = 2
+        for published in events:
+            encoded = json.dumps(published)
+            if batch and size + len(encoded) + 1 > MAX_NOTIFY_PAYLOAD:
+                yield "[" + ",".join(batch) + "]"
+                batch, size = [], 2
+            batch.append(encoded)
+            size += len(encoded) + 1
+        if batch:
+            yield "[" + ",".join(batch) + "]"
+
+    async def start(self, handler: Callable[[Dict[str, Any]], None]) -> None:
+        self._handler = handler
+        self._loop = asyncio.get_running_loop()
+        self._listen()
+
+    def _listen(self) -> None:
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+        try:
+            self._connection = psycopg2.connect(self._dsn)
+            self._connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+            with self._connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANNEL}")
+        except psycopg2.Error:
+            logger.exception("Realtime LISTEN connection failed; retrying")
+            self._loop.call_later(self.RECONNECT_SECONDS, self._listen)
+            return
+        self._loop.add_reader(self._connection.fileno(), self._on_readable)
+
+    def _on_readable(self) -> None:
+        import psycopg2
+
+        try:
+            self._connection.poll()
+        except psycopg2.Error:
+            logger.exception("Realtime LISTEN connection lost; reconnecting")
+            self._close()
+            self._loop.call_later(self.RECONNECT_SECONDS, self._listen)
+            return
+        while self._connection.notifies:
+            notify = self._connection.notifies.pop(0)
+            for published in json.loads(notify.payload):
+                self._handler(published)
+
+    def _close(self) -> None:
+        if self._connection is not None:
+            try:
+                self._loop.remove_reader(self._connection.fileno())
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+    async def stop(self) -> None:
+        self._close()
+
+
+def create_backend(name: str = REALTIME_BACKEND) -> PubSubBackend:
+    """Build the configured pub/sub backend."""
+    backends = {"memory": InMemoryBackend, "postgres": PostgresBackend}
+    if name not in backends:
+        raise ValueError(f"Unknown realtime backend: {name}")
+    if name == "postgres" and engine.dialect.name != "postgresql":
+        raise ValueError(f"The postgres realtime backend needs a Postgres database, not {engine.dialect.name}")
+    return backends[name]()
+
+
+# ============= CONNECTIONS =============
+
+class Connection:
+    """One client connection (WebSocket or SSE) with a bounded send queue.
+
+    Transports read events from ``queue``; ``None`` means the connection was
+    closed by the hub (e.g. the client fell behind) and should end. `kinds`
+    limits the event kinds delivered (None: all).
+    """
+
+    def __init__(self, user_id: int, queue_size: int = SEND_QUEUE_SIZE, kinds: Optional[Set[str]] = None):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.kinds = kinds
+        self.overflowed = False
+
+    def accepts(self, kind: str) -> bool:
+        return self.kinds is None or kind in self.kinds
+
+    def offer(self, item: Dict[str, Any]) -> bool:
+        """Queue an event without blocking; on overflow, close the connection."""
+        if self.overflowed:
+            return False
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            self.overflowed = True
+            self.close()
+            return False
+
+    def close(self) -> None:
+        """Discard anything unsent and tell the transport to end."""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class ConnectionRegistry:
+    """The connections of this worker, by user."""
+
+    def __init__(self):
+        self._by_user: Dict[int, Set[Connection]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(connections) for connections in self._by_user.values())
+
+    def add(self, connection: Connection) -> None:
+        self._by_user.setdefault(connection.user_id, set()).add(connection)
+
+    def remove(self, connection: Connection) -> None:
+        connections = self._by_user.get(connection.user_id)
+        if connections is not None:
+            connections.discard(connection)
+            if not connections:
+                del self._by_user[connection.user_id]
+
+    def for_user(self, user_id: int) -> List[Connection]:
+        return list(self._by_user.get(user_id, ()))
+
+    def users(self) -> Set[int]:
+        return set(self._by_user)
+
+
+def load_event_data(kind: str, entity_id: int) -> Optional[Dict[str, Any]]:
+    """Load and serialise the row an event refers to."""
+    model, schema = EVENT_SOURCES[kind]
+    db = SessionLocal()
+    try:
+        row = db.get(model, entity_id)
+        return schema.model_validate(row).model_dump(mode="json") if row is not None else None
+    finally:
+        db.close()
+
+
+class RealtimeHub:
+    """Fans published events out to this worker's connections."""
+
+    def __init__(self, backend: Optional[PubSubBackend] = None):
+        self.backend = backend or create_backend()
+        self.registry = ConnectionRegistry()
+        self.stats = {"events": 0, "delivered": 0, "dropped_connections": 0}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        await self.backend.start(self.dispatch)
+
+    async def stop(self) -> None:
+        await self.backend.stop()
+        for user_id in self.registry.users():
+            for connection in self.registry.for_user(user_id):
+                connection.close()
+
+    def set_backend(self, backend: PubSubBackend) -> None:
+        """Swap the backend (before start), e.g. InMemoryBackend in tests."""
+        self.backend = backend
+
+    def connect(self, user_id: int, kinds: Optional[Set[str]] = None) -> Connection:
+        connection = Connection(user_id, kinds=kinds)
+        self.registry.add(connection)
+        return connection
+
+    def disconnect(self, connection: Connection) -> None:
+        self.registry.remove(connection)
+
+    def dispatch(self, published: Dict[str, Any]) -> None:
+        """Handle an event from the backend (called on the event loop)."""
+        self.stats["events"] += 1
+        kind = published["kind"]
+        user_ids = [
+            user_id for user_id in published["user_ids"]
+            if any(connection.accepts(kind) for connection in self.registry.for_user(user_id))
+        ]
+        if not user_ids:
+            return  # nobody connected here: skip loading the row
+        if "data" in published:
+            self._offer({"type": kind, "data": published["data"]}, user_ids)
+            return
+        task = asyncio.get_running_loop().create_task(self._deliver(published, user_ids))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _deliver(self, published: Dict[str, Any], user_ids: List[int]) -> None:
+        data = await asyncio.to_thread(load_event_data, published["kind"], published["id"])
+        if data is not None:
+            self._offer({"type": published["kind"], "data": data}, user_ids)
+
+    def _offer(self, item: Dict[str, Any], user_ids: List[int]) -> None:
+        for user_id in user_ids:
+            for connection in self.registry.for_user(user_id):
+                if not connection.accepts(item["type"]):
+                    continue
+                if connection.offer(item):
+                    self.stats["delivered"] += 1
+                else:
+                    self.stats["dropped_connections"] += 1
+                    self.registry.remove(connection)
+
+
+hub = RealtimeHub()
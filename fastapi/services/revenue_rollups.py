@@ -0,0 +1,117 @@
+"""Catch-up job for revenue and collections rollups.
+
+Writes bump the ``revenue_rollups`` buckets incrementally (see the REVENUE
+ROLLUPS section of ``database/crud.py``). This job rebuilds them from the raw
+bookings and payments tables: daily aggregates are computed in SQL with one
+GROUP BY per metric and rolled up into week and month buckets in Python,
+then written with a bulk insert, one batch of projects at a time. Days come
+from the same columns the writes use: ``booking_date``, ``cancelled_at`` and
+the payment's paid date.
+
+Usage:
+    python -m services.revenue_rollups [--batch-size 50]
+"""
+
+import argparse
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from database import crud, models
+from database.database import SessionLocal
+
+
+def _as_date(value) -> date:
+    """func.date() returns a string on SQLite and a date on Postgres."""
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _daily_aggregates(db: Session, project_ids: List[int]):
+    """Yield (project_id, day, metric, payment_type, payment_method, count, amount)."""
+    project_id = models.Unit.project_id
+    bookings = db.query(models.Booking).join(models.Unit, models.Booking.unit_id == models.Unit.id)
+    
+    day = func.date(models.Booking.booking_date)
+    for row in bookings.with_entities(
+        project_id, day, func.count(models.Booking.id), func.sum(models.Booking.total_amount)
+    ).filter(project_id.in_(project_ids)).group_by(project_id, day):
+        yield row[0], row[1], models.RevenueMetric.BOOKINGS, "", "", row[2], row[3]
+    
+    day = func.date(models.Booking.cancelled_at)
+    for row in bookings.with_entities(
+        project_id, day, func.count(models.Booking.id), func.sum(models.Booking.total_amount)
+    ).filter(
+        project_id.in_(project_ids),
+        models.Booking.booking_status == models.BookingStatus.CANCELLED,
+        models.Booking.cancelled_at.isnot(None)
+    ).group_by(project_id, day):
+        yield row[0], row[1], models.RevenueMetric.CANCELLATIONS, "", "", row[2], row[3]
+    
+    day = func.date(func.coalesce(models.Payment.paid_date, models.Payment.created_at))
+    for row in db.query(
+        project_id, day, models.Payment.payment_type, models.Payment.payment_method,
+        func.count(models.Payment.id), func.sum(models.Payment.amount)
+    ).join(models.Booking, models.Payment.booking_id == models.Booking.id).join(
+        models.Unit, models.Booking.unit_id == models.Unit.id
+    ).filter(
+        project_id.in_(project_ids),
+        models.Payment.payment_status == models.PaymentStatus.COMPLETED
+    ).group_by(project_id, day, models.Payment.payment_type, models.Payment.payment_method):
+        yield row[0], row[1], models.RevenueMetric.COLLECTIONS, row[2].value, row[3].value, row[4], row[5]
+
+
+def rebuild_rollups(db: Session, project_ids: List[int]) -> int:
+    """Replace all rollup buckets of the given projects. Returns buckets written."""
+    buckets: Dict[Tuple, List] = defaultdict(lambda: [0, Decimal("0")])
+    for project_id, day, metric, payment_type, payment_method, count, amount in _daily_aggregates(db, project_ids):
+        day = _as_date(day)
+        for period in models.RollupPeriod:
+            bucket = buckets[(project_id, period, crud.period_start(period, day), metric, payment_type, payment_method)]
+            bucket[0] += count
+            bucket[1] += Decimal(amount or 0)
+    
+    db.query(models.RevenueRollup).filter(
+        models.RevenueRollup.project_id.in_(project_ids)
+    ).delete(synchronize_session=False)
+    rows = [
+        {
+            "project_id": project_id,
+            "period": period,
+            "period_start": start,
+            "metric": metric,
+            "payment_type": payment_type,
+            "payment_method": payment_method,
+            "count": count,
+            "amount": amount
+        }
+        for (project_id, period, start, metric, payment_type, payment_method), (count, amount) in buckets.items()
+    ]
+    if rows:
+        db.execute(insert(models.RevenueRollup), rows)
+    return len(rows)
+
+
+def rebuild_all(batch_size: int = 50) -> int:
+    """Rebuild rollups for every project, committing once per batch of projects."""
+    db = SessionLocal()
+    try:
+        project_ids = [project_id for (project_id,) in db.query(models.Project.id).order_by(models.Project.id)]
+        written = 0
+        for start in range(0, len(project_ids), batch_size):
+            written += rebuild_rollups(db, project_ids[start:start + batch_size])
+            db.commit()
+        return written
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild revenue and collections rollups")
+    parser.add_argument("--batch-size", type=int, default=50, help="Projects per transaction (default: 50)")
+    args = parser.parse_args()
+    
+    print(f"Wrote {rebuild_all(batch_size=args.batch_size)} rollup buckets")
@@ -0,0 +1,61 @@
+"""Batch repair job for derived rollups.
+
+Writes keep these current incrementally; this job recomputes them from the
+source rows in ID-range batches to repair any drift, e.g. after manual SQL
+fixes:
+
+- project price range and available units, from the units table
+  (see the PROJECT ROLLUPS section of ``database/crud.py``)
+- booking paid balances, from completed payments
+- per-user unread notification/message counters
+
+Usage:
+    python -m services.rollups [--batch-size 500]
+"""
+
+import argparse
+from typing import Callable
+
+from sqlalchemy import func
+
+from database import crud, models
+from database.database import SessionLocal
+
+
+def _recompute_in_batches(model, recompute: Callable, batch_size: int) -> int:
+    """Run a range-based recompute over all IDs of a table, committing once per batch."""
+    db = SessionLocal()
+    try:
+        max_id = db.query(func.max(model.id)).scalar() or 0
+        updated = 0
+        for start in range(1, max_id + 1, batch_size):
+            updated += recompute(db, start, start + batch_size - 1)
+            db.commit()
+        return updated
+    finally:
+        db.close()
+
+
+def recompute_all(batch_size: int = 500) -> int:
+    """Recompute rollups for every project."""
+    return _recompute_in_batches(models.Project, crud.recompute_project_rollups, batch_size)
+
+
+def recompute_all_booking_balances(batch_size: int = 500) -> int:
+    """Recompute paid balances for every booking."""
+    return _recompute_in_batches(models.Booking, crud.recompute_booking_balances, batch_size)
+
+
+def recompute_all_unread_counters(batch_size: int = 500) -> int:
+    """Create missing and repair drifted unread counters for every user."""
+    return _recompute_in_batches(models.User, crud.recompute_unread_counters, batch_size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute project unit rollups, booking balances and unread counters")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per transaction (default: 500)")
+    args = parser.parse_args()
+    
+    print(f"Recomputed rollups for {recompute_all(batch_size=args.batch_size)} projects")
+    print(f"Recomputed balances for {recompute_all_booking_balances(batch_size=args.batch_size)} bookings")
+    print(f"Repaired unread counters for {recompute_all_unread_counters(batch_size=args.batch_size)} users")
@@ -0,0 +1,82 @@
+"""Streaming CSV/XLSX readers for unit inventory imports.
+
+Rows are yielded one at a time as plain dicts keyed by the header row, so
+``crud.bulk_create_units`` can validate and insert them in chunks without
+holding the whole sheet in memory. Files that cannot be decoded raise
+``UnreadableFile`` while they are being read.
+"""
+
+import csv
+import io
+import zipfile
+import zlib
+from typing import Any, BinaryIO, Dict, Iterator
+
+# Separator used for the multi-valued ``features`` column, e.g. "Gym|Pool"
+FEATURE_SEPARATOR = "|"
+
+
+class UnreadableFile(ValueError):
+    """The upload is not valid UTF-8 CSV or is not a readable XLSX workbook."""
+
+
+def _clean_row(row: Dict[Any, Any]) -> Dict[str, Any]:
+    """Strip cells and drop blanks so schema defaults apply."""
+    cleaned = {}
+    for key, value in row.items():
+        if key is None:
+            continue
+        key = str(key).strip()
+        if isinstance(value, str):
+            value = value.strip()
+        if value is None or value == "":
+            continue
+        if key == "features" and isinstance(value, str):
+            value = [f.strip() for f in value.split(FEATURE_SEPARATOR) if f.strip()]
+        cleaned[key] = value
+    return cleaned
+
+
+def iter_csv_rows(fileobj: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """Yield cleaned rows from a UTF-8 CSV file with a header row."""
+    reader = csv.DictReader(io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline=""))
+    try:
+        for row in reader:
+            yield _clean_row(row)
+    except UnicodeDecodeError:
+        raise UnreadableFile("CSV file is not UTF-8 encoded, save it as \"CSV UTF-8\" and upload again")
+    except csv.Error as e:
+        raise UnreadableFile(f"Invalid CSV file (line {reader.line_num}): {e}")
+
+
+def iter_xlsx_rows(fileobj: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """Yield cleaned rows from the first sheet of an XLSX workbook."""
+    from openpyxl import load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except (InvalidFileException, zipfile.BadZipFile, KeyError, ValueError) as e:
+        raise UnreadableFile(f"Not a readable XLSX workbook: {e}")
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        keys = [str(cell).strip() if cell is not None else None for cell in header]
+        for values in rows:
+            yield _clean_row(dict(zip(keys, values)))
+    except (zipfile.BadZipFile, zlib.error, KeyError) as e:
+        raise UnreadableFile(f"Corrupt XLSX workbook: {e}")
+    finally:
+        workbook.close()
+
+
+def iter_rows(filename: str, fileobj: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """Pick a reader based on the uploaded file's extension."""
+    name = filename.lower()
+    if name.endswith(".csv"):
+        return iter_csv_rows(fileobj)
+    if name.endswith((".xlsx", ".xlsm")):
+        return iter_xlsx_rows(fileobj)
+    raise ValueError("Unsupported file type, upload a .csv or .xlsx file")
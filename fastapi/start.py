@@ -3,23 +3,37 @@
 Quick start script for the BuildCraft RealEstate API
 
 This script provides an easy way to start the FastAPI server with common configurations.
+Database migrations are applied once before the server (and its workers) start.
 """
 
 import sys
 import subprocess
 from pathlib import Path
 
-def start_server(host="0.0.0.0", port=8000, reload=True):
+def run_migrations(script_dir):
+    """Upgrade the database to the latest migration; exits on failure."""
+    print("🗄️  Applying database migrations...")
+    result = subprocess.run([sys.executable, "migrate.py", "upgrade"], cwd=script_dir)
+    if result.returncode != 0:
+        print("❌ Migrations failed; not starting the server")
+        sys.exit(result.returncode)
+
+
+def start_server(host="0.0.0.0", port=8000, reload=True, workers=1, migrate=True):
     """Start the FastAPI server."""
     
     # Ensure we're in the correct directory
     script_dir = Path(__file__).parent
     
+    if migrate:
+        run_migrations(script_dir)
+    
     print("🚀 Starting BuildCraft RealEstate API...")
     print(f"📍 Directory: {script_dir}")
     print(f"🌐 Host: {host}")
     print(f"🔌 Port: {port}")
     print(f"🔄 Auto-reload: {'enabled' if reload else 'disabled'}")
+    print(f"👷 Workers: {workers}")
     print("\n" + "="*50 + "\n")
     print("📚 API Documentation:")
     print(f"   • Swagger UI: http://{host if host != '0.0.0.0' else 'localhost'}:{port}/api/docs")
@@ -37,6 +51,8 @@ def start_server(host="0.0.0.0", port=8000, reload=True):
     
     if reload:
         cmd.append("--reload")
+    elif workers > 1:
+        cmd.extend(["--workers", str(workers)])
     
     try:
         # Run the server
@@ -59,11 +75,15 @@ if __name__ == "__main__":
     parser.add_argument("--host", default="0.0.0.0", help="Host to bind (default: 0.0.0.0)")
     parser.add_argument("--port", type=int, default=8000, help="Port to bind (default: 8000)")
     parser.add_argument("--no-reload", action="store_true", help="Disable auto-reload")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes, without reload (default: 1)")
+    parser.add_argument("--skip-migrations", action="store_true", help="Do not run database migrations first")
     
     args = parser.parse_args()
     
     start_server(
         host=args.host,
         port=args.port,
-        reload=not args.no_reload
+        reload=not args.no_reload,
+        workers=args.workers,
+        migrate=not args.skip_migrations
     )
@@ -0,0 +1,89 @@
+"""Shared fixtures: a fresh in-memory SQLite database per test.
+
+The schema comes from the models (``Base.metadata.create_all``), foreign keys
+are enforced so ON DELETE CASCADE behaves as on Postgres, and the realtime
+hub uses the in-memory backend (SQLite has no ``pg_notify``).
+"""
+
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from database import models
+from database.database import Base
+from services import realtime
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+
+    @event.listens_for(engine, "connect")
+    def _enable_foreign_keys(connection, record):
+        connection.execute("PRAGMA foreign_keys=ON")
+
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+    yield session
+    session.close()
+
+
+@pytest.fixture(autouse=True)
+def realtime_backend():
+    """Publish realtime events in-process for the duration of a test."""
+    previous = realtime.hub.backend
+    backend = realtime.InMemoryBackend()
+    realtime.hub.set_backend(backend)
+    yield backend
+    realtime.hub.set_backend(previous)
+
+
+def _user(db, email: str, user_type: models.UserType) -> models.User:
+    user = models.User(email=email, password_hash="x", user_type=user_type)
+    db.add(user)
+    db.flush()
+    db.add(models.UserUnreadCounter(user_id=user.id))
+    return user
+
+
+@pytest.fixture
+def accounts(db):
+    """A builder with one project and one unit, and a customer."""
+    builder_user = _user(db, "builder@example.com", models.UserType.BUILDER)
+    customer_user = _user(db, "customer@example.com", models.UserType.CUSTOMER)
+    builder = models.Builder(
+        user_id=builder_user.id, company_name="Acme Builders", license_number="LIC-1",
+        phone="5550100", address="1 Main Street"
+    )
+    customer = models.Customer(user_id=customer_user.id, first_name="Asha", last_name="Rao", phone="5550101")
+    db.add_all([builder, customer])
+    db.flush()
+    project = models.Project(
+        builder_id=builder.id, project_name="Lakeview", project_type=models.ProjectType.RESIDENTIAL,
+        location_address="2 Lake Road", location_city="Pune", location_state="MH", location_zipcode="411001",
+        total_units=1, available_units=1
+    )
+    db.add(project)
+    db.flush()
+    unit = models.Unit(
+        project_id=project.id, unit_number="A-101", unit_type=models.UnitType.TWO_BHK, floor_number=1,
+        area_sqft=Decimal("950"), price=Decimal("6000000"), bathrooms=2
+    )
+    db.add(unit)
+    db.commit()
+    return SimpleNamespace(
+        builder_user=builder_user, customer_user=customer_user,
+        builder=builder, customer=customer, project=project, unit=unit
+    )
@@ -0,0 +1,114 @@
+"""Leasing and retrying of email/SMS notification delivery."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from database import crud, models, schemas
+from services import notification_delivery
+from services.notification_delivery import DeliveryWorker, FakeChannel
+
+
+@pytest.fixture
+def channels():
+    return {"email": FakeChannel("email"), "sms": FakeChannel("sms")}
+
+
+@pytest.fixture
+def worker(channels):
+    worker = DeliveryWorker(channels=channels, concurrency=2)
+    yield worker
+    worker.close()
+
+
+def _notification(db, accounts, send_via=("email", "sms"), scheduled_send_time=None):
+    return crud.create_notification(db, schemas.NotificationCreate(
+        user_id=accounts.customer_user.id, title="Payment due", message="Instalment 2 is due",
+        notification_type=models.NotificationType.PAYMENT_DUE, send_via=list(send_via),
+        scheduled_send_time=scheduled_send_time
+    ))
+
+
+def _reload(db, notification_id):
+    db.expire_all()
+    return db.get(models.Notification, notification_id)
+
+
+def _later(seconds):
+    return datetime.now(timezone.utc) + timedelta(seconds=seconds)
+
+
+def test_delivers_on_every_channel_and_marks_sent(db, accounts, worker, channels):
+    notification = _notification(db, accounts)
+
+    result = worker.run_once(db)
+
+    assert result == {"claimed": 1, "sent": 1, "retrying": 0, "failed": 0}
+    assert channels["email"].outbox == channels["sms"].outbox == [notification.id]
+    row = _reload(db, notification.id)
+    assert row.is_sent and row.sent_at is not None and row.next_attempt_at is None
+    assert row.delivered_via == ["email", "sms"]
+
+
+def test_in_app_and_future_notifications_are_not_claimed(db, accounts, worker):
+    _notification(db, accounts, send_via=("in_app",))
+    _notification(db, accounts, scheduled_send_time=_later(3600))
+
+    assert worker.run_once(db)["claimed"] == 0
+
+
+def test_retry_resends_only_the_failed_channel(db, accounts, worker, channels):
+    notification = _notification(db, accounts)
+    channels["sms"].failure_rate = 1.0
+
+    assert worker.run_once(db)["retrying"] == 1
+    row = _reload(db, notification.id)
+    assert not row.is_sent and row.next_attempt_at is not None
+    assert row.delivered_via == ["email"]
+    assert "sms" in row.delivery_error
+
+    channels["sms"].failure_rate = 0.0
+    assert worker.run_once(db, now=_later(2 * notification_delivery.RETRY_MAX_SECONDS))["sent"] == 1
+    assert channels["email"].outbox == [notification.id]
+    assert channels["sms"].outbox == [notification.id]
+
+
+def test_gives_up_after_max_attempts(db, accounts, worker, channels):
+    notification = _notification(db, accounts, send_via=("sms",))
+    channels["sms"].failure_rate = 1.0
+
+    for attempt in range(notification_delivery.MAX_ATTEMPTS):
+        result = worker.run_once(db, now=_later(2 * attempt * notification_delivery.RETRY_MAX_SECONDS))
+    assert result["failed"] == 1
+
+    row = _reload(db, notification.id)
+    assert row.delivery_attempts == notification_delivery.MAX_ATTEMPTS
+    assert row.next_attempt_at is None and not row.is_sent
+    assert worker.run_once(db, now=_later(10 ** 7))["claimed"] == 0
+
+
+def test_results_after_an_expired_lease_are_discarded(db, accounts):
+    notification = _notification(db, accounts)
+    now = datetime.now(timezone.utc)
+    first_lease = now + notification_delivery.LEASE
+    second_lease = first_lease + notification_delivery.LEASE
+
+    assert len(crud.claim_due_notifications(db, now, 10, first_lease)) == 1
+    # The first worker stalls past its lease and another one claims the row
+    assert len(crud.claim_due_notifications(db, first_lease + timedelta(seconds=1), 10, second_lease)) == 1
+    assert len(crud.claim_due_notifications(db, first_lease + timedelta(seconds=2), 10, second_lease)) == 0
+
+    late_retry = {"id": notification.id, "delivered_via": ["email"], "next_attempt_at": now, "delivery_error": "late"}
+    assert crud.record_notification_deliveries(db, [notification.id], [late_retry], first_lease, now) == 0
+    row = _reload(db, notification.id)
+    assert not row.is_sent and row.delivery_error is None and row.delivered_via in (None, [])
+
+    assert crud.record_notification_deliveries(db, [notification.id], [], second_lease, now) == 1
+    assert _reload(db, notification.id).is_sent
+
+
+def test_channel_backends():
+    assert set(notification_delivery.create_channels("live")) == {"email", "sms"}
+    assert all(isinstance(channel, FakeChannel) for channel in notification_delivery.create_channels("fake").values())
+    with pytest.raises(ValueError):
+        notification_delivery.create_channels("carrier-pigeon")
@@ -0,0 +1,93 @@
+"""Coalescing of same-type notifications into digests."""
+
+from database import crud, models, schemas
+from services import notification_digest
+
+
+def _notify(db, user_id, title="Booking updated", entity_id=1, kind=models.NotificationType.BOOKING_UPDATE):
+    return crud.create_notification(db, schemas.NotificationCreate(
+        user_id=user_id, title=title, message=title, notification_type=kind,
+        related_entity_type="booking", related_entity_id=entity_id
+    ))
+
+
+def _notifications(db, user_id):
+    return db.query(models.Notification).filter_by(user_id=user_id).order_by(models.Notification.id).all()
+
+
+def test_same_key_within_window_merges_into_one_digest(db, accounts):
+    user_id = accounts.customer_user.id
+    first = _notify(db, user_id, "Status: token paid")
+    second = _notify(db, user_id, "Status: confirmed")
+
+    assert second.id == first.id
+    [digest] = _notifications(db, user_id)
+    assert digest.coalesced_count == 2
+    assert digest.title == "Status: confirmed (+1 more)"
+    assert crud.get_unread_notification_count(db, user_id) == 1
+
+
+def test_different_entities_are_not_merged(db, accounts):
+    user_id = accounts.customer_user.id
+    _notify(db, user_id, entity_id=1)
+    _notify(db, user_id, entity_id=2)
+
+    assert [n.coalesced_count for n in _notifications(db, user_id)] == [1, 1]
+    assert crud.get_unread_notification_count(db, user_id) == 2
+
+
+def test_read_digest_is_closed(db, accounts):
+    user_id = accounts.customer_user.id
+    first = _notify(db, user_id)
+    crud.mark_notification_as_read(db, first.id)
+    second = _notify(db, user_id)
+
+    assert second.id != first.id
+    assert crud.get_unread_notification_count(db, user_id) == 1
+
+
+def test_types_without_window_are_never_merged(db, accounts):
+    user_id = accounts.customer_user.id
+    _notify(db, user_id, kind=models.NotificationType.PAYMENT_DUE)
+    _notify(db, user_id, kind=models.NotificationType.PAYMENT_DUE)
+
+    assert len(_notifications(db, user_id)) == 2
+
+
+def test_bulk_insert_collapses_rows_with_the_same_key(db, accounts):
+    user_id = accounts.customer_user.id
+    rows = [
+        {
+            "user_id": user_id, "title": f"Progress {n}", "message": "m",
+            "notification_type": models.NotificationType.PROGRESS_UPDATE,
+            "related_entity_type": "project", "related_entity_id": accounts.project.id,
+        }
+        for n in range(3)
+    ]
+    crud.insert_notifications(db, rows)
+    db.commit()
+
+    [digest] = _notifications(db, user_id)
+    assert digest.coalesced_count == 3
+    assert digest.title == "Progress 2 (+2 more)"
+    assert crud.get_unread_notification_count(db, user_id) == 1
+
+
+def test_setting_overrides_windows_and_invalid_entries_are_ignored(db, accounts):
+    db.add(models.SystemSetting(
+        setting_key=notification_digest.DIGEST_SETTING_KEY, setting_type="json",
+        setting_value={"booking_update": 0, "payment_due": 15, "no_such_type": 5, "progress_update": "soon"}
+    ))
+    db.commit()
+
+    windows = notification_digest.get_digest_windows(db)
+    assert models.NotificationType.BOOKING_UPDATE not in windows
+    assert windows[models.NotificationType.PAYMENT_DUE].total_seconds() == 15 * 60
+    assert windows[models.NotificationType.PROGRESS_UPDATE] == notification_digest.DIGEST_WINDOWS[
+        models.NotificationType.PROGRESS_UPDATE
+    ]
+
+    user_id = accounts.customer_user.id
+    _notify(db, user_id)
+    _notify(db, user_id)
+    assert len(_notifications(db, user_id)) == 2
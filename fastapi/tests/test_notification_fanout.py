@@ -0,0 +1,34 @@
+"""Delivery of project-wide notification fan-outs."""
+
+from decimal import Decimal
+
+from sqlalchemy.orm import sessionmaker
+
+from database import crud, models, schemas
+from services import notification_fanout
+
+
+def test_background_delivery_runs_only_the_queued_fanout(db, engine, accounts, monkeypatch):
+    monkeypatch.setattr(notification_fanout, "SessionLocal", sessionmaker(bind=engine))
+    db.add(models.Booking(
+        customer_id=accounts.customer.id, unit_id=accounts.unit.id,
+        total_amount=Decimal("6000000.00"), booking_status=models.BookingStatus.BOOKING_CONFIRMED
+    ))
+    backlog = crud.queue_notification_fanout(
+        db, accounts.project.id, "construction_update", 0, models.NotificationType.PROGRESS_UPDATE, "Older", "Older"
+    )
+    db.commit()
+    update = crud.create_construction_update(db, schemas.ConstructionUpdateCreate(
+        project_id=accounts.project.id, posted_by=accounts.builder_user.id,
+        update_title="Slab cast", update_content="Level 3 slab is done", update_type=models.UpdateType.MILESTONE
+    ))
+
+    fanout_id = crud.get_pending_fanout_id(db, "construction_update", update.id)
+    assert fanout_id is not None and fanout_id != backlog.id
+    notification_fanout.deliver_in_background(fanout_id)
+
+    db.expire_all()
+    assert db.get(models.NotificationFanout, fanout_id).status == models.FanoutStatus.COMPLETED
+    assert db.get(models.NotificationFanout, backlog.id).status == models.FanoutStatus.PENDING
+    assert crud.get_unread_notification_count(db, accounts.customer_user.id) == 1
+    assert crud.get_pending_fanout_id(db, "construction_update", update.id) is None
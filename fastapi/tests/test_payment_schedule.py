@@ -0,0 +1,116 @@
+"""Payment schedule generation."""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from database import models, schemas
+from services import payment_schedule
+from services.payment_schedule import BookingTerms, build_schedule, emi_breakdown, split_amount
+
+OPTIONS = schemas.PaymentScheduleOptions(installment_count=3, loan_tenure_months=12)
+
+
+def _terms(**overrides):
+    values = dict(
+        booking_id=1, total_amount=Decimal("1000000.00"), token_amount=Decimal("100000.00"),
+        payment_plan=models.PaymentPlan.INSTALLMENTS, loan_amount=Decimal("0"),
+        start_date=date(2026, 1, 15)
+    )
+    values.update(overrides)
+    return BookingTerms(**values)
+
+
+def test_split_amount_puts_the_residue_on_the_last_part():
+    assert split_amount(Decimal("100.00"), 3) == [Decimal("33.33"), Decimal("33.33"), Decimal("33.34")]
+    assert split_amount(Decimal("100.00"), 0) == []
+
+
+def test_emi_principal_parts_repay_the_loan_exactly():
+    emi, principal, interest = emi_breakdown(Decimal("500000.00"), Decimal("8.50"), 12)
+    assert len(principal) == 12
+    assert sum(principal) == Decimal("500000.00")
+    assert all(p + i == emi for p, i in zip(principal[:-1], interest[:-1]))
+    assert principal == sorted(principal)
+
+
+@pytest.mark.parametrize("plan", list(models.PaymentPlan))
+def test_schedule_sums_to_the_booking_total(plan):
+    rows = build_schedule(
+        _terms(payment_plan=plan, loan_amount=Decimal("600000.00")), [], OPTIONS
+    )
+    assert sum(row["amount"] for row in rows) == Decimal("1000000.00")
+    assert [row["due_date"] for row in rows] == sorted(row["due_date"] for row in rows)
+    assert all(row["is_scheduled"] for row in rows)
+
+
+@pytest.mark.parametrize("plan", list(models.PaymentPlan))
+def test_token_covering_the_total_leaves_no_zero_rows(plan):
+    rows = build_schedule(
+        _terms(payment_plan=plan, token_amount=Decimal("1000000.00"), loan_amount=Decimal("600000.00")), [], OPTIONS
+    )
+    assert [(row["notes"], row["amount"]) for row in rows] == [("Token amount", Decimal("1000000.00"))]
+
+
+def test_paid_amount_covers_the_earliest_rows_first():
+    rows = build_schedule(_terms(paid_amount=Decimal("400000.00")), [], OPTIONS)
+    # Token (100000) and the first instalment (300000) are paid off
+    assert [row["notes"] for row in rows] == ["Instalment 2", "Instalment 3"]
+    assert sum(row["amount"] for row in rows) == Decimal("600000.00")
+
+
+def test_milestones_set_due_dates_and_nothing_falls_due_before_the_earliest_date():
+    start = date(2026, 1, 15)
+    milestones = [("Foundation", start - timedelta(days=30)), ("Slab", date(2026, 6, 1)), ("Finishing", None)]
+    rows = build_schedule(_terms(earliest_due_date=date(2026, 3, 1)), milestones, OPTIONS)
+
+    assert [(row["notes"], row["due_date"]) for row in rows] == [
+        ("Token amount", date(2026, 3, 1)),
+        ("Milestone: Foundation", date(2026, 3, 1)),
+        ("Milestone: Slab", date(2026, 6, 1)),
+        ("Milestone: Finishing", date(2026, 7, 1)),
+    ]
+
+
+@pytest.fixture
+def booking(db, accounts):
+    booking = models.Booking(
+        customer_id=accounts.customer.id, unit_id=accounts.unit.id,
+        total_amount=Decimal("1000000.00"), token_amount=Decimal("100000.00"),
+        payment_plan=models.PaymentPlan.INSTALLMENTS
+    )
+    db.add(booking)
+    db.commit()
+    return booking
+
+
+def test_regeneration_replaces_only_generated_pending_payments(db, booking):
+    manual = models.Payment(
+        booking_id=booking.id, payment_type=models.PaymentType.INSTALLMENT, amount=Decimal("5000.00"),
+        payment_method=models.PaymentMethod.CASH, payment_status=models.PaymentStatus.PENDING,
+        due_date=date.today(), notes="Parking"
+    )
+    db.add(manual)
+    db.commit()
+
+    first = payment_schedule.generate_booking_schedule(db, booking, OPTIONS)
+    second = payment_schedule.generate_booking_schedule(db, booking, OPTIONS)
+
+    assert len(first) == len(second) == 4
+    assert all(payment.due_date >= date.today() for payment in second)
+    pending = db.query(models.Payment).filter_by(
+        booking_id=booking.id, payment_status=models.PaymentStatus.PENDING
+    ).all()
+    assert len(pending) == 5
+    assert db.get(models.Payment, manual.id).is_scheduled is False
+
+
+def test_regeneration_deducts_completed_payments(db, booking):
+    booking.paid_amount = Decimal("250000.00")
+    db.commit()
+
+    payments = payment_schedule.generate_booking_schedule(db, booking, OPTIONS)
+
+    assert sum(payment.amount for payment in payments) == Decimal("750000.00")
+    assert [payment.notes for payment in payments][0] == "Instalment 1"
@@ -0,0 +1,43 @@
+"""check_query_plans.py and the migrations, run against a scratch SQLite database."""
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+
+import check_query_plans
+import migrate
+from database.database import Base
+
+
+@pytest.fixture(scope="module")
+def scratch_engine():
+    engine = check_query_plans.create_scratch_engine("sqlite://")
+    check_query_plans.build_schema(engine)
+    yield engine
+    check_query_plans.drop_scratch(engine)
+
+
+def test_migrations_match_models(scratch_engine):
+    with scratch_engine.connect() as connection:
+        context = MigrationContext.configure(connection, opts={"compare_type": True})
+        assert compare_metadata(context, Base.metadata) == []
+
+
+def test_migrations_downgrade_and_upgrade_again(tmp_path):
+    engine = check_query_plans.create_scratch_engine(f"sqlite:///{tmp_path}/roundtrip.db")
+    try:
+        with engine.connect() as connection:
+            config = migrate.get_config(connection)
+            command.upgrade(config, "head")
+            command.downgrade(config, "base")
+            command.upgrade(config, "head")
+            connection.commit()
+    finally:
+        check_query_plans.drop_scratch(engine)
+
+
+def test_hot_queries_use_indexes(scratch_engine, capsys):
+    check_query_plans.seed(scratch_engine)
+    failures = check_query_plans.check(scratch_engine)
+    assert failures == [], capsys.readouterr().out
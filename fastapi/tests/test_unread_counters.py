@@ -0,0 +1,81 @@
+"""Maintained unread counters for messages and notifications."""
+
+from database import crud, models, schemas
+
+
+def _message(db, accounts, text="Is the east-facing unit available?"):
+    return crud.create_message(db, schemas.MessageCreate(
+        sender_id=accounts.customer_user.id, recipient_id=accounts.builder_user.id,
+        message_content=text, project_id=accounts.project.id
+    ))
+
+
+def _notification(db, accounts, entity_id):
+    return crud.create_notification(db, schemas.NotificationCreate(
+        user_id=accounts.customer_user.id, title="Payment due", message="Instalment due",
+        notification_type=models.NotificationType.PAYMENT_DUE,
+        related_entity_type="payment", related_entity_id=entity_id
+    ))
+
+
+def _counter(db, user_id):
+    db.expire_all()
+    return crud.get_unread_counter(db, user_id)
+
+
+def test_messages_bump_the_recipient_and_reading_the_conversation_clears_it(db, accounts):
+    builder_id = accounts.builder_user.id
+    first = _message(db, accounts)
+    _message(db, accounts)
+    third = _message(db, accounts)
+    assert _counter(db, builder_id).unread_messages == 3
+    assert _counter(db, accounts.customer_user.id).unread_messages == 0
+
+    marked = crud.mark_conversation_read(
+        db, builder_id, accounts.customer_user.id, accounts.project.id, up_to_message_id=first.id
+    )
+    assert marked == 1
+    assert _counter(db, builder_id).unread_messages == 2
+
+    crud.mark_conversation_read(db, builder_id, accounts.customer_user.id, accounts.project.id, third.id)
+    assert _counter(db, builder_id).unread_messages == 0
+    # Reading again changes nothing
+    assert crud.mark_conversation_read(db, builder_id, accounts.customer_user.id, accounts.project.id) == 0
+    assert _counter(db, builder_id).unread_messages == 0
+
+
+def test_notifications_bump_and_read_receipts_decrement(db, accounts):
+    user_id = accounts.customer_user.id
+    notifications = [_notification(db, accounts, entity_id) for entity_id in range(4)]
+    assert crud.get_unread_notification_count(db, user_id) == 4
+
+    crud.mark_notification_as_read(db, notifications[0].id)
+    crud.mark_notification_as_read(db, notifications[0].id)
+    assert _counter(db, user_id).unread_notifications == 3
+
+    assert crud.mark_all_notifications_as_read(db, user_id, up_to_notification_id=notifications[2].id) == 2
+    assert _counter(db, user_id).unread_notifications == 1
+
+
+def test_counters_never_go_below_zero(db, accounts):
+    user_id = accounts.builder_user.id
+    crud.bump_unread_counters(db, {user_id: 2}, "unread_messages")
+    crud.bump_unread_counters(db, {user_id: -5}, "unread_messages")
+    db.commit()
+
+    assert _counter(db, user_id).unread_messages == 0
+
+
+def test_recompute_repairs_drift_and_creates_missing_counters(db, accounts):
+    _message(db, accounts)
+    _notification(db, accounts, 1)
+    db.query(models.UserUnreadCounter).filter_by(user_id=accounts.builder_user.id).update({"unread_messages": 7})
+    db.query(models.UserUnreadCounter).filter_by(user_id=accounts.customer_user.id).delete()
+    db.commit()
+
+    fixed = crud.recompute_unread_counters(db, 0, 10 ** 9)
+    db.commit()
+
+    assert fixed >= 1
+    assert _counter(db, accounts.builder_user.id).unread_messages == 1
+    assert _counter(db, accounts.customer_user.id).unread_notifications == 1
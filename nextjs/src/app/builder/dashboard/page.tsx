@@ -6,7 +6,7 @@ import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/com
 import { Progress } from "@/components/ui/progress";
 import { Skeleton } from "@/components/ui/skeleton";
 import { useToast } from "@/hooks/use-toast";
-import { appointmentsService, bookingsService, projectsService } from "@/lib/services";
+import { appointmentsService, bookingsService, builderService, projectsService } from "@/lib/services";
 import { ArrowRight, Building2, Calendar, FileText, Plus, RefreshCw, TrendingUp, Users } from "lucide-react";
 import Link from "next/link";
 import { useRouter } from "next/navigation";
@@ -29,17 +29,21 @@ export default function BuilderDashboard() {
     const fetchDashboardData = async () => {
         setIsLoading(true);
         try {
+            // Headline numbers come precomputed from the dashboard endpoint
+            const dashboardResponse = await builderService.getDashboard();
+            if (dashboardResponse.data) {
+                setStats({
+                    totalProjects: dashboardResponse.data.total_projects,
+                    activeProjects: dashboardResponse.data.active_projects,
+                    pendingBookings: dashboardResponse.data.pending_bookings,
+                    upcomingAppointments: dashboardResponse.data.upcoming_appointments,
+                });
+            }
+
             // Fetch projects
             const projectsResponse = await projectsService.getProjects({ page: 1, limit: 3 });
             if (projectsResponse.data) {
                 setRecentProjects(projectsResponse.data.projects);
-                setStats(prev => ({
-                    ...prev,
-                    totalProjects: projectsResponse.data!.total,
-                    activeProjects: projectsResponse.data!.projects.filter(
-                        (p: any) => p.status === "in_progress" || p.status === "approved"
-                    ).length,
-                }));
             }
 
             // Fetch bookings
@@ -49,11 +53,6 @@ export default function BuilderDashboard() {
                 status: "pending",
             });
             if (bookingsResponse.data) {
-                setStats(prev => ({
-                    ...prev,
-                    pendingBookings: bookingsResponse.data!.total,
-                }));
-
                 // Create recent activity from bookings
                 const bookingActivities = bookingsResponse.data!.bookings.slice(0, 3).map((booking: any) => ({
                     id: `booking-${booking.id}`,
@@ -84,10 +83,6 @@ export default function BuilderDashboard() {
                         type: apt.appointment_type.replace("_", " "),
                     }))
                 );
-                setStats(prev => ({
-                    ...prev,
-                    upcomingAppointments: appointments.length,
-                }));
             }
         } catch (error) {
             console.error("Dashboard error:", error);
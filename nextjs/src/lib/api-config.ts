@@ -16,6 +16,11 @@ export const API_ENDPOINTS = {
         ME: "/api/auth/me",
     },
 
+    // Builder portal
+    BUILDER: {
+        DASHBOARD: "/api/builder/dashboard",
+    },
+
     // Projects
     PROJECTS: {
         LIST: "/api/projects",
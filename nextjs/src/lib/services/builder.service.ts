@@ -0,0 +1,34 @@
+/**
+ * Builder Service
+ * Handles builder portal API calls
+ */
+
+import { api } from "../api-client";
+import { API_ENDPOINTS } from "../api-config";
+
+export interface BuilderDashboard {
+    builder_id: number;
+    total_projects: number;
+    active_projects: number;
+    total_units: number;
+    available_units: number;
+    total_bookings: number;
+    pending_bookings: number;
+    confirmed_bookings: number;
+    total_revenue: string;
+    pending_revenue: string;
+    upcoming_appointments: number;
+    unread_messages: number;
+    open_change_requests: number;
+    average_progress: string;
+    refreshed_at: string;
+}
+
+export const builderService = {
+    /**
+     * Get the precomputed dashboard numbers (Builder only)
+     */
+    async getDashboard() {
+        return api.get<BuilderDashboard>(API_ENDPOINTS.BUILDER.DASHBOARD);
+    },
+};
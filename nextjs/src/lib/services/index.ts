@@ -6,6 +6,7 @@
 export * from "./appointments.service";
 export * from "./auth.service";
 export * from "./bookings.service";
+export * from "./builder.service";
 export { changeRequestsService } from "./change-requests.service";
 export * from "./messages.service";
 export * from "./notifications.service";